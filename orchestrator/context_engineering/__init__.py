@@ -7,13 +7,57 @@ Advanced context engineering system with RAG capabilities, knowledge base integr
 context-aware prompts, historical pattern recognition, and advanced agent collaboration.
 """
 
-from .chunking import DocumentChunker, MultiModalChunker, ChunkMetadata
-from .embeddings import EmbeddingGenerator, ContextAwareEmbedding, create_embedding_generator
-from .vector_store import PgVectorStore, ContextAwareVectorStore, VectorSearchResult
-from .context_retriever import ContextRetriever, SmartContextRetriever, ContextResult, RetrievalConfig
-from .prompt_builder import ContextAwarePromptBuilder, AdaptivePromptBuilder, PromptType
-from .learning_engine import AdaptiveLearningEngine, PatternRecognitionEngine, TaskPattern, LearningEvent
-from .agent_collaboration import CollaborationOrchestrator, SmartAgentRegistry, AgentProfile, create_collaboration_system
+import importlib
+
+# Public names and the submodules defining them. Submodules load on first
+# access, so importing one light module (e.g. code_parsing) does not pull in
+# asyncpg, sentence-transformers and the rest of the package.
+_EXPORTS = {
+    'DocumentChunker': '.chunking',
+    'MultiModalChunker': '.chunking',
+    'ChunkMetadata': '.chunking',
+    'ParseCache': '.code_parsing',
+    'ParsedSource': '.code_parsing',
+    'parse_python_source': '.code_parsing',
+    'EmbeddingGenerator': '.embeddings',
+    'ContextAwareEmbedding': '.embeddings',
+    'create_embedding_generator': '.embeddings',
+    'EmbeddingBatchError': '.openai_dispatcher',
+    'PgVectorStore': '.vector_store',
+    'ContextAwareVectorStore': '.vector_store',
+    'VectorSearchResult': '.vector_store',
+    'HNSWConfig': '.vector_store',
+    'RECALL_PROFILES': '.vector_store',
+    'STORAGE_MODES': '.vector_store',
+    'PARTITION_KEYS': '.vector_store',
+    'LocalVectorStore': '.local_store',
+    'ContextRetriever': '.context_retriever',
+    'SmartContextRetriever': '.context_retriever',
+    'ContextResult': '.context_retriever',
+    'RetrievalConfig': '.context_retriever',
+    'ContextAwarePromptBuilder': '.prompt_builder',
+    'AdaptivePromptBuilder': '.prompt_builder',
+    'PromptType': '.prompt_builder',
+    'AdaptiveLearningEngine': '.learning_engine',
+    'PatternRecognitionEngine': '.learning_engine',
+    'TaskPattern': '.learning_engine',
+    'LearningEvent': '.learning_engine',
+    'CollaborationOrchestrator': '.agent_collaboration',
+    'SmartAgentRegistry': '.agent_collaboration',
+    'AgentProfile': '.agent_collaboration',
+    'create_collaboration_system': '.agent_collaboration',
+}
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
 
 __version__ = "2.0.0"
 
@@ -22,16 +66,25 @@ __all__ = [
     'DocumentChunker',
     'MultiModalChunker', 
     'ChunkMetadata',
+    'ParseCache',
+    'ParsedSource',
+    'parse_python_source',
     
     # Embeddings
     'EmbeddingGenerator',
     'ContextAwareEmbedding',
     'create_embedding_generator',
+    'EmbeddingBatchError',
     
     # Vector Store
     'PgVectorStore',
     'ContextAwareVectorStore',
     'VectorSearchResult',
+    'HNSWConfig',
+    'RECALL_PROFILES',
+    'STORAGE_MODES',
+    'PARTITION_KEYS',
+    'LocalVectorStore',
     
     # Context Retrieval
     'ContextRetriever',
@@ -60,19 +113,34 @@ __all__ = [
 # Convenience function to create a complete context engineering system
 async def create_context_engineering_system(database_url: str, 
                                            embedding_model_type: str = "sentence_transformer",
-                                           embedding_model_name: str = None) -> dict:
+                                           embedding_model_name: str = None,
+                                           partition_by: str = None,
+                                           vector_store_type: str = "pgvector",
+                                           local_store_path: str = None) -> dict:
     """
     Create a complete context engineering system with all components
     
     Args:
-        database_url: PostgreSQL database URL with pgvector extension
+        database_url: PostgreSQL database URL with pgvector extension (unused for a local store)
         embedding_model_type: Type of embedding model ('sentence_transformer' or 'openai')
         embedding_model_name: Specific model name (optional)
+        partition_by: Partition the embeddings table by 'content_type' or 'namespace' (optional)
+        vector_store_type: 'pgvector' or 'local' (embedded NumPy/mmap store, no server needed)
+        local_store_path: Directory of the local store (defaults to LOCAL_VECTOR_STORE_PATH)
         
     Returns:
         Dictionary containing all initialized components
     """
     
+    from .embeddings import create_embedding_generator
+    from .vector_store import ContextAwareVectorStore
+    from .local_store import LocalVectorStore
+    from .chunking import MultiModalChunker
+    from .context_retriever import SmartContextRetriever
+    from .prompt_builder import AdaptivePromptBuilder
+    from .learning_engine import AdaptiveLearningEngine
+    from .agent_collaboration import create_collaboration_system
+    
     # Initialize embedding generator
     embedding_generator = create_embedding_generator(
         model_type=embedding_model_type,
@@ -80,7 +148,12 @@ async def create_context_engineering_system(database_url: str,
     )
     
     # Initialize vector store
-    vector_store = ContextAwareVectorStore(database_url)
+    if vector_store_type == "local":
+        vector_store = LocalVectorStore(local_store_path)
+    elif vector_store_type == "pgvector":
+        vector_store = ContextAwareVectorStore(database_url, partition_by=partition_by)
+    else:
+        raise ValueError(f"Unsupported vector store type: {vector_store_type}")
     await vector_store.initialize(dimension=embedding_generator.config.dimension)
     
     # Initialize document chunker
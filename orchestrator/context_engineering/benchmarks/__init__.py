@@ -0,0 +1,7 @@
+"""
+Context Engineering Benchmarks
+==============================
+
+Standalone benchmark scripts for the context engineering storage and
+embedding paths. Each module is runnable with ``python -m``.
+"""
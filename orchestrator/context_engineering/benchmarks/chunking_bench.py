@@ -0,0 +1,124 @@
+"""
+Text Splitter Benchmark
+=======================
+
+Times RecursiveCharacterTextSplitter on a large synthetic document
+(100 MB by default): computing chunk offsets, then materializing chunk
+text. For comparison, the previous merge, which rebuilt the candidate
+chunk by string concatenation and re-measured it for every split, runs
+on a prefix of the document (``--reference-mb``).
+
+Usage:
+    python -m context_engineering.benchmarks.chunking_bench \\
+        --megabytes 100 --chunk-size 1000 --chunk-overlap 200
+"""
+
+import asyncio
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from context_engineering.chunking import RecursiveCharacterTextSplitter
+
+VOCABULARY = ("the embedding store partitions vectors by namespace while agents retrieve context "
+              "chunks from documents and code using hybrid search with reranking").split()
+
+def make_document(megabytes: float, seed: int = 42) -> str:
+    """Paragraphs of words, with the occasional paragraph longer than a chunk"""
+    rng = random.Random(seed)
+    paragraphs = []
+    paragraph = ' '.join(rng.choice(VOCABULARY) for _ in range(4000))
+    size = 0
+    target = int(megabytes * 1024 * 1024)
+    while size < target:
+        start = rng.randrange(len(paragraph) // 2)
+        length = rng.choice((200, 400, 800, 1500, 6000))
+        lines = '\n'.join(paragraph[i:i + 120] for i in range(start, start + length, 120))
+        paragraphs.append(lines)
+        size += len(lines) + 2
+    return '\n\n'.join(paragraphs)[:target]
+
+def concat_merge_split(splitter: RecursiveCharacterTextSplitter, text: str) -> List[str]:
+    """The previous split: merge by string concatenation, re-measuring every candidate"""
+    for separator in splitter.separators:
+        if separator and separator in text:
+            splits = text.split(separator)
+            break
+    else:
+        return splitter.split_text(text)
+
+    chunks = []
+    current_chunk = ""
+    for split in splits:
+        test_chunk = current_chunk + separator + split if current_chunk else split
+        if splitter.length_function(test_chunk) <= splitter.chunk_size:
+            current_chunk = test_chunk
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            if splitter.chunk_overlap > 0 and current_chunk:
+                current_chunk = current_chunk[-splitter.chunk_overlap:] + separator + split
+            else:
+                current_chunk = split
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+async def main():
+    """Main benchmark function"""
+
+    parser = argparse.ArgumentParser(description='Benchmark the offset-tracking text splitter')
+    parser.add_argument('--megabytes', type=float, default=100, help='Document size in MB')
+    parser.add_argument('--reference-mb', type=float, default=10, help='Prefix size for the previous merge (0 = skip)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Chunk size in characters')
+    parser.add_argument('--chunk-overlap', type=int, default=200, help='Chunk overlap in characters')
+    parser.add_argument('--separator', default='\n', help='Separator to split on')
+
+    args = parser.parse_args()
+
+    text = make_document(args.megabytes)
+    megabytes = len(text) / (1024 * 1024)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap,
+                                              separators=[args.separator])
+
+    start = time.perf_counter()
+    spans = splitter.split_spans(text)
+    spans_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = [text[chunk_start:chunk_end] for chunk_start, chunk_end in spans]
+    slice_seconds = time.perf_counter() - start
+
+    print(f"\nDocument: {megabytes:.1f} MB, chunk_size={args.chunk_size}, overlap={args.chunk_overlap}")
+    print(f"  offsets:      {spans_seconds:>8.2f} s  {megabytes / spans_seconds:>8.1f} MB/s  ({len(spans):,} chunks)")
+    print(f"  + text slice: {slice_seconds:>8.2f} s")
+
+    if args.reference_mb > 0:
+        prefix = text[:int(args.reference_mb * 1024 * 1024)]
+        prefix_mb = len(prefix) / (1024 * 1024)
+
+        start = time.perf_counter()
+        expected = concat_merge_split(splitter, prefix)
+        reference_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = splitter.split_text(prefix)
+        current_seconds = time.perf_counter() - start
+
+        print(f"\nPrefix: {prefix_mb:.1f} MB")
+        print(f"  previous merge: {reference_seconds:>8.2f} s  {prefix_mb / reference_seconds:>8.1f} MB/s")
+        print(f"  offset merge:   {current_seconds:>8.2f} s  {prefix_mb / current_seconds:>8.1f} MB/s"
+              f"  ({reference_seconds / current_seconds:.1f}x)")
+        print(f"  identical chunks: {actual == expected}")
+
+    del chunks
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
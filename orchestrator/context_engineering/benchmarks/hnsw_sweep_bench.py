@@ -0,0 +1,135 @@
+"""
+HNSW Recall/Latency Sweep
+=========================
+
+Loads a synthetic clustered corpus into a scratch table, then sweeps HNSW
+build parameters (m, ef_construction) and per-query ef_search, reporting
+build time, recall@k against exact search, and p50/p95 query latency.
+
+Usage:
+    python -m context_engineering.benchmarks.hnsw_sweep_bench \\
+        --database-url postgresql://... --rows 200000 --m 16,32 --ef-construction 64,128 \\
+        --ef-search 20,40,100,200
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from context_engineering.vector_store import PgVectorStore, HNSWConfig
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item]
+
+def make_corpus(rows: int, dimension: int, clusters: int, seed: int = 42) -> np.ndarray:
+    """Generate unit-normalized vectors drawn around random cluster centres"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    assignments = rng.integers(0, clusters, size=rows)
+    vectors = centres[assignments] + 0.35 * rng.standard_normal((rows, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    """Exact cosine top-k ids (corpus rows are unit-normalized)"""
+    truth = []
+    for start in range(0, len(queries), 256):
+        scores = queries[start:start + 256] @ corpus.T
+        top = np.argpartition(-scores, k, axis=1)[:, :k]
+        truth.extend({f"bench_{idx}" for idx in row} for row in top)
+    return truth
+
+async def main():
+    """Main benchmark function"""
+
+    parser = argparse.ArgumentParser(description='Sweep HNSW parameters for recall and latency')
+    parser.add_argument('--database-url', help='Database URL (defaults to BENCHMARK_DATABASE_URL)')
+    parser.add_argument('--rows', type=int, default=100000, help='Synthetic corpus size')
+    parser.add_argument('--dimension', type=int, default=384, help='Vector dimension')
+    parser.add_argument('--clusters', type=int, default=200, help='Number of synthetic clusters')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries per setting')
+    parser.add_argument('--k', type=int, default=10, help='Results per query')
+    parser.add_argument('--m', type=_int_list, default=[16], help='Comma-separated m values')
+    parser.add_argument('--ef-construction', type=_int_list, default=[64], help='Comma-separated ef_construction values')
+    parser.add_argument('--ef-search', type=_int_list, default=[10, 20, 40, 100, 200], help='Comma-separated ef_search values')
+    parser.add_argument('--keep-table', action='store_true', help='Do not drop the scratch table afterwards')
+
+    args = parser.parse_args()
+
+    database_url = args.database_url or os.getenv('BENCHMARK_DATABASE_URL')
+    if not database_url:
+        print("Database URL not provided. Set BENCHMARK_DATABASE_URL or use --database-url")
+        return 1
+
+    table_name = "hnsw_benchmark_embeddings"
+    store = PgVectorStore(database_url, table_name=table_name,
+                          hnsw_config=HNSWConfig(concurrent_build_rows=sys.maxsize))
+    await store.initialize(dimension=args.dimension)
+
+    try:
+        corpus = make_corpus(args.rows, args.dimension, args.clusters)
+        queries = make_corpus(args.queries, args.dimension, args.clusters, seed=7)
+        truth = exact_top_k(corpus, queries, args.k)
+
+        async with store.pool.acquire() as conn:
+            await conn.execute(f"TRUNCATE {table_name};")
+
+        load_stats = await store.bulk_add_embeddings(
+            vectors=corpus,
+            ids=[f"bench_{i}" for i in range(args.rows)],
+            contents=[f"synthetic chunk {i}" for i in range(args.rows)],
+            source_files=['synthetic'] * args.rows,
+            chunk_indices=list(range(args.rows))
+        )
+        print(f"Loaded {args.rows} rows at {load_stats['rows_per_sec']:.0f} rows/sec")
+
+        print(f"\n{'m':>4} {'ef_con':>7} {'build_s':>8} {'ef_search':>9} "
+              f"{'recall@k':>9} {'p50_ms':>8} {'p95_ms':>8}")
+
+        for m in args.m:
+            for ef_construction in args.ef_construction:
+                store.hnsw_config.m = m
+                store.hnsw_config.ef_construction = ef_construction
+
+                async with store.pool.acquire() as conn:
+                    await conn.execute(f"DROP INDEX IF EXISTS {table_name}_embedding_idx;")
+
+                build_start = time.perf_counter()
+                await store._create_vector_index(f"{table_name}_embedding_idx", table_name)
+                build_seconds = time.perf_counter() - build_start
+
+                for ef_search in args.ef_search:
+                    latencies = []
+                    hits = 0
+                    for query, expected in zip(queries, truth):
+                        start = time.perf_counter()
+                        results = await store.similarity_search(
+                            query, limit=args.k, similarity_threshold=-1.0, ef_search=ef_search
+                        )
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        hits += len(expected.intersection(result.id for result in results))
+
+                    recall = hits / (args.k * len(queries))
+                    p50, p95 = np.percentile(latencies, [50, 95])
+                    print(f"{m:>4} {ef_construction:>7} {build_seconds:>8.1f} {ef_search:>9} "
+                          f"{recall:>9.3f} {p50:>8.2f} {p95:>8.2f}")
+
+    finally:
+        if not args.keep_table:
+            async with store.pool.acquire() as conn:
+                await conn.execute(f"DROP TABLE IF EXISTS {table_name};")
+        await store.close()
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,114 @@
+"""
+Inference Worker Scaling Benchmark
+==================================
+
+Measures sentence-transformer embedding throughput against the number of
+inference worker processes, together with the longest event-loop stall seen
+while encoding (0 workers = the single background thread path). With
+--mixed, text lengths vary widely and the padding efficiency of the
+length-bucketed batches is reported next to that of input-order batches.
+
+Usage:
+    python -m context_engineering.benchmarks.inference_workers_bench \\
+        --texts 4000 --workers 0,1,2,4,8 [--mixed]
+"""
+
+import asyncio
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from context_engineering.embeddings import EmbeddingGenerator, EmbeddingConfig
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item]
+
+def make_texts(count: int, words: int, seed: int = 42, mixed: bool = False) -> List[str]:
+    """Synthetic sentences of roughly equal length, or of mixed lengths up to 10x words"""
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"token{i}" for i in range(5000)]
+    if mixed:
+        # Mostly short titles with a long tail of code-sized chunks
+        sizes = np.minimum(rng.pareto(1.2, size=count) * words / 4 + 3, words * 10).astype(int)
+    else:
+        sizes = np.full(count, words)
+    return [" ".join(rng.choice(vocabulary, size=size)) for size in sizes]
+
+async def _watch_loop(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Longest observed delay of a periodic timer on the event loop, in ms"""
+    loop = asyncio.get_running_loop()
+    worst = 0.0
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - expected)
+    return worst * 1000
+
+async def run(workers: int, texts: List[str], model_name: str, batch_size: int) -> dict:
+    """Embed texts with a given worker count; returns throughput and loop stall"""
+    generator = EmbeddingGenerator(EmbeddingConfig(
+        model_name=model_name,
+        batch_size=batch_size,
+        cache_embeddings=False,
+        inference_workers=workers
+    ))
+
+    try:
+        # Warm up: start processes and load replicas outside the timed run
+        await generator._generate_sentence_transformer_embeddings(texts[:max(workers, 1) * batch_size])
+
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(_watch_loop(stop))
+
+        start = time.perf_counter()
+        embeddings = await generator._generate_sentence_transformer_embeddings(texts)
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        worst_stall_ms = await watcher
+
+        assert len(embeddings) == len(texts)
+        return {
+            'texts_per_sec': len(texts) / elapsed,
+            'seconds': elapsed,
+            'worst_loop_stall_ms': worst_stall_ms,
+            'padding': generator.get_padding_stats()
+        }
+    finally:
+        await generator.close()
+
+async def main():
+    """Main benchmark function"""
+
+    parser = argparse.ArgumentParser(description='Benchmark embedding throughput versus worker count')
+    parser.add_argument('--texts', type=int, default=4000, help='Number of texts to embed')
+    parser.add_argument('--words', type=int, default=60, help='Words per text')
+    parser.add_argument('--workers', type=_int_list, default=[0, 1, 2, 4], help='Comma-separated worker counts')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2', help='Sentence-transformer model')
+    parser.add_argument('--batch-size', type=int, default=32, help='Model batch size')
+    parser.add_argument('--mixed', action='store_true', help='Use texts of widely varying length')
+
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts, args.words, mixed=args.mixed)
+
+    print(f"\n{'workers':>8} {'texts/s':>10} {'seconds':>9} {'max_stall_ms':>13} "
+          f"{'pad_eff':>8} {'input_order':>12} {'truncated':>10}")
+    for workers in args.workers:
+        result = await run(workers, texts, args.model, args.batch_size)
+        padding = result['padding']
+        print(f"{workers:>8} {result['texts_per_sec']:>10.1f} {result['seconds']:>9.2f} "
+              f"{result['worst_loop_stall_ms']:>13.1f} {padding['padding_efficiency']:>8.2f} "
+              f"{padding['input_order_padding_efficiency']:>12.2f} {padding['truncated_texts']:>10}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
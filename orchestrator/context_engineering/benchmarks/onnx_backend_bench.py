@@ -0,0 +1,129 @@
+"""
+ONNX Backend Benchmark
+======================
+
+Compares the PyTorch sentence-transformer with its ONNX fp32 and int8
+exports on CPU: texts/sec, resident memory of one worker process and
+cosine similarity to the PyTorch embeddings. Each backend runs in its own
+spawned process, so memory figures are what one inference worker costs:
+load_mb is the model itself, peak RSS adds the imports and activations.
+
+Usage:
+    python -m context_engineering.benchmarks.onnx_backend_bench \\
+        --texts 2000 --threads 1 --backends pytorch,onnx-fp32,onnx-int8
+"""
+
+import asyncio
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from context_engineering.onnx_backend import export_onnx_model, default_export_dir, EXPORT_MANIFEST
+from context_engineering.benchmarks.inference_workers_bench import make_texts
+
+BACKENDS = ('pytorch', 'onnx-fp32', 'onnx-int8')
+PARITY_ROWS = 256
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def _measure(backend: str, model_name: str, model_dir: str, texts: List[str],
+             batch_size: int, threads: int) -> dict:
+    """Load one backend in a fresh process and time it (runs in the child)"""
+    before_load = _rss_mb()
+    if backend == 'pytorch':
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        model = SentenceTransformer(model_name, device='cpu')
+    else:
+        from context_engineering.onnx_backend import OnnxEmbeddingModel
+
+        model = OnnxEmbeddingModel(model_dir, quantized=(backend == 'onnx-int8'), intra_op_threads=threads)
+    after_load = _rss_mb()
+
+    # Same input order as the generator: sorted by length
+    ordered = sorted(texts, key=len)
+    model.encode(ordered[:batch_size], batch_size=batch_size)
+
+    start = time.perf_counter()
+    embeddings = model.encode(ordered, batch_size=batch_size, normalize_embeddings=True, show_progress_bar=False)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'texts_per_sec': len(texts) / elapsed,
+        'load_mb': after_load - before_load,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'parity_rows': np.asarray(embeddings[:PARITY_ROWS], dtype=np.float32)
+    }
+
+def _backend_list(value: str) -> List[str]:
+    backends = [item for item in value.split(',') if item]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown backends: {', '.join(sorted(unknown))}")
+    return backends
+
+async def main():
+    """Main benchmark function"""
+
+    parser = argparse.ArgumentParser(description='Benchmark PyTorch versus ONNX fp32/int8 embedding inference')
+    parser.add_argument('--texts', type=int, default=2000, help='Number of texts to embed')
+    parser.add_argument('--words', type=int, default=60, help='Words per text')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2', help='Sentence-transformer model')
+    parser.add_argument('--export-dir', help='ONNX export directory (default: ONNX_MODEL_DIR/<model>)')
+    parser.add_argument('--batch-size', type=int, default=32, help='Model batch size')
+    parser.add_argument('--threads', type=int, default=1, help='Intra-op threads per worker (0 = runtime default)')
+    parser.add_argument('--backends', type=_backend_list, default=list(BACKENDS), help='Comma-separated backends')
+
+    args = parser.parse_args()
+
+    export_dir = Path(args.export_dir) if args.export_dir else default_export_dir(args.model)
+    if any(backend.startswith('onnx') for backend in args.backends) and not (export_dir / EXPORT_MANIFEST).exists():
+        print(f"Exporting {args.model} to {export_dir} ...")
+        export_onnx_model(args.model, str(export_dir), quantize=True, parity_check=False)
+
+    texts = make_texts(args.texts, args.words, mixed=True)
+    loop = asyncio.get_running_loop()
+    results = {}
+
+    for backend in args.backends:
+        # A fresh process per backend keeps memory figures independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            results[backend] = await loop.run_in_executor(
+                executor, _measure, backend, args.model, str(export_dir), texts, args.batch_size, args.threads
+            )
+
+    reference = results.get('pytorch')
+    print(f"\n{'backend':>10} {'texts/s':>9} {'speedup':>8} {'load_mb':>8} {'peak_rss_mb':>12} {'min_cos':>8} {'mean_cos':>9}")
+    for backend, result in results.items():
+        speedup = result['texts_per_sec'] / reference['texts_per_sec'] if reference else float('nan')
+        if reference is not None:
+            cosines = (result['parity_rows'] * reference['parity_rows']).sum(axis=1)
+            min_cos, mean_cos = f"{cosines.min():.4f}", f"{cosines.mean():.4f}"
+        else:
+            min_cos = mean_cos = 'n/a'
+        print(f"{backend:>10} {result['texts_per_sec']:>9.1f} {speedup:>8.2f} {result['load_mb']:>8.1f} "
+              f"{result['peak_rss_mb']:>12.1f} {min_cos:>8} {mean_cos:>9}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,186 @@
+"""
+OpenAI Embedding Dispatch Benchmark
+===================================
+
+Embeds a synthetic corpus through OpenAIEmbeddingDispatcher against a local
+stub of the ``/v1/embeddings`` endpoint and reports wall-clock time per
+concurrency level. The stub adds a fixed latency per request, enforces its
+own requests-per-minute limit (answering 429 with ``retry-after-ms``) and
+can inject random 500s, so retries, backoff and the client-side limiter are
+all exercised without network access or an API key.
+
+Usage:
+    python -m context_engineering.benchmarks.openai_dispatch_bench \\
+        --texts 100000 --concurrency 1,4,16 --latency-ms 200 --server-rpm 6000
+"""
+
+import asyncio
+import argparse
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from openai import AsyncOpenAI
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from context_engineering.openai_dispatcher import OpenAIEmbeddingDispatcher, EmbeddingBatchError
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item]
+
+class StubEmbeddingServer:
+    """Minimal HTTP/1.1 server answering POST /v1/embeddings"""
+
+    def __init__(self, dimension: int, latency_ms: float, rpm: int, error_rate: float, seed: int = 42):
+        self.dimension = dimension
+        self.latency = latency_ms / 1000.0
+        self.rpm = rpm
+        self.error_rate = error_rate
+        self.rng = np.random.default_rng(seed)
+        self.requests = 0
+        self.rejected = 0
+        self._burst = max(1.0, rpm / 60.0)  # Limit enforced over one-second windows
+        self._allowance = self._burst
+        self._updated = time.monotonic()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> str:
+        """Start listening on a free local port; returns the API base URL"""
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _admit(self) -> bool:
+        """Server-side requests-per-minute bucket"""
+        now = time.monotonic()
+        self._allowance = min(self._burst, self._allowance + (now - self._updated) * self.rpm / 60.0)
+        self._updated = now
+        if self._allowance < 1:
+            return False
+        self._allowance -= 1
+        return True
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                headers = {}
+                for line in head.decode('latin-1').split('\r\n')[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, extra, payload = await self._respond(json.loads(body or b'{}'))
+                data = json.dumps(payload).encode('utf-8')
+                header_lines = [f"HTTP/1.1 {status}", "Content-Type: application/json",
+                                f"Content-Length: {len(data)}", *extra]
+                writer.write(("\r\n".join(header_lines) + "\r\n\r\n").encode('latin-1') + data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, request: dict):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+
+        if self.rpm and not self._admit():
+            self.rejected += 1
+            retry_ms = int(60000 / self.rpm) + 1
+            return "429 Too Many Requests", [f"retry-after-ms: {retry_ms}"], {
+                'error': {'message': 'Rate limit reached', 'type': 'requests', 'code': 'rate_limit_exceeded'}
+            }
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return "500 Internal Server Error", [], {
+                'error': {'message': 'Injected failure', 'type': 'server_error', 'code': None}
+            }
+
+        texts = request['input']
+        vectors = self.rng.standard_normal((len(texts), self.dimension)).astype('<f4')
+        if request.get('encoding_format') == 'base64':
+            items = [base64.b64encode(vector.tobytes()).decode('ascii') for vector in vectors]
+        else:
+            items = vectors.tolist()
+        tokens = sum(len(text) // 4 + 1 for text in texts)
+        return "200 OK", [], {
+            'object': 'list',
+            'model': request.get('model'),
+            'data': [{'object': 'embedding', 'index': i, 'embedding': item} for i, item in enumerate(items)],
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+        }
+
+async def run(base_url: str, texts: List[str], concurrency: int, args) -> dict:
+    """Embed texts at one concurrency level"""
+    client = AsyncOpenAI(api_key='stub', base_url=base_url, max_retries=0)
+    dispatcher = OpenAIEmbeddingDispatcher(
+        client,
+        batch_size=args.batch_size,
+        max_concurrency=concurrency,
+        requests_per_minute=args.client_rpm,
+        tokens_per_minute=args.client_tpm,
+        max_retries=args.max_retries
+    )
+
+    failed = 0
+    start = time.perf_counter()
+    try:
+        embeddings = await dispatcher.embed(texts)
+        assert embeddings.shape == (len(texts), args.dimension)
+    except EmbeddingBatchError as e:
+        failed = int(e.failed.sum())
+    elapsed = time.perf_counter() - start
+
+    await client.close()
+    return {'seconds': elapsed, 'failed_texts': failed, **dispatcher.stats()}
+
+async def main():
+    """Main benchmark function"""
+
+    parser = argparse.ArgumentParser(description='Benchmark concurrent OpenAI embedding dispatch against a stub server')
+    parser.add_argument('--texts', type=int, default=100000, help='Number of texts to embed')
+    parser.add_argument('--words', type=int, default=40, help='Words per text')
+    parser.add_argument('--concurrency', type=_int_list, default=[1, 4, 16], help='Comma-separated concurrency levels')
+    parser.add_argument('--batch-size', type=int, default=100, help='Texts per request')
+    parser.add_argument('--dimension', type=int, default=64, help='Embedding dimension returned by the stub')
+    parser.add_argument('--latency-ms', type=float, default=200.0, help='Stub latency per request')
+    parser.add_argument('--server-rpm', type=int, default=6000, help='Stub requests-per-minute limit (0 = none)')
+    parser.add_argument('--error-rate', type=float, default=0.01, help='Fraction of stub requests failing with 500')
+    parser.add_argument('--client-rpm', type=int, default=5500, help='Client requests-per-minute budget (0 = none)')
+    parser.add_argument('--client-tpm', type=int, default=0, help='Client tokens-per-minute budget (0 = none)')
+    parser.add_argument('--max-retries', type=int, default=6, help='Retries per batch')
+
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vocabulary = [f"token{i}" for i in range(5000)]
+    texts = [" ".join(rng.choice(vocabulary, size=args.words)) for _ in range(args.texts)]
+
+    print(f"\n{'concurrency':>11} {'seconds':>9} {'texts/s':>10} {'requests':>9} {'retries':>8} "
+          f"{'429s':>6} {'failed':>7} {'limiter_s':>10}")
+    for concurrency in args.concurrency:
+        server = StubEmbeddingServer(args.dimension, args.latency_ms, args.server_rpm, args.error_rate)
+        base_url = await server.start()
+        try:
+            result = await run(base_url, texts, concurrency, args)
+        finally:
+            await server.stop()
+        print(f"{concurrency:>11} {result['seconds']:>9.2f} {len(texts) / result['seconds']:>10.1f} "
+              f"{result['requests']:>9} {result['retries']:>8} {result['rate_limited']:>6} "
+              f"{result['failed_texts']:>7} {result['limiter_wait_seconds']:>10.2f}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,96 @@
+"""
+Parallel Chunking Benchmark
+===========================
+
+Chunks every supported file under a directory in-process and then with
+ParallelChunker at increasing worker counts (workers read, hash and chunk
+size-grouped batches, as in directory ingests), reporting files/s and MB/s.
+Also compares the pickled size and round-trip time of one file's chunks as
+chunk dicts with ChunkMetadata versus the compact records workers return.
+
+Usage:
+    python -m context_engineering.benchmarks.parallel_chunking_bench \\
+        --path /path/to/repo --workers 1 2 4 8
+"""
+
+import asyncio
+import argparse
+import logging
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from context_engineering.chunking import MultiModalChunker
+from context_engineering.code_parsing import parse_cache
+from context_engineering.parallel_chunking import ParallelChunker, read_and_chunk
+from context_engineering.ingestion_cli import DocumentIngestionPipeline
+
+async def main():
+    """Main benchmark function"""
+
+    parser = argparse.ArgumentParser(description='Benchmark process-pool chunking')
+    parser.add_argument('--path', required=True, help='Directory to chunk (recursively)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1],
+                        help='Worker counts to time')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Chunk size in characters')
+
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    chunker = MultiModalChunker(chunk_size=args.chunk_size)
+    pipeline = DocumentIngestionPipeline(None, None, chunker)
+    tasks = []
+    for ext, content_type in pipeline.supported_extensions.items():
+        for file_path in Path(args.path).rglob(f"*{ext}"):
+            language = pipeline._detect_programming_language(file_path.suffix) if content_type == 'code' else None
+            tasks.append((str(file_path), content_type, language, None))
+    megabytes = sum(os.path.getsize(task[0]) for task in tasks) / (1024 * 1024)
+
+    print(f"\n{len(tasks)} files, {megabytes:.1f} MB, {os.cpu_count()} cores")
+
+    start = time.perf_counter()
+    largest, serial_chunks = [], 0
+    for task in tasks:
+        chunks = read_and_chunk(chunker, *task[:3])
+        serial_chunks += len(chunks)
+        largest = max(largest, chunks, key=len)
+    serial_seconds = time.perf_counter() - start
+    print(f"  in-process:  {serial_seconds:>7.2f} s  {len(tasks) / serial_seconds:>8.0f} files/s"
+          f"  {megabytes / serial_seconds:>6.1f} MB/s  ({serial_chunks:,} chunks)")
+
+    for workers in args.workers:
+        # Forked workers would otherwise inherit the parses cached above
+        parse_cache.clear()
+        parallel_chunker = ParallelChunker(chunker, workers=workers)
+        # Start the pool outside the timed region
+        async for _ in parallel_chunker.chunk_files(tasks[:workers]):
+            pass
+        start = time.perf_counter()
+        chunk_count = 0
+        async for chunked in parallel_chunker.chunk_files(tasks):
+            chunk_count += len(chunked.to_chunks())
+        seconds = time.perf_counter() - start
+        parallel_chunker.close()
+        print(f"  {workers:>2} workers:  {seconds:>7.2f} s  {len(tasks) / seconds:>8.0f} files/s"
+              f"  {megabytes / seconds:>6.1f} MB/s  ({serial_seconds / seconds:.1f}x)")
+
+    # Transfer cost of one file's chunks
+    records = [(chunk['id'], chunk['content'], dict(vars(chunk['metadata']))) for chunk in largest]
+    for label, payload in (('chunk dicts + ChunkMetadata', largest), ('compact records', records)):
+        start = time.perf_counter()
+        for _ in range(20):
+            pickle.loads(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        seconds = (time.perf_counter() - start) / 20
+        size = len(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        print(f"\n  {label}: {size / 1024:.0f} KB, {seconds * 1000:.2f} ms round trip ({len(largest)} chunks)", end='')
+    print()
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
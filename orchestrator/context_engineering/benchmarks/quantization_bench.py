@@ -0,0 +1,117 @@
+"""
+Quantized Storage Benchmark
+===========================
+
+Compares the full-precision, half-precision and binary-quantized storage
+modes of PgVectorStore on a synthetic corpus: ANN index size, build time,
+recall@k against exact search and p50/p95 latency (quantized modes rerank
+their candidates at full precision).
+
+Run against a scratch database; the store's auxiliary tables are created if
+missing.
+
+Usage:
+    python -m context_engineering.benchmarks.quantization_bench \\
+        --database-url postgresql://... --rows 200000 --rerank-factor 4
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from context_engineering.vector_store import PgVectorStore, HNSWConfig, STORAGE_MODES
+from context_engineering.benchmarks.hnsw_sweep_bench import make_corpus, exact_top_k
+
+async def main():
+    """Main benchmark function"""
+
+    parser = argparse.ArgumentParser(description='Compare quantized vector storage modes')
+    parser.add_argument('--database-url', help='Database URL (defaults to BENCHMARK_DATABASE_URL)')
+    parser.add_argument('--rows', type=int, default=100000, help='Synthetic corpus size')
+    parser.add_argument('--dimension', type=int, default=384, help='Vector dimension')
+    parser.add_argument('--clusters', type=int, default=200, help='Number of synthetic clusters')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries per mode')
+    parser.add_argument('--k', type=int, default=10, help='Results per query')
+    parser.add_argument('--rerank-factor', type=int, default=4, help='Quantized candidates per result')
+    parser.add_argument('--ef-search', type=int, default=100, help='HNSW ef_search for all modes')
+
+    args = parser.parse_args()
+
+    database_url = args.database_url or os.getenv('BENCHMARK_DATABASE_URL')
+    if not database_url:
+        print("Database URL not provided. Set BENCHMARK_DATABASE_URL or use --database-url")
+        return 1
+
+    table_name = "quantization_benchmark_embeddings"
+    corpus = make_corpus(args.rows, args.dimension, args.clusters)
+    queries = make_corpus(args.queries, args.dimension, args.clusters, seed=7)
+    truth = exact_top_k(corpus, queries, args.k)
+
+    stores = []
+    try:
+        print(f"\n{'mode':>8} {'index_MB':>9} {'build_s':>8} {'recall@k':>9} {'p50_ms':>8} {'p95_ms':>8}")
+
+        for mode in STORAGE_MODES:
+            store = PgVectorStore(
+                database_url, table_name=table_name, storage_mode=mode,
+                rerank_factor=args.rerank_factor,
+                hnsw_config=HNSWConfig(concurrent_build_rows=sys.maxsize)
+            )
+            stores.append(store)
+
+            await store.initialize(dimension=args.dimension)
+
+            if len(stores) == 1:
+                # Load once; every mode indexes the same rows
+                async with store.pool.acquire() as conn:
+                    await conn.execute(f"TRUNCATE {table_name};")
+                await store.bulk_add_embeddings(
+                    vectors=corpus,
+                    ids=[f"bench_{i}" for i in range(args.rows)],
+                    contents=[f"synthetic chunk {i}" for i in range(args.rows)],
+                    source_files=['synthetic'] * args.rows,
+                    chunk_indices=list(range(args.rows))
+                )
+
+            build_start = time.perf_counter()
+            async with store.pool.acquire() as conn:
+                await conn.execute(f"REINDEX INDEX {store._vector_index_name(table_name)};")
+            build_seconds = time.perf_counter() - build_start
+
+            index_stats = await store.get_index_stats()
+            index_size = index_stats['indexes'].get(index_stats['vector_index'], {}).get('size_bytes', 0)
+
+            latencies = []
+            hits = 0
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                results = await store.similarity_search(
+                    query, limit=args.k, similarity_threshold=-1.0, ef_search=args.ef_search
+                )
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(expected.intersection(result.id for result in results))
+
+            recall = hits / (args.k * len(queries))
+            p50, p95 = np.percentile(latencies, [50, 95])
+            print(f"{mode:>8} {index_size / 1e6:>9.1f} {build_seconds:>8.1f} "
+                  f"{recall:>9.3f} {p50:>8.2f} {p95:>8.2f}")
+
+    finally:
+        if stores:
+            async with stores[0].pool.acquire() as conn:
+                await conn.execute(f"DROP TABLE IF EXISTS {table_name};")
+        for store in stores:
+            await store.close()
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
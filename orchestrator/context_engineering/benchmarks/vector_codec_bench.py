@@ -0,0 +1,132 @@
+"""
+Vector Codec Microbenchmark
+===========================
+
+Compares the list-of-floats text representation of embeddings with the binary
+float32 pgvector codec, offline (encode/decode cost and allocations) and,
+when a database URL is given, over a live asyncpg connection (round-trip
+latency and prepared-statement reuse).
+
+Usage:
+    python -m context_engineering.benchmarks.vector_codec_bench --count 10000
+    python -m context_engineering.benchmarks.vector_codec_bench --database-url postgresql://...
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Any, List
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from context_engineering.pg_binary import encode_vector, decode_vector, register_vector_codec
+
+def _measure(fn: Callable[[], Any]) -> Dict[str, float]:
+    """Run fn once, returning wall time and peak traced allocation"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'peak_bytes': peak}
+
+def _text_encode(vectors: np.ndarray) -> List[str]:
+    """Previous path: numpy -> list of floats -> pgvector text literal"""
+    return ['[' + ','.join(map(str, vector.tolist())) + ']' for vector in vectors]
+
+def _text_decode(literals: List[str]) -> List[List[float]]:
+    """Parse pgvector text literals back to lists of floats"""
+    return [[float(x) for x in literal[1:-1].split(',')] for literal in literals]
+
+def run_offline(count: int, dimension: int) -> None:
+    """Benchmark encoding and decoding without a database"""
+    vectors = np.random.rand(count, dimension).astype(np.float32)
+
+    text_payloads = _text_encode(vectors)
+    binary_payloads = [encode_vector(vector) for vector in vectors]
+
+    cases = {
+        'text encode': lambda: _text_encode(vectors),
+        'binary encode': lambda: [encode_vector(vector) for vector in vectors],
+        'text decode': lambda: _text_decode(text_payloads),
+        'binary decode': lambda: [decode_vector(payload) for payload in binary_payloads],
+    }
+
+    print(f"\nOffline codec benchmark ({count} vectors x {dimension} dims):")
+    print(f"  payload size: text {sum(map(len, text_payloads)) / count:.0f} B/vector, "
+          f"binary {len(binary_payloads[0])} B/vector")
+    for name, fn in cases.items():
+        result = _measure(fn)
+        print(f"  {name:<14} {result['seconds'] * 1e6 / count:8.2f} us/vector   "
+              f"peak alloc {result['peak_bytes'] / 1e6:8.1f} MB")
+
+async def run_live(database_url: str, count: int, dimension: int) -> None:
+    """Benchmark round trips against a live pgvector database"""
+    import asyncpg
+
+    vectors = np.random.rand(count, dimension).astype(np.float32)
+    literals = _text_encode(vectors)
+
+    text_conn = await asyncpg.connect(database_url)
+    binary_conn = await asyncpg.connect(database_url)
+    uncached_conn = await asyncpg.connect(database_url, statement_cache_size=0)
+
+    try:
+        await text_conn.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+        await register_vector_codec(binary_conn)
+        await register_vector_codec(uncached_conn)
+
+        timings = {}
+
+        start = time.perf_counter()
+        for literal in literals:
+            await text_conn.fetchval("SELECT $1::text::vector::text", literal)
+        timings['text round trip'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for vector in vectors:
+            await binary_conn.fetchval("SELECT $1::vector", vector)
+        timings['binary round trip (cached stmt)'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for vector in vectors:
+            await uncached_conn.fetchval("SELECT $1::vector", vector)
+        timings['binary round trip (no stmt cache)'] = time.perf_counter() - start
+
+        print(f"\nLive round-trip benchmark ({count} vectors x {dimension} dims):")
+        for name, elapsed in timings.items():
+            print(f"  {name:<34} {elapsed * 1e6 / count:8.1f} us/vector")
+
+    finally:
+        await text_conn.close()
+        await binary_conn.close()
+        await uncached_conn.close()
+
+async def main():
+    """Main benchmark function"""
+
+    parser = argparse.ArgumentParser(description='Benchmark the binary pgvector codec')
+    parser.add_argument('--count', type=int, default=10000, help='Number of vectors')
+    parser.add_argument('--dimension', type=int, default=384, help='Vector dimension')
+    parser.add_argument('--database-url', help='Run the live round-trip benchmark against this database')
+
+    args = parser.parse_args()
+
+    run_offline(args.count, args.dimension)
+
+    database_url = args.database_url or os.getenv('BENCHMARK_DATABASE_URL')
+    if database_url:
+        await run_live(database_url, min(args.count, 2000), args.dimension)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
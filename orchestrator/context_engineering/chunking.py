@@ -6,12 +6,19 @@ Document Chunking and Preprocessing System
 Advanced document chunking with semantic awareness and multi-modal support.
 """
 
+import io
 import re
+import bisect
 import hashlib
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Callable
 from dataclasses import dataclass
 from pathlib import Path
 import logging
+
+import numpy as np
+
+from .code_parsing import parse_python_source
+
 # Simple Document class
 class Document:
     def __init__(self, page_content: str, metadata: dict = None):
@@ -19,7 +26,102 @@ class Document:
         self.metadata = metadata or {}
 
 # Simple text splitter implementation
+class _TextWindow:
+    """
+    Text addressed by absolute character offsets
+
+    Either a whole string, or a stream read on demand in ``read_size`` pieces
+    whose front is released as chunking moves past it, so only a window of
+    the stream is held at a time.
+    """
+
+    def __init__(self, text: str = '', read: Callable[[int], str] = None, read_size: int = 1 << 20):
+        self.text = text
+        self.base = 0
+        self._read = read
+        self._read_size = read_size
+        self.eof = read is None
+
+    @property
+    def end(self) -> int:
+        return self.base + len(self.text)
+
+    def fill(self, position: int) -> bool:
+        """Read until position is buffered; False if the text ends first"""
+        while self.end < position and not self.eof:
+            piece = self._read(self._read_size)
+            if piece:
+                self.text += piece
+            else:
+                self.eof = True
+        return self.end >= position
+
+    def at_end(self, position: int) -> bool:
+        """Whether position is at (or past) the end of the text"""
+        if position < self.end:
+            return False
+        self.fill(position + 1)
+        return self.eof and position >= self.end
+
+    def length_within(self, position: int) -> Optional[int]:
+        """Total text length if the text ends at or before position, else None"""
+        if position < self.end:
+            return None
+        self.fill(position + 1)
+        return self.end if self.eof and self.end <= position else None
+
+    def find(self, separator: str, start: int, max_split: int = None) -> Tuple[int, int]:
+        """
+        (end, next start) of the split beginning at start
+
+        The split runs to the next separator or the end of the text. With
+        max_split, a longer run without separators is cut after max_split
+        characters so a stream's window stays bounded.
+        """
+        search = start
+        while True:
+            index = self.text.find(separator, search - self.base)
+            if index >= 0:
+                end = self.base + index
+                if max_split is not None and end - start > max_split:
+                    return start + max_split, start + max_split
+                return end, end + len(separator)
+            if max_split is not None and self.end - start >= max_split:
+                return start + max_split, start + max_split
+            if self.eof:
+                return self.end, self.end
+            # Rescan the tail in case a separator straddles the next read
+            search = max(start, self.end - len(separator) + 1)
+            self.fill(self.end + 1)
+
+    def rfind(self, separator: str, start: int, stop: int) -> int:
+        """Absolute position of the last separator within [start, stop), or -1"""
+        if stop > self.end:
+            self.fill(stop)
+        index = self.text.rfind(separator, start - self.base, stop - self.base)
+        return self.base + index if index >= 0 else -1
+
+    def slice(self, start: int, end: int) -> str:
+        return self.text[start - self.base:end - self.base]
+
+    def release(self, position: int):
+        """Drop streamed text before position once it is most of the buffer"""
+        if self._read is not None and position - self.base > len(self.text) // 2:
+            self.text = self.text[position - self.base:]
+            self.base = position
+
 class RecursiveCharacterTextSplitter:
+    """
+    Split text on the first separator it contains and merge the pieces into chunks
+
+    Chunks are computed as (start, end) character offsets into the original
+    text with running lengths, so splitting is linear in the text size; chunk
+    text is only sliced out at the end. ``length_function`` is applied once
+    per piece and summed, which matches measuring whole chunks for additive
+    measures such as ``len``. ``split_stream`` runs the same merge over a
+    stream, holding only a window of it.
+    """
+
     def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, 
                  length_function=len, separators: List[str] = None):
         self.chunk_size = chunk_size
@@ -28,74 +130,285 @@ class RecursiveCharacterTextSplitter:
         self.separators = separators or ["\n\n", "\n", " ", ""]
     
     def split_documents(self, documents: List[Document]) -> List[Document]:
-        """Split documents into chunks"""
+        """Split documents into chunks, recording start_offset/end_offset in their metadata"""
         chunks = []
         for doc in documents:
-            text_chunks = self.split_text(doc.page_content)
-            for chunk_text in text_chunks:
-                chunks.append(Document(page_content=chunk_text, metadata=doc.metadata.copy()))
+            text = doc.page_content
+            for start, end in self.split_spans(text):
+                metadata = doc.metadata.copy()
+                metadata['start_offset'] = start
+                metadata['end_offset'] = end
+                chunks.append(Document(page_content=text[start:end], metadata=metadata))
         return chunks
     
     def split_text(self, text: str) -> List[str]:
         """Split text into chunks using recursive approach"""
-        if self.length_function(text) <= self.chunk_size:
-            return [text]
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Chunk boundaries as (start, end) offsets into text; text[start:end] is the chunk"""
+        return list(self._spans(_TextWindow(text)))
+
+    def split_stream(self, read: Callable[[int], str],
+                     window_size: int = 1 << 20) -> Iterator[Tuple[int, int, str]]:
+        """
+        Chunk a text stream incrementally, yielding (start, end, text) as chunks complete
+
+        Args:
+            read: Returns up to n characters, '' at the end (e.g. a text file's read)
+            window_size: Characters read at a time; the separator is chosen from
+                the first window, and a run without separators longer than the
+                window is cut at the window size
+
+        Memory stays within a few windows regardless of the stream's length.
+        For a text shorter than one window the chunks equal split_spans'.
+        """
+        window = _TextWindow(read=read, read_size=window_size)
+        for start, end in self._spans(window, max_split=window_size):
+            yield start, end, window.slice(start, end)
+
+    def _spans(self, window: _TextWindow, max_split: int = None) -> Iterator[Tuple[int, int]]:
+        """Chunk spans of the text in window"""
+        window.fill(max_split or 0)
+        if window.eof and self._measure(window, 0, window.end) <= self.chunk_size:
+            yield 0, window.end
+            return
         
         # Try each separator in order
+        sample = window.text
         for separator in self.separators:
-            if separator in text:
-                splits = text.split(separator)
-                return self._merge_splits(splits, separator)
+            if separator and separator in sample:
+                if self.length_function is len and not _self_overlapping(separator):
+                    yield from self._merge_splits_by_search(window, separator, max_split)
+                else:
+                    yield from self._merge_splits(window, separator, max_split)
+                return
         
         # If no separator works, split by character count
-        return self._split_by_length(text)
+        yield from self._split_by_length(window)
+
+    def _measure(self, window: _TextWindow, start: int, end: int) -> int:
+        """Length of the text between two offsets, without slicing when the measure is len"""
+        if self.length_function is len:
+            return end - start
+        return self.length_function(window.slice(start, end))
     
-    def _merge_splits(self, splits: List[str], separator: str) -> List[str]:
-        """Merge splits into chunks with overlap"""
-        chunks = []
-        current_chunk = ""
+    def _merge_splits(self, window: _TextWindow, separator: str,
+                      max_split: int = None) -> Iterator[Tuple[int, int]]:
+        """Merge splits into chunk spans with overlap"""
+        separator_length = self.length_function(separator)
+        chunk_start = chunk_end = 0
+        chunk_length = 0
+        split_start = 0
         
-        for split in splits:
-            # Check if adding this split would exceed chunk size
-            test_chunk = current_chunk + separator + split if current_chunk else split
-            
-            if self.length_function(test_chunk) <= self.chunk_size:
-                current_chunk = test_chunk
-            else:
-                # Save current chunk and start new one
-                if current_chunk:
-                    chunks.append(current_chunk)
-                
-                # Handle overlap
-                if self.chunk_overlap > 0 and current_chunk:
-                    overlap_text = current_chunk[-self.chunk_overlap:]
-                    current_chunk = overlap_text + separator + split if overlap_text else split
+        while True:
+            split_end, next_start = window.find(separator, split_start, max_split)
+            split_length = self._measure(window, split_start, split_end)
+
+            # The current chunk ends right before this split's separator
+            if chunk_end > chunk_start and chunk_length + separator_length + split_length <= self.chunk_size:
+                chunk_end = split_end
+                chunk_length += separator_length + split_length
+            elif chunk_end > chunk_start:
+                # Save current chunk and start the next one with its overlap
+                yield chunk_start, chunk_end
+                if self.chunk_overlap > 0:
+                    overlap_start = max(chunk_start, chunk_end - self.chunk_overlap)
+                    chunk_length = (self._measure(window, overlap_start, chunk_end)
+                                    + separator_length + split_length)
+                    chunk_start, chunk_end = overlap_start, split_end
                 else:
-                    current_chunk = split
+                    chunk_start, chunk_end, chunk_length = split_start, split_end, split_length
+                window.release(chunk_start)
+            else:
+                chunk_start, chunk_end, chunk_length = split_start, split_end, split_length
+
+            if next_start == split_end and window.at_end(split_end):
+                break
+            split_start = next_start
         
         # Add final chunk
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        return chunks
+        if chunk_end > chunk_start:
+            yield chunk_start, chunk_end
+
+    def _merge_splits_by_search(self, window: _TextWindow, separator: str,
+                                max_split: int = None) -> Iterator[Tuple[int, int]]:
+        """
+        _merge_splits for len, jumping from chunk to chunk with str.find/rfind
+
+        A chunk is a contiguous span, so its length is end - start and the
+        greedy merge ends it at the last separator that keeps it within
+        chunk_size. Only valid when separator occurrences cannot overlap,
+        so every occurrence is a split boundary.
+        """
+        separator_length = len(separator)
+        chunk_start = 0
+        chunk_end, next_start = window.find(separator, 0, max_split)
+        while True:
+            # An empty chunk takes the next split whole, as in the per-split merge
+            while chunk_end == chunk_start and not window.at_end(chunk_end):
+                chunk_start = next_start
+                chunk_end, next_start = window.find(separator, chunk_start, max_split)
+
+            # Extend to the last split end that fits
+            limit = chunk_start + self.chunk_size
+            if not window.at_end(chunk_end):
+                text_length = window.length_within(limit)
+                if text_length is not None:
+                    chunk_end = next_start = text_length
+                else:
+                    end = window.rfind(separator, next_start, limit + separator_length)
+                    if end >= 0:
+                        chunk_end, next_start = end, end + separator_length
+
+            if chunk_end > chunk_start:
+                yield chunk_start, chunk_end
+            if window.at_end(chunk_end):
+                return
+
+            # Start the next chunk with the following split and the overlap
+            if self.chunk_overlap > 0 and chunk_end > chunk_start:
+                chunk_start = max(chunk_start, chunk_end - self.chunk_overlap)
+            else:
+                chunk_start = next_start
+            chunk_end, next_start = window.find(separator, next_start, max_split)
+            window.release(chunk_start)
     
-    def _split_by_length(self, text: str) -> List[str]:
+    def _split_by_length(self, window: _TextWindow) -> Iterator[Tuple[int, int]]:
         """Split text by character length with overlap"""
-        chunks = []
         start = 0
         
-        while start < len(text):
+        while not window.at_end(start):
             end = start + self.chunk_size
-            chunk = text[start:end]
-            chunks.append(chunk)
+            text_length = window.length_within(end)
+            if text_length is not None:
+                yield start, text_length
+                return
+            yield start, end
             
             # Move start position with overlap
-            start = end - self.chunk_overlap if self.chunk_overlap > 0 else end
-            
-            if start >= len(text):
-                break
-        
-        return chunks
+            start = end - self.chunk_overlap if 0 < self.chunk_overlap < self.chunk_size else end
+            window.release(start)
+
+def _self_overlapping(separator: str) -> bool:
+    """Whether occurrences of separator can overlap (e.g. '\\n\\n' in '\\n\\n\\n')"""
+    return any(separator[i:] == separator[:-i] for i in range(1, len(separator)))
+
+# Pseudo-random per-byte values for the Gear rolling hash, derived from sha256 so
+# boundaries (and the chunk ids built on them) never change between installs
+_GEAR = np.frombuffer(b''.join(hashlib.sha256(bytes([i])).digest()[:4] for i in range(256)),
+                      dtype='<u4').astype(np.uint32)
+_GEAR_WINDOW = 32  # A 32-bit Gear hash depends on the last 32 characters
+_WHITESPACE = np.array([ord(c) for c in ' \t\r\n'], dtype=np.uint32)
+
+class ContentDefinedTextSplitter(RecursiveCharacterTextSplitter):
+    """
+    Chunk boundaries chosen by a rolling hash of the text itself
+
+    A Gear hash over the last 32 characters marks a candidate boundary
+    wherever it falls below a threshold set for the average chunk size; the
+    boundary then moves forward past the next whitespace (within
+    snap_distance) so chunks do not end mid-word. The first candidate at
+    least min_size into a chunk ends it; without one the chunk is cut at
+    chunk_size. A boundary depends only on nearby text, so an edit changes
+    the chunks around it while the chunks before and after stay identical.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 0, min_size: int = None,
+                 average_size: int = None, snap_distance: int = 64):
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        # Boundaries are only looked for where the hash window lies inside the chunk
+        self.min_size = max(min_size or chunk_size // 4, _GEAR_WINDOW)
+        self.average_size = max(average_size or chunk_size // 2, self.min_size + 1)
+        self.snap_distance = snap_distance
+        # A one-character gap makes every position a candidate; 2**32 itself overflows uint32
+        self._threshold = np.uint32(min(2 ** 32 // (self.average_size - self.min_size), 2 ** 32 - 1))
+
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Chunk boundaries as (start, end) offsets into text; text[start:end] is the chunk"""
+        return [(start, end) for start, end, _ in self.split_stream(io.StringIO(text).read)]
+
+    def split_stream(self, read: Callable[[int], str],
+                     window_size: int = 1 << 20) -> Iterator[Tuple[int, int, str]]:
+        """
+        Chunk a text stream incrementally, yielding (start, end, text) as chunks complete
+
+        Boundaries do not depend on window_size, so streamed and in-memory
+        chunks are identical.
+        """
+        text, base, eof = '', 0, False
+        start = previous_start = 0
+        lookahead = self.chunk_size + self.snap_distance + 1
+
+        while True:
+            while not eof and base + len(text) < start + lookahead:
+                piece = read(window_size)
+                if piece:
+                    text += piece
+                else:
+                    eof = True
+
+            text_end = base + len(text)
+            cuts = self._cut_points(text, base)
+            while start < text_end and (eof or start + lookahead <= text_end):
+                end = self._chunk_end(text, base, start, text_end, cuts)
+                span_start = max(previous_start, start - self.chunk_overlap)
+                yield span_start, end, text[span_start - base:end - base]
+                previous_start, start = start, end
+
+            if eof:
+                return
+
+            # Release text before the next chunk's overlap and the hash history its
+            # boundaries need (a cut can snap forward by up to snap_distance)
+            keep = max(base, min(start - self.chunk_overlap,
+                                 start + self.min_size - self.snap_distance - _GEAR_WINDOW))
+            if keep - base > len(text) // 2:
+                text = text[keep - base:]
+                base = keep
+
+    def _cut_points(self, text: str, base: int) -> np.ndarray:
+        """Sorted absolute candidate boundaries in text, which starts at offset base"""
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        if len(codes) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # hash[i] = sum over j < 32 of GEAR[text[i - j]] << j (mod 2**32), built by
+        # doubling: the sum over 2k characters is sum_k[i] + (sum_k[i - k] << k)
+        hashes = _GEAR[codes & 0xFF]
+        width = 1
+        while width < _GEAR_WINDOW:
+            shifted = hashes[:-width] << np.uint32(width)
+            hashes[width:] += shifted
+            width *= 2
+        cuts = np.flatnonzero(hashes < self._threshold) + 1
+        if base > 0:
+            # Hashes of the first characters lack the history released before base
+            cuts = cuts[cuts >= _GEAR_WINDOW]
+
+        # Move each cut just past the next whitespace, when one is close
+        spaces = np.flatnonzero(np.isin(codes, _WHITESPACE))
+        if len(spaces):
+            nearest = np.searchsorted(spaces, cuts - 1)
+            found = nearest < len(spaces)
+            snapped = spaces[np.minimum(nearest, len(spaces) - 1)] + 1
+            close = found & (snapped - cuts <= self.snap_distance)
+            cuts = np.where(close, snapped, cuts)
+        return np.unique(cuts) + base
+
+    def _chunk_end(self, text: str, base: int, start: int, text_end: int, cuts: np.ndarray) -> int:
+        """End of the chunk beginning at start"""
+        limit = start + self.chunk_size
+        index = np.searchsorted(cuts, start + self.min_size)
+        if index < len(cuts) and cuts[index] <= min(limit, text_end):
+            return int(cuts[index])
+        if text_end <= limit:
+            return text_end
+
+        # No boundary within chunk_size: cut after the last whitespace before it
+        low = max(start + self.min_size, limit - self.snap_distance) - base
+        space = max(text.rfind(' ', low, limit - base), text.rfind('\n', low, limit - base))
+        return base + space + 1 if space >= 0 else limit
 
 logger = logging.getLogger(__name__)
 
@@ -109,6 +422,10 @@ class ChunkMetadata:
     section_title: Optional[str] = None
     parent_chunk_id: Optional[str] = None
     semantic_tags: List[str] = None
+    start_offset: Optional[int] = None  # source[start_offset:end_offset] is the chunk
+    end_offset: Optional[int] = None
+    start_line: Optional[int] = None  # 1-based line range of code chunks, inclusive
+    end_line: Optional[int] = None
     
     def __post_init__(self):
         if self.semantic_tags is None:
@@ -120,10 +437,20 @@ class DocumentChunker:
     def __init__(self, 
                  chunk_size: int = 1000,
                  chunk_overlap: int = 200,
-                 min_chunk_size: int = 100):
+                 min_chunk_size: int = 100,
+                 stream_window_size: int = 1 << 20,
+                 content_defined: bool = False):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.min_chunk_size = min_chunk_size
+        # Characters read at a time by stream_chunks (at least a few chunks' worth)
+        self.stream_window_size = max(stream_window_size, 4 * (chunk_size + chunk_overlap))
+        # Rolling-hash boundaries and content-derived ids, so edits keep other chunks' ids
+        self.content_defined = content_defined
+        self.content_splitter = ContentDefinedTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        ) if content_defined else None
         
         # Different splitters for different content types
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -146,7 +473,7 @@ class DocumentChunker:
         )
     
     def chunk_document(self, content: str, source_file: str, 
-                      content_type: str = 'text') -> List[Dict[str, Any]]:
+                      content_type: str = 'text', base_offset: int = 0) -> List[Dict[str, Any]]:
         """
         Chunk a document with appropriate strategy based on content type
         
@@ -154,6 +481,7 @@ class DocumentChunker:
             content: Document content
             source_file: Source file path
             content_type: Type of content ('text', 'code', 'markdown', 'json')
+            base_offset: Offset of content within the source file
             
         Returns:
             List of chunk dictionaries with metadata
@@ -170,29 +498,13 @@ class DocumentChunker:
             
             # Process chunks with metadata
             processed_chunks = []
+            seen_ids = {}
             for i, chunk in enumerate(chunks):
-                if len(chunk.page_content.strip()) < self.min_chunk_size:
-                    continue
-                
-                chunk_id = self._generate_chunk_id(source_file, i, chunk.page_content)
-                
-                metadata = ChunkMetadata(
-                    source_file=source_file,
-                    chunk_index=i,
-                    chunk_type=content_type,
-                    language=self._detect_language(chunk.page_content, content_type),
-                    section_title=self._extract_section_title(chunk.page_content, content_type),
-                    semantic_tags=self._extract_semantic_tags(chunk.page_content, content_type)
-                )
-                
-                processed_chunks.append({
-                    'id': chunk_id,
-                    'content': chunk.page_content,
-                    'metadata': metadata,
-                    'source_file': source_file,
-                    'chunk_index': i,
-                    'content_type': content_type
-                })
+                processed = self._build_chunk(chunk.page_content, source_file, i, content_type,
+                                              base_offset + chunk.metadata['start_offset'],
+                                              base_offset + chunk.metadata['end_offset'], seen_ids)
+                if processed:
+                    processed_chunks.append(processed)
             
             logger.info(f"Chunked {source_file}: {len(processed_chunks)} chunks")
             return processed_chunks
@@ -200,25 +512,91 @@ class DocumentChunker:
         except Exception as e:
             logger.error(f"Error chunking document {source_file}: {str(e)}")
             return []
+
+    def stream_chunks(self, file_path: str, source_file: str = None, content_type: str = 'text',
+                      encoding: str = 'utf-8') -> Iterator[Dict[str, Any]]:
+        """
+        Chunk a file incrementally, yielding chunk dictionaries as they are found
+
+        The file is read stream_window_size characters at a time, so memory
+        stays within a few windows however large the file is. Chunks match
+        chunk_document's for files within one window. Undecodable bytes are
+        replaced rather than failing part-way through a large file.
+
+        Args:
+            file_path: File to read
+            source_file: Source name recorded in the chunks (default: file_path)
+            content_type: Type of content ('text', 'code', 'markdown', 'json')
+            encoding: Text encoding of the file
+        """
+        source_file = source_file or file_path
+        splitter = self._get_splitter(content_type)
+
+        seen_ids = {}
+        with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+            spans = splitter.split_stream(f.read, self.stream_window_size)
+            for i, (start, end, text) in enumerate(spans):
+                chunk = self._build_chunk(text, source_file, i, content_type, start, end, seen_ids)
+                if chunk:
+                    yield chunk
+
+    def _build_chunk(self, content: str, source_file: str, index: int, content_type: str,
+                     start_offset: int, end_offset: int,
+                     seen_ids: Dict[str, int] = None) -> Optional[Dict[str, Any]]:
+        """Chunk dictionary with metadata, or None for chunks below min_chunk_size"""
+        if len(content.strip()) < self.min_chunk_size:
+            return None
+
+        metadata = ChunkMetadata(
+            source_file=source_file,
+            chunk_index=index,
+            chunk_type=content_type,
+            language=self._detect_language(content, content_type),
+            section_title=self._extract_section_title(content, content_type),
+            semantic_tags=self._extract_semantic_tags(content, content_type),
+            start_offset=start_offset,
+            end_offset=end_offset
+        )
+
+        return {
+            'id': self._generate_chunk_id(source_file, index, content, seen_ids),
+            'content': content,
+            'metadata': metadata,
+            'source_file': source_file,
+            'chunk_index': index,
+            'content_type': content_type
+        }
     
     def chunk_code_file(self, content: str, source_file: str, 
-                       language: str = None) -> List[Dict[str, Any]]:
+                       language: str = None, base_offset: int = 0) -> List[Dict[str, Any]]:
         """Specialized chunking for code files"""
         
         # Extract functions, classes, and methods
+        language = language or self._detect_programming_language(source_file)
         code_blocks = self._extract_code_blocks(content, language)
+        line_starts = None
         
         chunks = []
+        seen_ids = {}
         for i, block in enumerate(code_blocks):
-            chunk_id = self._generate_chunk_id(source_file, i, block['content'])
+            chunk_id = self._generate_chunk_id(source_file, i, block['content'], seen_ids)
+            if 'start_line' not in block:
+                if line_starts is None:
+                    line_starts = [0] + [match.end() for match in re.finditer('\n', content)]
+                block['start_line'] = bisect.bisect_right(line_starts, block['start'])
+                block['end_line'] = bisect.bisect_right(line_starts, max(block['end'] - 1, block['start']))
             
             metadata = ChunkMetadata(
                 source_file=source_file,
                 chunk_index=i,
                 chunk_type='code',
-                language=language or self._detect_programming_language(source_file),
+                language=language,
                 section_title=block.get('name'),
-                semantic_tags=block.get('tags', [])
+                semantic_tags=block.get('tags', []),
+                start_offset=base_offset + block['start'],
+                end_offset=base_offset + block['end'],
+                start_line=block['start_line'],
+                end_line=block['end_line']
             )
             
             chunks.append({
@@ -235,6 +613,8 @@ class DocumentChunker:
     
     def _get_splitter(self, content_type: str):
         """Get appropriate splitter for content type"""
+        if self.content_defined:
+            return self.content_splitter
         splitters = {
             'code': self.code_splitter,
             'markdown': self.markdown_splitter,
@@ -242,10 +622,26 @@ class DocumentChunker:
         }
         return splitters.get(content_type, self.text_splitter)
     
-    def _generate_chunk_id(self, source_file: str, index: int, content: str) -> str:
-        """Generate unique chunk ID"""
-        content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
-        return f"{Path(source_file).stem}_{index}_{content_hash}"
+    def _generate_chunk_id(self, source_file: str, index: int, content: str,
+                           seen_ids: Dict[str, int] = None) -> str:
+        """
+        Generate unique chunk ID
+
+        In content-defined mode the id depends only on the file and the chunk
+        text (repeats within a file are numbered via seen_ids), so unchanged
+        chunks keep their ids when the document around them is edited.
+        """
+        if not self.content_defined:
+            content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
+            return f"{Path(source_file).stem}_{index}_{content_hash}"
+
+        digest = hashlib.sha256(f"{source_file}\0{content}".encode()).hexdigest()[:16]
+        chunk_id = f"{Path(source_file).stem}_{digest}"
+        if seen_ids is None:
+            return chunk_id
+        repeat = seen_ids.get(chunk_id, 0)
+        seen_ids[chunk_id] = repeat + 1
+        return chunk_id if repeat == 0 else f"{chunk_id}_{repeat}"
     
     def _detect_language(self, content: str, content_type: str) -> Optional[str]:
         """Detect content language"""
@@ -336,39 +732,136 @@ class DocumentChunker:
         
         return tags
     
+    def _python_blocks(self, content: str) -> List[Dict[str, Any]]:
+        """
+        Function, class and method blocks from the shared parse, in source order
+
+        A definition that fits in chunk_size is one block. A larger class
+        yields its header (with any non-method statements) and one block per
+        method; a larger function or method is split at statement
+        boundaries, descending into compound statements as needed. Runs of
+        module-level statements become 'module' blocks. Returns [] for
+        sources that do not parse.
+        """
+        parsed = parse_python_source(content)
+        if parsed.module is None:
+            return []
+
+        blocks = []
+        pending = []
+        for node in parsed.module.children + [None]:
+            if node is None or node.kind in ('class', 'function'):
+                if pending:
+                    for start_line, end_line in self._statement_spans(parsed, pending, pending[0].start_line):
+                        blocks.append(self._line_block(content, parsed, 'module', 'module', start_line, end_line))
+                    pending = []
+                if node is not None and node.kind == 'class':
+                    blocks.extend(self._class_blocks(content, parsed, node))
+                elif node is not None:
+                    blocks.extend(self._definition_blocks(content, parsed, node, node.name))
+            else:
+                pending.append(node)
+        return blocks
+
+    def _class_blocks(self, content: str, parsed, node) -> List[Dict[str, Any]]:
+        """One block for a class that fits, else its header and members, then each method"""
+        if parsed.size(node.start_line, node.end_line) <= self.chunk_size or not node.children:
+            return [self._line_block(content, parsed, 'class', node.name, node.start_line, node.end_line)]
+
+        blocks = []
+        pending = []
+        header_start = node.start_line
+        for child in node.children + [None]:
+            if child is None or child.kind == 'method':
+                if pending:
+                    spans = self._statement_spans(parsed, pending, header_start or pending[0].start_line)
+                elif header_start and child is not None:
+                    spans = [(header_start, child.start_line - 1)] if child.start_line > header_start else []
+                else:
+                    spans = []
+                for start_line, end_line in spans:
+                    blocks.append(self._line_block(content, parsed, 'class', node.name, start_line, end_line,
+                                                   partial=True))
+                pending = []
+                header_start = None
+                if child is not None:
+                    blocks.extend(self._definition_blocks(content, parsed, child, f"{node.name}.{child.name}"))
+            else:
+                pending.append(child)
+        return blocks
+
+    def _definition_blocks(self, content: str, parsed, node, name: str) -> List[Dict[str, Any]]:
+        """One block for a function or method that fits, else statement-boundary parts"""
+        if parsed.size(node.start_line, node.end_line) <= self.chunk_size or not node.children:
+            return [self._line_block(content, parsed, node.kind, name, node.start_line, node.end_line)]
+        return [self._line_block(content, parsed, node.kind, name, start_line, end_line, partial=True)
+                for start_line, end_line in self._statement_spans(parsed, node.children, node.start_line)]
+
+    def _statement_spans(self, parsed, nodes, start_line: int) -> List[Tuple[int, int]]:
+        """
+        Line ranges grouping consecutive statements up to chunk_size
+
+        The first range starts at start_line (so a definition's signature
+        goes with its first statements) and each later one starts right
+        after the previous, keeping interleaved comments. A statement larger
+        than chunk_size is split inside its own body when it has one.
+        """
+        spans = []
+        group_start, group_end = start_line, None
+        for node in nodes:
+            if group_end is not None:
+                if parsed.size(group_start, node.end_line) <= self.chunk_size:
+                    group_end = node.end_line
+                    continue
+                spans.append((group_start, group_end))
+                group_start = group_end + 1
+            if parsed.size(group_start, node.end_line) > self.chunk_size and node.children:
+                inner = self._statement_spans(parsed, node.children, group_start)
+                spans.extend(inner[:-1])
+                group_start, group_end = inner[-1]
+            else:
+                group_end = node.end_line
+        if group_end is not None:
+            spans.append((group_start, group_end))
+        return spans
+
+    def _line_block(self, content: str, parsed, block_type: str, name: str,
+                    start_line: int, end_line: int, partial: bool = False) -> Dict[str, Any]:
+        """Code block for a line range"""
+        tags = {
+            'class': ['class', 'oop'],
+            'method': ['method', 'oop'],
+            'function': ['function'],
+            'module': ['module']
+        }.get(block_type, ['code'])
+        start, end = parsed.span(start_line, end_line)
+        return {
+            'type': block_type,
+            'name': name,
+            'content': content[start:end],
+            'start': start,
+            'end': end,
+            'start_line': start_line,
+            'end_line': end_line,
+            'tags': tags + ['partial'] if partial else tags
+        }
+
     def _extract_code_blocks(self, content: str, language: str) -> List[Dict[str, Any]]:
         """Extract meaningful code blocks (functions, classes, etc.)"""
         blocks = []
         
         if language == 'python':
-            # Extract Python functions and classes
-            class_pattern = r'class\s+(\w+).*?(?=\nclass|\ndef|\Z)'
-            function_pattern = r'def\s+(\w+)\(.*?\).*?(?=\ndef|\nclass|\Z)'
-            
-            for match in re.finditer(class_pattern, content, re.DOTALL):
-                blocks.append({
-                    'type': 'class',
-                    'name': match.group(1),
-                    'content': match.group(0),
-                    'tags': ['class', 'oop']
-                })
-            
-            for match in re.finditer(function_pattern, content, re.DOTALL):
-                blocks.append({
-                    'type': 'function',
-                    'name': match.group(1),
-                    'content': match.group(0),
-                    'tags': ['function']
-                })
+            blocks = self._python_blocks(content)
         
         # If no specific blocks found, use regular chunking
         if not blocks:
-            chunks = self.code_splitter.split_text(content)
-            for i, chunk in enumerate(chunks):
+            for i, (start, end) in enumerate(self.code_splitter.split_spans(content)):
                 blocks.append({
                     'type': 'code_block',
                     'name': f'block_{i}',
-                    'content': chunk,
+                    'content': content[start:end],
+                    'start': start,
+                    'end': end,
                     'tags': ['code']
                 })
         
@@ -393,14 +886,16 @@ class MultiModalChunker(DocumentChunker):
                     parts.append({
                         'content': text_content,
                         'type': 'text',
-                        'language': None
+                        'language': None,
+                        'offset': content.index(text_content, last_end)
                     })
             
             # Add code block
             parts.append({
                 'content': match.group(2),
                 'type': 'code',
-                'language': match.group(1)
+                'language': match.group(1),
+                'offset': match.start(2)
             })
             
             last_end = match.end()
@@ -412,16 +907,19 @@ class MultiModalChunker(DocumentChunker):
                 parts.append({
                     'content': remaining,
                     'type': 'text',
-                    'language': None
+                    'language': None,
+                    'offset': content.index(remaining, last_end)
                 })
         
         # Chunk each part appropriately
         all_chunks = []
         for i, part in enumerate(parts):
             if part['type'] == 'code':
-                chunks = self.chunk_code_file(part['content'], f"{source_file}#code_{i}", part['language'])
+                chunks = self.chunk_code_file(part['content'], f"{source_file}#code_{i}", part['language'],
+                                              base_offset=part['offset'])
             else:
-                chunks = self.chunk_document(part['content'], f"{source_file}#text_{i}", 'text')
+                chunks = self.chunk_document(part['content'], f"{source_file}#text_{i}", 'text',
+                                             base_offset=part['offset'])
             
             all_chunks.extend(chunks)
         
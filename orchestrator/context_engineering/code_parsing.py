@@ -0,0 +1,172 @@
+"""
+Python Source Parsing
+=====================
+
+One structural parse per Python source, shared by the code chunker and
+``CodeAnalyzer``.
+
+``parse_python_source`` runs ``ast.parse`` once and keeps a compact outline
+of the module: every definition and statement with its exact line range,
+nested statement bodies, and the function, class and import names the
+analyzer reports. Outlines are cached by sha256 of the source in a bounded
+LRU, so chunking and analyzing the same file costs a single parse. Syntax
+errors are cached too.
+"""
+
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+@dataclass
+class CodeNode:
+    """A definition or statement with its line range (1-based, inclusive)"""
+    kind: str  # 'module', 'class', 'function', 'method', 'statement'
+    name: str
+    start_line: int  # includes decorators
+    end_line: int
+    children: List['CodeNode'] = field(default_factory=list)  # nested statements, in order
+
+@dataclass
+class ParsedSource:
+    """Outline of one Python source"""
+    digest: str
+    module: Optional[CodeNode]
+    line_starts: List[int]  # offset of each line start, then len(source)
+    functions: List[str] = field(default_factory=list)
+    classes: List[str] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)
+    syntax_error: Optional[str] = None
+
+    def offset(self, line: int) -> int:
+        """Character offset where a 1-based line starts"""
+        return self.line_starts[min(line, len(self.line_starts)) - 1]
+
+    def span(self, start_line: int, end_line: int) -> tuple:
+        """(start, end) character offsets of a line range, end line included"""
+        return self.offset(start_line), self.offset(end_line + 1)
+
+    def size(self, start_line: int, end_line: int) -> int:
+        """Characters in a line range, end line included"""
+        start, end = self.span(start_line, end_line)
+        return end - start
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+_BODY_FIELDS = ('body', 'handlers', 'orelse', 'finalbody', 'cases')
+
+def _line_starts(source: str) -> List[int]:
+    """Offsets of line starts, with len(source) as the end of the last line"""
+    starts = [0]
+    position = source.find('\n')
+    while position >= 0:
+        starts.append(position + 1)
+        position = source.find('\n', position + 1)
+    if starts[-1] != len(source):
+        starts.append(len(source))
+    return starts
+
+def _outline(node: ast.AST, in_class: bool = False) -> CodeNode:
+    """CodeNode for a statement (or except handler / match case) and its nested bodies"""
+    children = []
+    for name in _BODY_FIELDS:
+        for child in getattr(node, name, None) or []:
+            children.append(_outline(child, in_class=isinstance(node, ast.ClassDef)))
+
+    if isinstance(node, ast.ClassDef):
+        kind, name = 'class', node.name
+    elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        kind, name = ('method' if in_class else 'function'), node.name
+    else:
+        kind, name = 'statement', type(node).__name__
+
+    if isinstance(node, ast.match_case):
+        start_line = node.pattern.lineno
+        end_line = children[-1].end_line if children else node.pattern.end_lineno
+    else:
+        decorators = getattr(node, 'decorator_list', None) or []
+        start_line = min([node.lineno] + [decorator.lineno for decorator in decorators])
+        end_line = node.end_lineno
+    return CodeNode(kind=kind, name=name, start_line=start_line, end_line=end_line, children=children)
+
+def _parse(source: str, digest: str) -> ParsedSource:
+    """Parse source into a ParsedSource (uncached)"""
+    line_starts = _line_starts(source)
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        return ParsedSource(digest=digest, module=None, line_starts=line_starts, syntax_error=str(e))
+
+    parsed = ParsedSource(
+        digest=digest,
+        module=CodeNode(kind='module', name='', start_line=1, end_line=max(len(line_starts) - 1, 1),
+                        children=[_outline(statement) for statement in tree.body]),
+        line_starts=line_starts
+    )
+    # Names as CodeAnalyzer has always reported them
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef):
+            parsed.functions.append(node.name)
+        elif isinstance(node, ast.ClassDef):
+            parsed.classes.append(node.name)
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                parsed.imports.append(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                parsed.imports.append(node.module)
+    return parsed
+
+class ParseCache:
+    """Size-bounded LRU of ParsedSource keyed by sha256 of the source"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, ParsedSource]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, source: str) -> ParsedSource:
+        """Cached outline of source; parses at most once per distinct content"""
+        digest = hashlib.sha256(source.encode('utf-8', errors='surrogatepass')).hexdigest()
+        with self._lock:
+            parsed = self._entries.get(digest)
+            if parsed is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return parsed
+            self.misses += 1
+
+        parsed = _parse(source, digest)
+        with self._lock:
+            self._entries[digest] = parsed
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def clear(self):
+        """Drop all cached outlines"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+# Process-wide cache shared by DocumentChunker and CodeAnalyzer
+parse_cache = ParseCache()
+
+def parse_python_source(source: str) -> ParsedSource:
+    """Outline of a Python source from the shared parse cache"""
+    return parse_cache.parse(source)
@@ -72,74 +72,97 @@ class ContextRetriever:
         Returns:
             List of relevant context results
         """
+        results = await self.retrieve_context_batch([query], task_type, filters)
+        return results[0]
+    
+    async def retrieve_context_batch(self, queries: List[str], task_type: str = None,
+                                   filters: Dict[str, Any] = None) -> List[List[ContextResult]]:
+        """
+        Retrieve relevant context for several queries at once
+        
+        All queries are embedded in one call, and the vector and task-aware
+        searches each run for every query in one ``similarity_search_many``
+        round trip.
+        
+        Args:
+            queries: Search queries
+            task_type: Type of task (for context prioritization)
+            filters: Additional filters shared by all queries
+            
+        Returns:
+            One list of context results per query, in input order
+        """
+        if not queries:
+            return []
+        
         try:
-            # Generate query embedding
-            query_embeddings = await self.embedding_generator.generate_embeddings([query])
-            if not query_embeddings:
-                logger.error("Failed to generate query embedding")
-                return []
+            # Generate query embeddings
+            query_embeddings = await self.embedding_generator.generate_embeddings(queries)
+            if len(query_embeddings) != len(queries):
+                logger.error("Failed to generate query embeddings")
+                return [[] for _ in queries]
             
-            query_embedding = query_embeddings[0]['embedding']
+            embeddings = [item['embedding'] for item in query_embeddings]
             
             # Multi-strategy retrieval
-            results = []
-            
             # 1. Vector similarity search
-            vector_results = await self._vector_similarity_search(query_embedding, filters)
-            results.extend(vector_results)
+            results = await self._vector_similarity_search(embeddings, filters)
             
             # 2. Hybrid search (if supported)
-            hybrid_results = await self._hybrid_search(query_embedding, query, filters)
-            results.extend(hybrid_results)
+            for query_results, embedding, query in zip(results, embeddings, queries):
+                query_results.extend(await self._hybrid_search(embedding, query, filters))
             
             # 3. Context-aware search based on task type
             if task_type:
-                context_results = await self._context_aware_search(
-                    query_embedding, task_type, filters
-                )
-                results.extend(context_results)
+                context_results = await self._context_aware_search(embeddings, task_type, filters)
+                for query_results, task_results in zip(results, context_results):
+                    query_results.extend(task_results)
             
             # 4. Historical pattern matching
-            pattern_results = await self._pattern_based_search(query_embedding, task_type)
-            results.extend(pattern_results)
-            
-            # Deduplicate and rerank
-            final_results = await self._deduplicate_and_rerank(results, query)
+            for query_results, embedding in zip(results, embeddings):
+                query_results.extend(await self._pattern_based_search(embedding, task_type))
             
-            # Apply context window expansion
-            expanded_results = await self._expand_context_windows(final_results)
+            all_results = []
+            for query, query_results in zip(queries, results):
+                # Deduplicate and rerank
+                final_results = await self._deduplicate_and_rerank(query_results, query)
+                
+                # Apply context window expansion
+                expanded_results = await self._expand_context_windows(final_results)
+                
+                logger.info(f"Retrieved {len(expanded_results)} context results for query: {query[:50]}...")
+                all_results.append(expanded_results[:self.config.max_results])
             
-            logger.info(f"Retrieved {len(expanded_results)} context results for query: {query[:50]}...")
-            return expanded_results[:self.config.max_results]
+            return all_results
             
         except Exception as e:
             logger.error(f"Error retrieving context: {str(e)}")
-            return []
+            return [[] for _ in queries]
     
-    async def _vector_similarity_search(self, query_embedding: List[float],
-                                      filters: Dict[str, Any] = None) -> List[ContextResult]:
-        """Perform vector similarity search"""
+    async def _vector_similarity_search(self, query_embeddings: List[List[float]],
+                                      filters: Dict[str, Any] = None) -> List[List[ContextResult]]:
+        """Perform vector similarity search for each query embedding"""
         
-        search_results = await self.vector_store.similarity_search(
-            query_embedding=query_embedding,
+        batched_results = await self.vector_store.similarity_search_many(
+            query_embeddings=query_embeddings,
             limit=self.config.max_results * 2,  # Get more for reranking
             similarity_threshold=self.config.similarity_threshold,
             filters=filters
         )
         
-        context_results = []
-        for result in search_results:
-            context_result = ContextResult(
-                content=result.content,
-                source=result.source_file,
-                relevance_score=result.similarity_score,
-                context_type=result.content_type,
-                metadata=result.metadata,
-                chunk_id=result.id
-            )
-            context_results.append(context_result)
-        
-        return context_results
+        return [[self._to_context_result(result) for result in search_results]
+                for search_results in batched_results]
+    
+    def _to_context_result(self, result: VectorSearchResult) -> ContextResult:
+        """Convert a vector search result to a context result"""
+        return ContextResult(
+            content=result.content,
+            source=result.source_file,
+            relevance_score=result.similarity_score,
+            context_type=result.content_type,
+            metadata=result.metadata,
+            chunk_id=result.id
+        )
     
     async def _hybrid_search(self, query_embedding: List[float], query_text: str,
                            filters: Dict[str, Any] = None) -> List[ContextResult]:
@@ -150,7 +173,8 @@ class ContextRetriever:
                 search_results = await self.vector_store.hybrid_search(
                     query_embedding=query_embedding,
                     query_text=query_text,
-                    limit=self.config.max_results
+                    limit=self.config.max_results,
+                    filters=filters
                 )
                 
                 context_results = []
@@ -171,12 +195,12 @@ class ContextRetriever:
         
         return []
     
-    async def _context_aware_search(self, query_embedding: List[float], task_type: str,
-                                  filters: Dict[str, Any] = None) -> List[ContextResult]:
-        """Search with task-type specific context awareness"""
+    async def _context_aware_search(self, query_embeddings: List[List[float]], task_type: str,
+                                  filters: Dict[str, Any] = None) -> List[List[ContextResult]]:
+        """Search with task-type specific context awareness, for each query embedding"""
         
         # Define task-type specific filters and boosts
-        task_filters = filters or {}
+        task_filters = dict(filters or {})
         
         if task_type == 'code_generation':
             task_filters['content_type'] = 'code'
@@ -186,30 +210,33 @@ class ContextRetriever:
             # Look for API-related content
             pass
         
-        search_results = await self.vector_store.similarity_search(
-            query_embedding=query_embedding,
+        batched_results = await self.vector_store.similarity_search_many(
+            query_embeddings=query_embeddings,
             limit=self.config.max_results,
             similarity_threshold=self.config.similarity_threshold * 0.8,  # Lower threshold for context-aware
             filters=task_filters
         )
         
-        context_results = []
-        for result in search_results:
-            # Apply context-type priority boost
-            priority_boost = self.context_priorities.get(result.content_type, 0.5)
-            adjusted_score = result.similarity_score * priority_boost
-            
-            context_result = ContextResult(
-                content=result.content,
-                source=result.source_file,
-                relevance_score=adjusted_score,
-                context_type=result.content_type,
-                metadata=result.metadata,
-                chunk_id=result.id
-            )
-            context_results.append(context_result)
+        all_results = []
+        for search_results in batched_results:
+            context_results = []
+            for result in search_results:
+                # Apply context-type priority boost
+                priority_boost = self.context_priorities.get(result.content_type, 0.5)
+                adjusted_score = result.similarity_score * priority_boost
+                
+                context_result = ContextResult(
+                    content=result.content,
+                    source=result.source_file,
+                    relevance_score=adjusted_score,
+                    context_type=result.content_type,
+                    metadata=result.metadata,
+                    chunk_id=result.id
+                )
+                context_results.append(context_result)
+            all_results.append(context_results)
         
-        return context_results
+        return all_results
     
     async def _pattern_based_search(self, query_embedding: List[float],
                                   task_type: str = None) -> List[ContextResult]:
@@ -404,12 +431,13 @@ class ContextRetriever:
             try:
                 # Get surrounding chunks
                 surrounding_chunks = await self._get_surrounding_chunks(
-                    result.source, result.chunk_id, self.config.context_window_size
+                    result.source, result.chunk_id, self.config.context_window_size,
+                    chunk_index=self._parse_metadata(result.metadata).get('chunk_index')
                 )
                 
                 if surrounding_chunks:
                     # Combine content with surrounding context
-                    combined_content = self._combine_chunks(result.content, surrounding_chunks)
+                    combined_content = self._combine_chunks(result.content, surrounding_chunks, result.metadata)
                     
                     expanded_result = ContextResult(
                         content=combined_content,
@@ -430,32 +458,19 @@ class ContextRetriever:
         return expanded_results
     
     async def _get_surrounding_chunks(self, source_file: str, chunk_id: str,
-                                    window_size: int) -> List[Dict[str, Any]]:
+                                    window_size: int, chunk_index: int = None) -> List[Dict[str, Any]]:
         """Get surrounding chunks for context expansion"""
         
         try:
-            # Extract chunk index from chunk_id
-            chunk_index = self._extract_chunk_index(chunk_id)
+            # Chunk metadata records the index; older ids also encode it
+            if chunk_index is None:
+                chunk_index = self._extract_chunk_index(chunk_id)
             if chunk_index is None:
                 return []
             
-            # Get surrounding chunks
-            async with self.vector_store.pool.acquire() as conn:
-                query = f"""
-                    SELECT content, chunk_index, metadata
-                    FROM {self.vector_store.table_name}
-                    WHERE source_file = $1 
-                    AND chunk_index BETWEEN $2 AND $3
-                    AND id != $4
-                    ORDER BY chunk_index;
-                """
-                
-                start_index = max(0, chunk_index - window_size)
-                end_index = chunk_index + window_size
-                
-                rows = await conn.fetch(query, source_file, start_index, end_index, chunk_id)
-                
-                return [dict(row) for row in rows]
+            return await self.vector_store.get_surrounding_chunks(
+                source_file, chunk_index, window_size, exclude_id=chunk_id
+            )
                 
         except Exception as e:
             logger.error(f"Error getting surrounding chunks: {str(e)}")
@@ -474,7 +489,26 @@ class ContextRetriever:
         
         return None
     
-    def _combine_chunks(self, main_content: str, surrounding_chunks: List[Dict[str, Any]]) -> str:
+    @staticmethod
+    def _parse_metadata(metadata: Any) -> Dict[str, Any]:
+        """Chunk metadata as a dict (stores may return JSON text)"""
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except ValueError:
+                return {}
+        return metadata if isinstance(metadata, dict) else {}
+
+    def _chunk_offsets(self, metadata: Any) -> Optional[Tuple[int, int]]:
+        """(start_offset, end_offset) recorded by the chunker, if any"""
+        metadata = self._parse_metadata(metadata)
+        start, end = metadata.get('start_offset'), metadata.get('end_offset')
+        if start is None or end is None:
+            return None
+        return int(start), int(end)
+
+    def _combine_chunks(self, main_content: str, surrounding_chunks: List[Dict[str, Any]],
+                        main_metadata: Dict[str, Any] = None) -> str:
         """Combine main content with surrounding chunks"""
         
         if not surrounding_chunks:
@@ -482,6 +516,12 @@ class ContextRetriever:
         
         # Sort by chunk index
         surrounding_chunks.sort(key=lambda x: x['chunk_index'])
+
+        # With source offsets, slice away the overlap between neighbouring chunks
+        main_offsets = self._chunk_offsets(main_metadata)
+        offsets = [self._chunk_offsets(chunk.get('metadata')) for chunk in surrounding_chunks]
+        if main_offsets is not None and all(offsets):
+            return self._combine_by_offsets(main_content, main_offsets, surrounding_chunks, offsets)
         
         # Find the position of main content
         main_chunk_index = None
@@ -510,6 +550,38 @@ class ContextRetriever:
         
         return '\n\n'.join(result_parts)
 
+    @staticmethod
+    def _combine_by_offsets(main_content: str, main_offsets: Tuple[int, int],
+                            surrounding_chunks: List[Dict[str, Any]],
+                            offsets: List[Tuple[int, int]]) -> str:
+        """Stitch chunks into before/main/after source text without repeating overlaps"""
+        main_start, main_end = main_offsets
+        before = sorted((span, chunk['content']) for span, chunk in zip(offsets, surrounding_chunks)
+                        if span[0] < main_start)
+        after = sorted((span, chunk['content']) for span, chunk in zip(offsets, surrounding_chunks)
+                       if span[0] > main_start)
+
+        def stitch(pieces, cursor, limit=None):
+            # Each chunk's content is source[start:end]; keep only what lies past the cursor
+            text = []
+            for (start, end), content in pieces:
+                end = min(end, limit) if limit is not None else end
+                if end > cursor:
+                    text.append(content[max(0, cursor - start):end - start])
+                    cursor = end
+            return ''.join(text)
+
+        before_text = stitch(before, before[0][0][0] if before else main_start, limit=main_start)
+        after_text = stitch(after, main_end)
+
+        result_parts = []
+        if before_text:
+            result_parts.append(f"[CONTEXT BEFORE]\n{before_text}")
+        result_parts.append(f"[MAIN CONTENT]\n{main_content}")
+        if after_text:
+            result_parts.append(f"[CONTEXT AFTER]\n{after_text}")
+        return '\n\n'.join(result_parts)
+
 class SmartContextRetriever(ContextRetriever):
     """Enhanced context retriever with learning capabilities"""
     
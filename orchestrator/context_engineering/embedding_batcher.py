@@ -0,0 +1,174 @@
+"""
+Embedding Micro-Batching
+========================
+
+Async front-end that coalesces concurrent embedding requests into shared
+model calls.
+
+Callers that each embed a handful of texts (a query, an agent's skills, a
+task description) are queued; a single worker drains the queue into one
+batch as soon as it holds ``max_batch_size`` texts or the oldest request has
+waited ``max_wait_ms``, embeds the batch in one call and hands every caller
+its own slice of the result.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _PendingRequest:
+    """Texts queued by one caller"""
+    texts: List[str]
+    future: asyncio.Future
+    enqueued_at: float = field(default=0.0)
+
+class EmbeddingBatcher:
+    """Coalesce concurrent embedding requests into bounded-latency batches"""
+
+    def __init__(self, embed_fn: Callable[[List[str]], Awaitable[np.ndarray]],
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0, stats_window: int = 1000):
+        self.embed_fn = embed_fn  # Embeds one flat list of texts into a matrix
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._carry: Optional[_PendingRequest] = None
+
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._requests_per_batch = deque(maxlen=stats_window)
+        self._queue_delays = deque(maxlen=stats_window)
+
+    def _ensure_worker(self):
+        """Start the worker on the running event loop (again, if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._carry = None
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as part of the next batch"""
+        if not texts:
+            return []
+
+        # Requests that fill a batch on their own gain nothing from waiting
+        if len(texts) >= self.max_batch_size:
+            return await self.embed_fn(texts)
+
+        self._ensure_worker()
+        request = _PendingRequest(texts=list(texts), future=self._loop.create_future(),
+                                  enqueued_at=self._loop.time())
+        await self._queue.put(request)
+        return await request.future
+
+    async def _next_request(self, timeout: Optional[float]) -> Optional[_PendingRequest]:
+        """Next queued request, or None once timeout (seconds) expires"""
+        if self._carry is not None:
+            request, self._carry = self._carry, None
+            return request
+        if timeout is None:
+            return await self._queue.get()
+        if timeout <= 0:
+            return self._queue.get_nowait() if not self._queue.empty() else None
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _run(self):
+        """Worker loop: gather a batch, embed it, resolve the callers' futures"""
+        while True:
+            first = await self._next_request(None)
+            batch = [first]
+            size = len(first.texts)
+            deadline = first.enqueued_at + self.max_wait
+
+            while size < self.max_batch_size:
+                request = await self._next_request(deadline - self._loop.time())
+                if request is None:
+                    break
+                if size + len(request.texts) > self.max_batch_size:
+                    # Requests are never split; this one opens the next batch
+                    self._carry = request
+                    break
+                batch.append(request)
+                size += len(request.texts)
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: List[_PendingRequest]):
+        """Embed one gathered batch and slice the result back to its callers"""
+        started_at = self._loop.time()
+        texts = [text for request in batch for text in request.texts]
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.texts += len(texts)
+        self._batch_sizes.append(len(texts))
+        self._requests_per_batch.append(len(batch))
+        self._queue_delays.extend(started_at - request.enqueued_at for request in batch)
+
+        try:
+            embeddings = await self.embed_fn(texts)
+            if len(embeddings) != len(texts):
+                raise RuntimeError(f"Embedded {len(embeddings)} of {len(texts)} texts")
+        except Exception as e:
+            logger.error(f"Error embedding batch of {len(texts)} texts: {str(e)}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in batch:
+            if not request.future.done():
+                request.future.set_result(embeddings[offset:offset + len(request.texts)])
+            offset += len(request.texts)
+
+    def stats(self) -> Dict[str, Any]:
+        """Achieved batch sizes and queueing delay over the recent window"""
+        delays_ms = np.asarray(self._queue_delays, dtype=np.float64) * 1000
+        sizes = np.asarray(self._batch_sizes, dtype=np.float64)
+        return {
+            'batches': self.batches,
+            'requests': self.requests,
+            'texts': self.texts,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'mean_batch_size': float(sizes.mean()) if len(sizes) else 0.0,
+            'max_observed_batch_size': int(sizes.max()) if len(sizes) else 0,
+            'mean_requests_per_batch': float(np.mean(self._requests_per_batch)) if self._requests_per_batch else 0.0,
+            'queue_delay_ms_mean': float(delays_ms.mean()) if len(delays_ms) else 0.0,
+            'queue_delay_ms_p50': float(np.percentile(delays_ms, 50)) if len(delays_ms) else 0.0,
+            'queue_delay_ms_p95': float(np.percentile(delays_ms, 95)) if len(delays_ms) else 0.0
+        }
+
+    async def close(self):
+        """Stop the worker; requests still queued are cancelled"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._worker = None
+
+        while self._queue is not None and not self._queue.empty():
+            request = self._queue.get_nowait()
+            request.future.cancel()
+        if self._carry is not None:
+            self._carry.future.cancel()
+            self._carry = None
@@ -0,0 +1,148 @@
+"""
+Embedding Cache
+===============
+
+Content-addressed embedding cache shared by all embedding backends.
+
+Entries are keyed by sha256 of the model identity and the text, so keys are
+stable across processes and restarts (unlike Python's randomized ``hash``).
+A size-bounded in-memory LRU sits in front of an optional SQLite file that
+stores vectors as raw float32 blobs.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+def cache_key(model_name: str, text: str) -> str:
+    """Stable cache key for a text embedded by a model"""
+    return hashlib.sha256(f"{model_name}\x00{text}".encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """Two-level (memory LRU + SQLite) embedding cache"""
+
+    def __init__(self, path: str = None, max_memory_entries: int = 10000):
+        self.path = Path(path) if path else None
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL;")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    dimension INTEGER NOT NULL,
+                    vector BLOB NOT NULL
+                );
+            """)
+            self._db.commit()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the LRU, evicting the least recently used entries"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, model_name: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached float32 vectors for texts, None where missing"""
+        keys = [cache_key(model_name, text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            if missing and self._db is not None:
+                missing_keys = list(missing)
+                for start in range(0, len(missing_keys), _LOOKUP_BATCH):
+                    batch = missing_keys[start:start + _LOOKUP_BATCH]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        self._remember(key, vector)
+                        for i in missing.pop(key):
+                            results[i] = vector
+                            self.disk_hits += 1
+
+            self.misses += sum(len(indices) for indices in missing.values())
+
+        return results
+
+    def put_many(self, model_name: str, texts: Sequence[str], vectors: Sequence[Any]):
+        """Store vectors for texts in memory and, if configured, on disk"""
+        records = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = cache_key(model_name, text)
+                # Cached vectors are shared between callers, so keep a read-only copy
+                vector = np.array(vector, dtype=np.float32)
+                vector.flags.writeable = False
+                self._remember(key, vector)
+                records.append((key, vector.shape[0], vector.tobytes()))
+
+            if self._db is not None and records:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, dimension, vector) VALUES (?, ?, ?)",
+                    records
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate counters and sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        disk_entries = 0
+        if self._db is not None:
+            with self._lock:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'memory_entries': len(self._memory),
+            'disk_entries': disk_entries,
+            'path': str(self.path) if self.path else None
+        }
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def close(self):
+        """Close the SQLite file"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
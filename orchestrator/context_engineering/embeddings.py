@@ -8,13 +8,22 @@ Advanced embeddings generation with multiple model support and optimization.
 
 import asyncio
 import numpy as np
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Tuple
 import logging
 from dataclasses import dataclass
 from sentence_transformers import SentenceTransformer
 import openai
 from openai import AsyncOpenAI
 import os
+import threading
+from pathlib import Path
+
+from .embedding_cache import EmbeddingCache
+from .embedding_batcher import EmbeddingBatcher
+from .inference_pool import SentenceTransformerPool
+from .openai_dispatcher import OpenAIEmbeddingDispatcher, EmbeddingBatchError
+from .onnx_backend import OnnxEmbeddingModel, export_onnx_model, default_export_dir, EXPORT_MANIFEST
+from .similarity import as_matrix, cosine_matrix, cosine_top_k, apply_domain_weights
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +31,27 @@ logger = logging.getLogger(__name__)
 class EmbeddingConfig:
     """Configuration for embedding generation"""
     model_name: str = "all-MiniLM-L6-v2"
-    model_type: str = "sentence_transformer"  # 'sentence_transformer', 'openai'
+    model_type: str = "sentence_transformer"  # 'sentence_transformer', 'onnx', 'openai'
     dimension: int = 384
     batch_size: int = 32
     normalize: bool = True
     cache_embeddings: bool = True
+    cache_path: Optional[str] = None  # SQLite cache file (default: EMBEDDING_CACHE_PATH, else memory only)
+    cache_max_entries: int = 10000  # Vectors kept in the in-memory LRU
+    micro_batch_size: int = 0  # Coalesce concurrent small requests into batches up to this size (0 disables)
+    micro_batch_max_wait_ms: float = 5.0  # Longest a request waits for its batch to fill
+    inference_workers: int = 0  # Sentence-transformer worker processes (0 = one background thread)
+    openai_base_url: Optional[str] = None  # API endpoint override (default: OPENAI_BASE_URL, else api.openai.com)
+    openai_max_concurrency: int = 4  # Embedding requests in flight at once
+    openai_requests_per_minute: int = 3000  # Client-side request budget (0 = unlimited)
+    openai_tokens_per_minute: int = 1000000  # Client-side token budget (0 = unlimited)
+    openai_max_retries: int = 6  # Retries per batch on rate limits and transient errors
+    onnx_model_dir: Optional[str] = None  # Exported graph directory (default: ONNX_MODEL_DIR/<model_name>)
+    onnx_quantize: bool = True  # Run the dynamically quantized int8 graph instead of fp32
+    onnx_intra_op_threads: int = 0  # ONNX Runtime threads per model replica (0 = runtime default)
+    onnx_export: bool = True  # Export the model when the directory holds no graph yet
+    onnx_parity_check: bool = True  # Require exported graphs to match the PyTorch output
+    onnx_parity_threshold: float = 0.98  # Minimum cosine similarity to the PyTorch embeddings
 
 class EmbeddingGenerator:
     """Advanced embedding generation with multiple model support"""
@@ -35,31 +60,124 @@ class EmbeddingGenerator:
         self.config = config or EmbeddingConfig()
         self.model = None
         self.openai_client = None
-        self._embedding_cache = {}
+        self._openai_dispatcher = None
+        self._inference_pool = None
+        self._tokenizer = None
+        self._max_seq_length = None
+        self._padding_lock = threading.Lock()
+        self._padding_stats = {
+            'texts': 0,
+            'truncated_texts': 0,
+            'real_tokens': 0,
+            'padded_tokens': 0,
+            'input_order_padded_tokens': 0
+        }
+        self._embedding_cache = None
+        if self.config.cache_embeddings:
+            self._embedding_cache = EmbeddingCache(
+                self.config.cache_path or os.getenv('EMBEDDING_CACHE_PATH'),
+                max_memory_entries=self.config.cache_max_entries
+            )
+        self._batcher = None
+        if self.config.micro_batch_size > 0:
+            self._batcher = EmbeddingBatcher(
+                self._embed_texts,
+                max_batch_size=self.config.micro_batch_size,
+                max_wait_ms=self.config.micro_batch_max_wait_ms
+            )
         
         self._initialize_model()
     
     def _initialize_model(self):
         """Initialize the embedding model"""
         try:
-            if self.config.model_type == "sentence_transformer":
-                self.model = SentenceTransformer(self.config.model_name)
+            if self.config.model_type in ("sentence_transformer", "onnx"):
+                onnx_options = None
+                if self.config.model_type == "onnx":
+                    self.model, onnx_options = self._load_onnx_model()
+                else:
+                    self.model = SentenceTransformer(self.config.model_name)
                 self.config.dimension = self.model.get_sentence_embedding_dimension()
-                logger.info(f"Initialized SentenceTransformer: {self.config.model_name}")
+                self._tokenizer = getattr(self.model, 'tokenizer', None)
+                self._max_seq_length = getattr(self.model, 'max_seq_length', None)
+                if self.config.inference_workers > 0:
+                    self._inference_pool = SentenceTransformerPool(
+                        self.config.model_name,
+                        self.config.dimension,
+                        workers=self.config.inference_workers,
+                        normalize=self.config.normalize,
+                        batch_size=self.config.batch_size,
+                        onnx_options=onnx_options
+                    )
+                logger.info(f"Initialized {self.config.model_type} model: {self.config.model_name}")
                 
             elif self.config.model_type == "openai":
-                self.openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+                # Retries are handled by the dispatcher, which also paces requests
+                self.openai_client = AsyncOpenAI(
+                    api_key=os.getenv('OPENAI_API_KEY'),
+                    base_url=self.config.openai_base_url or os.getenv('OPENAI_BASE_URL'),
+                    max_retries=0
+                )
+                self._openai_dispatcher = OpenAIEmbeddingDispatcher(
+                    self.openai_client,
+                    model="text-embedding-ada-002",
+                    batch_size=min(self.config.batch_size, 100),  # OpenAI limit
+                    max_concurrency=self.config.openai_max_concurrency,
+                    requests_per_minute=self.config.openai_requests_per_minute,
+                    tokens_per_minute=self.config.openai_tokens_per_minute,
+                    max_retries=self.config.openai_max_retries
+                )
                 # OpenAI text-embedding-ada-002 has 1536 dimensions
                 self.config.dimension = 1536
                 logger.info("Initialized OpenAI embeddings")
                 
         except Exception as e:
             logger.error(f"Failed to initialize embedding model: {str(e)}")
+            if self.config.model_type == "onnx":
+                # An explicitly requested graph that fails to load or the parity gate is an error
+                raise
             # Fallback to default model
             self.model = SentenceTransformer("all-MiniLM-L6-v2")
             self.config.model_type = "sentence_transformer"
             self.config.dimension = 384
     
+    def _load_onnx_model(self) -> Tuple[OnnxEmbeddingModel, Dict[str, Any]]:
+        """
+        Load the exported ONNX graph, exporting it first if needed
+        
+        Returns:
+            (model, keyword arguments that load the same model in a worker)
+        """
+        model_dir = Path(self.config.onnx_model_dir or default_export_dir(self.config.model_name))
+        if not (model_dir / EXPORT_MANIFEST).exists():
+            if not self.config.onnx_export:
+                raise FileNotFoundError(f"No ONNX export of {self.config.model_name} in {model_dir}")
+            export_onnx_model(
+                self.config.model_name,
+                str(model_dir),
+                quantize=self.config.onnx_quantize,
+                parity_check=self.config.onnx_parity_check,
+                parity_threshold=self.config.onnx_parity_threshold
+            )
+        
+        options = {
+            'model_dir': str(model_dir),
+            'quantized': self.config.onnx_quantize,
+            'intra_op_threads': self.config.onnx_intra_op_threads
+        }
+        model = OnnxEmbeddingModel(**options)
+        
+        if self.config.onnx_parity_check:
+            variant = 'int8' if self.config.onnx_quantize else 'fp32'
+            parity = model.manifest.get('parity', {}).get(variant)
+            if parity is None:
+                logger.warning(f"No parity check recorded for the {variant} graph in {model_dir}")
+            elif parity['min_cosine'] < self.config.onnx_parity_threshold:
+                raise ValueError(f"ONNX {variant} graph in {model_dir} is below the parity threshold: "
+                                 f"{parity['min_cosine']:.4f} < {self.config.onnx_parity_threshold}")
+        
+        return model, options
+    
     async def generate_embeddings(self, texts: List[str], 
                                 metadata: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
@@ -76,26 +194,25 @@ class EmbeddingGenerator:
             return []
         
         try:
-            if self.config.model_type == "sentence_transformer":
-                embeddings = await self._generate_sentence_transformer_embeddings(texts)
-            elif self.config.model_type == "openai":
-                embeddings = await self._generate_openai_embeddings(texts)
-            else:
-                raise ValueError(f"Unsupported model type: {self.config.model_type}")
+            embeddings = await self._embed(texts)
             
             # Combine embeddings with metadata
             results = []
             for i, embedding in enumerate(embeddings):
                 result = {
                     'text': texts[i],
-                    'embedding': embedding.tolist() if isinstance(embedding, np.ndarray) else embedding,
+                    'embedding': embedding.tolist(),
                     'dimension': len(embedding),
                     'model': self.config.model_name,
                     'model_type': self.config.model_type
                 }
                 
                 if metadata and i < len(metadata):
-                    result.update(metadata[i])
+                    if isinstance(metadata[i], dict):
+                        result.update(metadata[i])
+                    else:
+                        # Structured metadata (e.g. ChunkMetadata) is kept whole
+                        result['metadata'] = metadata[i]
                 
                 results.append(result)
             
@@ -106,93 +223,211 @@ class EmbeddingGenerator:
             logger.error(f"Error generating embeddings: {str(e)}")
             return []
     
-    async def _generate_sentence_transformer_embeddings(self, texts: List[str]) -> List[np.ndarray]:
-        """Generate embeddings using SentenceTransformer"""
-        
-        # Check cache first
-        cached_embeddings = []
-        uncached_texts = []
-        uncached_indices = []
+    async def encode_matrix(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into one (len(texts), dimension) float32 matrix
         
-        if self.config.cache_embeddings:
-            for i, text in enumerate(texts):
-                text_hash = hash(text)
-                if text_hash in self._embedding_cache:
-                    cached_embeddings.append((i, self._embedding_cache[text_hash]))
-                else:
-                    uncached_texts.append(text)
-                    uncached_indices.append(i)
+        Unlike generate_embeddings, no per-text dictionaries are built and
+        errors propagate to the caller. Rows are in input order and can be
+        passed straight to a vector store's add_embeddings.
+        """
+        if not texts:
+            return np.zeros((0, self.config.dimension), dtype=np.float32)
+        return await self._embed(texts)
+    
+    async def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts through the micro-batcher when enabled"""
+        if self._batcher is not None:
+            return self._as_matrix(await self._batcher.embed(texts))
+        return await self._embed_texts(texts)
+    
+    def _as_matrix(self, embeddings) -> np.ndarray:
+        """Stack backend output into an (n, dimension) float32 matrix"""
+        if len(embeddings) == 0:
+            return np.zeros((0, self.config.dimension), dtype=np.float32)
+        return np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+    
+    async def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts with the configured backend, through the cache"""
+        if self.config.model_type in ("sentence_transformer", "onnx"):
+            generate = self._generate_sentence_transformer_embeddings
+        elif self.config.model_type == "openai":
+            generate = self._generate_openai_embeddings
         else:
-            uncached_texts = texts
-            uncached_indices = list(range(len(texts)))
-        
-        # Generate embeddings for uncached texts
-        new_embeddings = []
-        if uncached_texts:
-            # Process in batches to avoid memory issues
-            for i in range(0, len(uncached_texts), self.config.batch_size):
-                batch = uncached_texts[i:i + self.config.batch_size]
-                batch_embeddings = self.model.encode(
-                    batch,
-                    normalize_embeddings=self.config.normalize,
-                    show_progress_bar=False
-                )
-                new_embeddings.extend(batch_embeddings)
-            
-            # Cache new embeddings
-            if self.config.cache_embeddings:
-                for text, embedding in zip(uncached_texts, new_embeddings):
-                    self._embedding_cache[hash(text)] = embedding
+            raise ValueError(f"Unsupported model type: {self.config.model_type}")
+        
+        return await self._generate_cached(texts, generate)
+    
+    @property
+    def _cache_model_key(self) -> str:
+        """Model identity mixed into cache keys"""
+        key = f"{self.config.model_type}/{self.config.model_name}"
+        if self.config.model_type == "onnx" and self.config.onnx_quantize:
+            key = f"{key}/int8"
+        return key if self.config.normalize else f"{key}/unnormalized"
+    
+    async def _generate_cached(self, texts: List[str], generate) -> np.ndarray:
+        """
+        Look texts up in the embedding cache and generate only the misses
+        
+        Repeated texts within a call are embedded once. All-zero vectors and
+        the rows of failed batches are never cached.
+        """
+        if self._embedding_cache is None:
+            return self._as_matrix(await generate(texts))
+        
+        model_key = self._cache_model_key
+        cached = await self._call_cache(self._embedding_cache.get_many, model_key, texts)
         
-        # Combine cached and new embeddings in correct order
-        all_embeddings = [None] * len(texts)
+        uncached_texts = list(dict.fromkeys(
+            text for text, embedding in zip(texts, cached) if embedding is None
+        ))
+        if not uncached_texts:
+            return np.stack(cached)
         
-        # Place cached embeddings
-        for idx, embedding in cached_embeddings:
-            all_embeddings[idx] = embedding
+        try:
+            generated = self._as_matrix(await generate(uncached_texts))
+        except EmbeddingBatchError as e:
+            # Keep what succeeded so a retry only regenerates the failed batches
+            await self._cache_generated(model_key, uncached_texts, e.embeddings, ~e.failed)
+            raise
+        
+        await self._cache_generated(model_key, uncached_texts, generated, np.any(generated, axis=1))
         
-        # Place new embeddings
-        for i, embedding in enumerate(new_embeddings):
-            original_idx = uncached_indices[i]
-            all_embeddings[original_idx] = embedding
+        if len(uncached_texts) == len(texts):
+            return generated
         
-        return all_embeddings
+        position = {text: i for i, text in enumerate(uncached_texts)}
+        embeddings = np.empty((len(texts), generated.shape[1]), dtype=np.float32)
+        for i, (text, embedding) in enumerate(zip(texts, cached)):
+            embeddings[i] = embedding if embedding is not None else generated[position[text]]
+        return embeddings
     
-    async def _generate_openai_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings using OpenAI API"""
+    async def _call_cache(self, method, *args):
+        """Run a cache method, off the event loop when it reads or writes SQLite"""
+        if self._embedding_cache.path is None:
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+    
+    async def _cache_generated(self, model_key: str, texts: List[str], embeddings: np.ndarray, keep: np.ndarray):
+        """Store the generated rows selected by keep"""
+        if keep.any():
+            await self._call_cache(
+                self._embedding_cache.put_many,
+                model_key,
+                [text for text, selected in zip(texts, keep) if selected],
+                embeddings[keep]
+            )
+    
+    async def _generate_sentence_transformer_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings using SentenceTransformer or its ONNX export
         
-        embeddings = []
+        Inputs are truncated to the model's max sequence length and sorted by
+        token length, so each batch holds similar lengths; results come back
+        in input order. Inference never runs on the event loop: it goes to
+        the worker process pool when inference_workers is set, and to a
+        background thread otherwise.
+        """
+        ordered_texts, order = await asyncio.to_thread(self._bucket_by_length, texts)
         
-        # Process in batches (OpenAI has rate limits)
-        batch_size = min(self.config.batch_size, 100)  # OpenAI limit
+        if self._inference_pool is not None:
+            ordered_embeddings = await self._inference_pool.encode(ordered_texts)
+        else:
+            ordered_embeddings = await asyncio.to_thread(self._encode_batches, ordered_texts)
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            try:
-                response = await self.openai_client.embeddings.create(
-                    model="text-embedding-ada-002",
-                    input=batch
-                )
-                
-                batch_embeddings = [item.embedding for item in response.data]
-                embeddings.extend(batch_embeddings)
-                
-                # Rate limiting
-                if len(texts) > batch_size:
-                    await asyncio.sleep(0.1)
-                    
-            except Exception as e:
-                logger.error(f"OpenAI embedding error for batch {i//batch_size}: {str(e)}")
-                # Fallback to zero embeddings
-                embeddings.extend([[0.0] * self.config.dimension] * len(batch))
+        embeddings = np.empty_like(ordered_embeddings)
+        embeddings[order] = ordered_embeddings
+        return embeddings
+    
+    def _bucket_by_length(self, texts: List[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Truncate texts to the model's token budget and sort them by token length
+        
+        Fast tokenizers cut the original string at the character offset of
+        the last token that fits; slow ones (no offset mapping) replace it
+        with the decoded text of the tokens that fit. Either way the model
+        never clips silently. Padding statistics compare the length-sorted
+        batches with input-order ones.
+        
+        Returns:
+            (texts in batching order, original index of each of them)
+        """
+        if self._tokenizer is None or not self._max_seq_length:
+            order = np.argsort([len(text) for text in texts], kind='stable')
+            return [texts[i] for i in order], order
+        
+        budget = self._max_seq_length - self._tokenizer.num_special_tokens_to_add()
+        fast = getattr(self._tokenizer, 'is_fast', False)
+        encoded = self._tokenizer(
+            list(texts),
+            add_special_tokens=False,
+            truncation=False,
+            return_attention_mask=False,
+            return_offsets_mapping=fast
+        )
+        
+        prepared = list(texts)
+        lengths = np.empty(len(texts), dtype=np.int64)
+        truncated = 0
+        for i, input_ids in enumerate(encoded['input_ids']):
+            if len(input_ids) > budget:
+                truncated += 1
+                if fast:
+                    prepared[i] = texts[i][:encoded['offset_mapping'][i][budget - 1][1]]
+                else:
+                    prepared[i] = self._tokenizer.decode(input_ids[:budget], skip_special_tokens=True,
+                                                         clean_up_tokenization_spaces=False)
+            lengths[i] = min(len(input_ids), budget) + self._max_seq_length - budget
+        
+        order = np.argsort(lengths, kind='stable')
+        
+        batch_size = self.config.batch_size
+        def padded_tokens(batch_lengths: np.ndarray) -> int:
+            return sum(int(batch_lengths[i:i + batch_size].max()) * len(batch_lengths[i:i + batch_size])
+                       for i in range(0, len(batch_lengths), batch_size))
+        
+        with self._padding_lock:
+            self._padding_stats['texts'] += len(texts)
+            self._padding_stats['truncated_texts'] += truncated
+            self._padding_stats['real_tokens'] += int(lengths.sum())
+            self._padding_stats['padded_tokens'] += padded_tokens(lengths[order])
+            self._padding_stats['input_order_padded_tokens'] += padded_tokens(lengths)
+        
+        return [prepared[i] for i in order], order
+    
+    def _encode_batches(self, texts: List[str]) -> np.ndarray:
+        """Encode texts with the in-process model into one float32 matrix"""
+        
+        embeddings = np.empty((len(texts), self.config.dimension), dtype=np.float32)
+        
+        # Process in batches to avoid memory issues
+        for i in range(0, len(texts), self.config.batch_size):
+            batch = texts[i:i + self.config.batch_size]
+            embeddings[i:i + len(batch)] = self.model.encode(
+                batch,
+                batch_size=len(batch),
+                normalize_embeddings=self.config.normalize,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
         
         return embeddings
     
+    async def _generate_openai_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings using OpenAI API
+        
+        Batches are sent concurrently within the configured rate limits and
+        retried on transient errors. Batches that still fail raise
+        EmbeddingBatchError; they are never filled with placeholder vectors.
+        """
+        return await self._openai_dispatcher.embed(texts)
+    
     def generate_embedding_sync(self, text: str) -> Optional[List[float]]:
         """Generate single embedding synchronously"""
         try:
-            if self.config.model_type == "sentence_transformer":
+            if self.config.model_type in ("sentence_transformer", "onnx"):
                 embedding = self.model.encode([text], normalize_embeddings=self.config.normalize)[0]
                 return embedding.tolist()
             else:
@@ -206,24 +441,26 @@ class EmbeddingGenerator:
     def compute_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """Compute cosine similarity between two embeddings"""
         try:
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
-            
-            # Cosine similarity
-            dot_product = np.dot(vec1, vec2)
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-            
-            similarity = dot_product / (norm1 * norm2)
-            return float(similarity)
+            return float(cosine_matrix(embedding1, embedding2)[0, 0])
             
         except Exception as e:
             logger.error(f"Error computing similarity: {str(e)}")
             return 0.0
     
+    def compute_similarities(self, embeddings1: Any, embeddings2: Any) -> np.ndarray:
+        """
+        Cosine similarity of every row of embeddings1 with every row of embeddings2
+        
+        Returns:
+            (len(embeddings1), len(embeddings2)) float32 matrix
+        """
+        return cosine_matrix(embeddings1, embeddings2)
+    
+    def most_similar(self, query_embedding: Any, embeddings: Any, k: int = 5) -> List[Tuple[int, float]]:
+        """Indices and cosine similarities of the k rows most similar to the query, best first"""
+        indices, scores = cosine_top_k(query_embedding, embeddings, k)
+        return [(int(i), float(score)) for i, score in zip(indices, scores)]
+    
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the current model"""
         return {
@@ -231,9 +468,53 @@ class EmbeddingGenerator:
             'model_type': self.config.model_type,
             'dimension': self.config.dimension,
             'batch_size': self.config.batch_size,
+            'inference_workers': self.config.inference_workers,
+            'max_seq_length': self._max_seq_length,
             'normalize': self.config.normalize,
-            'cache_size': len(self._embedding_cache)
+            'cache_size': len(self._embedding_cache) if self._embedding_cache is not None else 0,
+            'cache_stats': self._embedding_cache.stats() if self._embedding_cache is not None else {},
+            'batching_stats': self._batcher.stats() if self._batcher is not None else {},
+            'padding_stats': self.get_padding_stats() if self.model is not None else {},
+            'onnx_parity': self.model.manifest.get('parity', {}) if isinstance(self.model, OnnxEmbeddingModel) else {},
+            'api_stats': self._openai_dispatcher.stats() if self._openai_dispatcher is not None else {}
         }
+    
+    async def close(self):
+        """Stop the micro-batching worker and inference processes, close API connections"""
+        if self._batcher is not None:
+            await self._batcher.close()
+        if self._inference_pool is not None:
+            self._inference_pool.shutdown()
+        if self.openai_client is not None:
+            await self.openai_client.close()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit-rate counters of the embedding cache"""
+        return self._embedding_cache.stats() if self._embedding_cache is not None else {}
+    
+    def get_padding_stats(self) -> Dict[str, Any]:
+        """
+        Padding efficiency of sentence-transformer batches
+        
+        Efficiency is real tokens over tokens processed including padding,
+        for the length-bucketed batches actually run and for the input-order
+        batches they replace.
+        """
+        with self._padding_lock:
+            stats = dict(self._padding_stats)
+        
+        stats['padding_efficiency'] = (
+            stats['real_tokens'] / stats['padded_tokens'] if stats['padded_tokens'] else 1.0
+        )
+        stats['input_order_padding_efficiency'] = (
+            stats['real_tokens'] / stats['input_order_padded_tokens']
+            if stats['input_order_padded_tokens'] else 1.0
+        )
+        return stats
+    
+    def get_batching_stats(self) -> Dict[str, Any]:
+        """Achieved micro-batch sizes and queueing delay"""
+        return self._batcher.stats() if self._batcher is not None else {}
 
 class ContextAwareEmbedding:
     """Context-aware embedding generation with domain adaptation"""
@@ -293,23 +574,25 @@ class ContextAwareEmbedding:
         if domain not in self.domain_weights:
             return embedding
         
-        weights = self.domain_weights[domain]
-        adjusted = np.array(embedding)
-        
-        # Apply domain-specific transformations
-        if 'scale' in weights:
-            adjusted *= weights['scale']
-        
-        if 'bias' in weights:
-            adjusted += weights['bias']
+        return self.adjust_embeddings_for_domain(embedding, domain)[0].tolist()
+    
+    def adjust_embeddings_for_domain(self, embeddings: Any, domain: str) -> np.ndarray:
+        """
+        Adjust a matrix of embeddings based on domain-specific weights
         
-        # Normalize if needed
-        if self.base_generator.config.normalize:
-            norm = np.linalg.norm(adjusted)
-            if norm > 0:
-                adjusted = adjusted / norm
+        Scale and bias (scalars or per-dimension vectors) are applied to all
+        rows in one broadcast pass.
+        """
+        if domain not in self.domain_weights:
+            return as_matrix(embeddings)
         
-        return adjusted.tolist()
+        weights = self.domain_weights[domain]
+        return apply_domain_weights(
+            embeddings,
+            scale=weights.get('scale'),
+            bias=weights.get('bias'),
+            normalize=self.base_generator.config.normalize
+        )
 
 # Factory function for easy initialization
 def create_embedding_generator(model_type: str = "sentence_transformer",
@@ -318,7 +601,7 @@ def create_embedding_generator(model_type: str = "sentence_transformer",
     Factory function to create embedding generator
     
     Args:
-        model_type: 'sentence_transformer' or 'openai'
+        model_type: 'sentence_transformer', 'onnx' or 'openai'
         model_name: Specific model name (optional)
         
     Returns:
@@ -326,7 +609,7 @@ def create_embedding_generator(model_type: str = "sentence_transformer",
     """
     
     if model_name is None:
-        if model_type == "sentence_transformer":
+        if model_type in ("sentence_transformer", "onnx"):
             model_name = "all-MiniLM-L6-v2"  # Fast and good quality
         elif model_type == "openai":
             model_name = "text-embedding-ada-002"
@@ -0,0 +1,149 @@
+"""
+Sentence-Transformer Inference Pool
+===================================
+
+Runs sentence-transformer inference in a pool of worker processes, each
+holding its own model replica (PyTorch, or an ONNX export), so encoding uses
+every core and never blocks the event loop.
+
+Each request is split into contiguous slices, one per worker. Workers write
+their embeddings straight into a shared-memory float32 matrix allocated by
+the parent, so results cross the process boundary without pickling arrays.
+The block is unlinked only after every slice writing into it has finished,
+even when one fails or the caller is cancelled.
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Model replica of a worker process, loaded by _init_worker
+_WORKER_MODEL = None
+
+def _init_worker(model_name: str, device: Optional[str], onnx_options: Optional[Dict[str, Any]]):
+    """Load the model once per worker process"""
+    global _WORKER_MODEL
+    if onnx_options is not None:
+        from .onnx_backend import OnnxEmbeddingModel
+
+        _WORKER_MODEL = OnnxEmbeddingModel(**onnx_options)
+        return
+
+    from sentence_transformers import SentenceTransformer
+
+    _WORKER_MODEL = SentenceTransformer(model_name, device=device)
+
+def _encode_into_shared(shm_name: str, shape: tuple, start: int, texts: List[str],
+                        normalize: bool, batch_size: int) -> int:
+    """Encode texts into rows [start, start + len(texts)) of a shared matrix"""
+    # Spawned workers share the parent's resource tracker, which already
+    # tracks this block; the parent unlinks it once the request completes
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        output = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        output[start:start + len(texts)] = _WORKER_MODEL.encode(
+            texts,
+            batch_size=batch_size,
+            normalize_embeddings=normalize,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        del output
+    finally:
+        shm.close()
+    return len(texts)
+
+def _release_when_done(shm: shared_memory.SharedMemory, futures: List[Future]):
+    """Close and unlink a shared block once no worker can still write into it"""
+    # cancel() only fails for slices that are already running or finished
+    running = [future for future in futures if not future.cancel() and not future.done()]
+    if not running:
+        shm.close()
+        shm.unlink()
+        return
+
+    remaining = [len(running)]
+    lock = threading.Lock()
+
+    def finished(_):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            shm.close()
+            shm.unlink()
+
+    for future in running:
+        future.add_done_callback(finished)
+
+class SentenceTransformerPool:
+    """Process pool of sentence-transformer replicas with shared-memory results"""
+
+    def __init__(self, model_name: str, dimension: int, workers: int = None,
+                 normalize: bool = True, batch_size: int = 32, device: str = None,
+                 onnx_options: Dict[str, Any] = None):
+        self.model_name = model_name
+        self.dimension = dimension
+        self.workers = workers or multiprocessing.cpu_count()
+        self.normalize = normalize
+        self.batch_size = batch_size
+        self.device = device
+        self.onnx_options = onnx_options  # OnnxEmbeddingModel arguments; None loads PyTorch
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Start the worker processes (done lazily by encode)"""
+        if self._executor is None:
+            # spawn: forked copies of a process with torch threads running can deadlock
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.device, self.onnx_options)
+            )
+            logger.info(f"Started {self.workers} inference workers for {self.model_name}")
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into an (n, dimension) float32 matrix"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        self.start()
+
+        shape = (len(texts), self.dimension)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(texts) * self.dimension * 4))
+        futures: List[Future] = []
+        try:
+            # Contiguous slices, no smaller than one model batch each
+            parts = min(self.workers, math.ceil(len(texts) / self.batch_size))
+            slice_size = math.ceil(len(texts) / parts)
+            for start in range(0, len(texts), slice_size):
+                futures.append(self._executor.submit(
+                    _encode_into_shared, shm.name, shape, start,
+                    texts[start:start + slice_size], self.normalize, self.batch_size
+                ))
+            # Every slice finishes before the block is read or released
+            results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures),
+                                           return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+            return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            _release_when_done(shm, futures)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -8,19 +8,21 @@ Command-line interface for ingesting documents into the context engineering syst
 
 import asyncio
 import argparse
+import itertools
 import os
 import sys
 from pathlib import Path
 from typing import List, Dict, Any
 import logging
-from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
 from context_engineering.chunking import DocumentChunker, MultiModalChunker
+from context_engineering.parallel_chunking import read_text_and_hash, chunk_text
+from context_engineering.ingestion_engine import IngestionEngine, PipelineConfig
 from context_engineering.embeddings import create_embedding_generator
-from context_engineering.vector_store import PgVectorStore
+from context_engineering.vector_store import PgVectorStore, PARTITION_KEYS
 
 # Configure logging
 logging.basicConfig(
@@ -32,11 +34,28 @@ logger = logging.getLogger(__name__)
 class DocumentIngestionPipeline:
     """Complete document ingestion pipeline"""
     
-    def __init__(self, vector_store: PgVectorStore, embedding_generator, chunker: DocumentChunker):
+    def __init__(self, vector_store: PgVectorStore, embedding_generator, chunker: DocumentChunker,
+                 stream_threshold: int = 32 * 1024 * 1024, stream_batch_size: int = 256,
+                 chunk_workers: int = 1, pipeline_config: PipelineConfig = None,
+                 incremental: bool = True):
         self.vector_store = vector_store
         self.embedding_generator = embedding_generator
         self.chunker = chunker
         
+        # With more than one worker, directory ingests chunk files in a process pool
+        self.chunk_workers = chunk_workers
+        
+        # Stage concurrency and queue bounds for directory ingests
+        self.pipeline_config = pipeline_config or PipelineConfig()
+        
+        # Skip files the document manifest shows unchanged since the last run
+        self.incremental = incremental
+        
+        # Files larger than stream_threshold bytes are chunked while reading and
+        # embedded stream_batch_size chunks at a time instead of read whole
+        self.stream_threshold = stream_threshold
+        self.stream_batch_size = stream_batch_size
+        
         # Supported file types
         self.supported_extensions = {
             '.txt': 'text',
@@ -63,118 +82,186 @@ class DocumentIngestionPipeline:
         }
     
     async def ingest_directory(self, directory_path: str, recursive: bool = True) -> Dict[str, Any]:
-        """Ingest all supported files from a directory"""
-        
-        directory = Path(directory_path)
+        """
+        Ingest all supported files from a directory
+        
+        Files flow through concurrent discover, read, chunk, embed and store
+        stages (see IngestionEngine); results include per-stage statistics
+        under 'stages'. Unchanged files are skipped (skipped_files) and
+        recorded files that were removed from disk are deleted
+        (deleted_files).
+        """
+        
+        # Absolute, resolved paths key chunks and document records, so two
+        # spellings of one file never become two documents
+        directory = Path(directory_path).resolve()
         if not directory.exists():
             raise ValueError(f"Directory does not exist: {directory_path}")
         
-        # Find all supported files
-        files_to_process = []
-        
-        if recursive:
-            for ext in self.supported_extensions.keys():
-                files_to_process.extend(directory.rglob(f"*{ext}"))
-        else:
-            for ext in self.supported_extensions.keys():
-                files_to_process.extend(directory.glob(f"*{ext}"))
-        
-        logger.info(f"Found {len(files_to_process)} files to process")
-        
-        # Process files
-        results = {
-            'processed_files': 0,
-            'total_chunks': 0,
-            'failed_files': [],
-            'processing_time': 0
-        }
-        
-        start_time = datetime.now()
-        
-        for file_path in files_to_process:
-            try:
-                file_results = await self.ingest_file(str(file_path))
-                results['processed_files'] += 1
-                results['total_chunks'] += file_results['chunk_count']
-                
-                logger.info(f"Processed {file_path.name}: {file_results['chunk_count']} chunks")
-                
-            except Exception as e:
-                logger.error(f"Failed to process {file_path}: {str(e)}")
-                results['failed_files'].append(str(file_path))
-        
-        results['processing_time'] = (datetime.now() - start_time).total_seconds()
-        
-        return results
+        engine = IngestionEngine(self, self.pipeline_config)
+        return await engine.run(directory, recursive)
     
     async def ingest_file(self, file_path: str) -> Dict[str, Any]:
         """Ingest a single file"""
         
-        file_path_obj = Path(file_path)
+        file_path_obj = Path(file_path).resolve()
         
         if not file_path_obj.exists():
             raise ValueError(f"File does not exist: {file_path}")
+        file_path = str(file_path_obj)
         
         # Determine content type
         extension = file_path_obj.suffix.lower()
         content_type = self.supported_extensions.get(extension, 'text')
         
-        # Read file content
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            with open(file_path, 'r', encoding='latin-1') as f:
-                content = f.read()
-        
-        if not content.strip():
-            logger.warning(f"File is empty: {file_path}")
-            return {'chunk_count': 0, 'embeddings_count': 0}
+        stat = file_path_obj.stat()
+        file_info = {'file_size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
         
-        # Chunk the document
-        if content_type == 'code':
-            language = self._detect_programming_language(file_path_obj.suffix)
-            chunks = self.chunker.chunk_code_file(content, file_path, language)
-        else:
-            chunks = self.chunker.chunk_document(content, file_path, content_type)
+        if self.stream_threshold and stat.st_size > self.stream_threshold:
+            return await self._ingest_file_streaming(file_path, content_type, file_info)
+        
+        # Read and chunk the file off the event loop
+        language = self._detect_programming_language(extension) if content_type == 'code' else None
+        content, file_info['content_hash'] = await asyncio.to_thread(read_text_and_hash, file_path)
+        chunks = await asyncio.to_thread(chunk_text, self.chunker, content, file_path, content_type, language)
+        
+        return await self._ingest_chunks(file_path, content_type, chunks, file_info)
+    
+    async def _ingest_chunks(self, file_path: str, content_type: str, chunks: List[Dict[str, Any]],
+                             file_info: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Embed and store one file's chunks, replacing its previous ones, and record the document"""
+        
+        # Stored chunks whose ids the new chunking reproduces keep their embeddings and
+        # the rest of the file's previous chunks are deleted. Content-defined ids depend
+        # only on chunk text; default ids include the chunk's index, so every chunk
+        # after an insertion or deletion gets a new id and is embedded again
+        existing = await self.vector_store.get_chunk_ids(file_path)
         
         if not chunks:
             logger.warning(f"No chunks generated for: {file_path}")
+            await self._delete_stale_chunks(file_path, existing, set())
+            await self._record_document(file_path, content_type, 0, file_info)
             return {'chunk_count': 0, 'embeddings_count': 0}
         
-        # Generate embeddings
-        chunk_texts = [chunk['content'] for chunk in chunks]
-        chunk_metadata = [chunk['metadata'] for chunk in chunks]
+        embeddings_count = await self._store_chunks(chunks, file_path, existing)
+        deleted_count = await self._delete_stale_chunks(file_path, existing, {chunk['id'] for chunk in chunks})
+        await self._record_document(file_path, content_type, len(chunks), file_info)
+        
+        return {
+            'chunk_count': len(chunks),
+            'embeddings_count': embeddings_count,
+            'reused_count': len(chunks) - embeddings_count,
+            'deleted_count': deleted_count,
+            'content_type': content_type
+        }
+    
+    async def _ingest_file_streaming(self, file_path: str, content_type: str,
+                                     file_info: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Ingest a large file batch by batch while it is being read"""
         
-        embeddings = await self.embedding_generator.generate_embeddings(
-            texts=chunk_texts,
-            metadata=chunk_metadata
+        chunks = self.chunker.stream_chunks(file_path, content_type=content_type)
+        existing = await self.vector_store.get_chunk_ids(file_path)
+        current_ids = set()
+        chunk_count = 0
+        embeddings_count = 0
+        
+        try:
+            while True:
+                # Reading and chunking are blocking; keep them off the event loop
+                batch = await asyncio.to_thread(lambda: list(itertools.islice(chunks, self.stream_batch_size)))
+                if not batch:
+                    break
+                
+                embeddings_count += await self._store_chunks(batch, file_path, existing)
+                current_ids.update(chunk['id'] for chunk in batch)
+                chunk_count += len(batch)
+        finally:
+            chunks.close()
+        
+        deleted_count = await self._delete_stale_chunks(file_path, existing, current_ids)
+        
+        # Not hashed: a large file is re-streamed whenever its size or mtime changes.
+        # Recorded even without chunks so an emptied file is skipped on the next run
+        await self._record_document(file_path, content_type, chunk_count, file_info)
+        
+        if not chunk_count:
+            logger.warning(f"No chunks generated for: {file_path}")
+            return {'chunk_count': 0, 'embeddings_count': 0}
+        
+        logger.info(f"Streamed {file_path}: {chunk_count} chunks")
+        
+        return {
+            'chunk_count': chunk_count,
+            'embeddings_count': embeddings_count,
+            'reused_count': chunk_count - embeddings_count,
+            'deleted_count': deleted_count,
+            'content_type': content_type
+        }
+    
+    async def _store_chunks(self, chunks: List[Dict[str, Any]], file_path: str,
+                            existing: Dict[str, int] = None) -> int:
+        """
+        Embed chunks as one matrix and store it with columnar chunk fields
+        
+        Chunks whose ids are already stored (existing) keep their embeddings
+        and only get their position updated. Returns the number embedded.
+        """
+        
+        if existing:
+            reused = [chunk for chunk in chunks if chunk['id'] in existing]
+            chunks = [chunk for chunk in chunks if chunk['id'] not in existing]
+            
+            updated = await self.vector_store.update_chunk_positions(
+                file_path,
+                [chunk['id'] for chunk in reused],
+                [chunk['chunk_index'] for chunk in reused],
+                [chunk['metadata'] for chunk in reused]
+            )
+            if not updated:
+                raise RuntimeError(f"Failed to update chunk positions for: {file_path}")
+            
+            if not chunks:
+                return 0
+        
+        chunk_texts = [chunk['content'] for chunk in chunks]
+        embeddings = await self.embedding_generator.encode_matrix(chunk_texts)
+        
+        stored = await self.vector_store.add_embeddings(
+            embeddings,
+            ids=[chunk['id'] for chunk in chunks],
+            contents=chunk_texts,
+            metadata=[chunk['metadata'] for chunk in chunks],
+            source_files=[chunk['source_file'] for chunk in chunks],
+            chunk_indices=[chunk['chunk_index'] for chunk in chunks],
+            content_types=[chunk['content_type'] for chunk in chunks]
         )
+        if not stored:
+            raise RuntimeError(f"Failed to store embeddings for: {file_path}")
         
-        # Combine chunks with embeddings
-        for i, embedding in enumerate(embeddings):
-            if i < len(chunks):
-                chunks[i].update(embedding)
+        return len(embeddings)
+    
+    async def _delete_stale_chunks(self, file_path: str, existing: Dict[str, int], current_ids: set) -> int:
+        """Delete stored chunks of a file that re-chunking no longer produced"""
         
-        # Store in vector database
-        await self.vector_store.add_embeddings(chunks)
+        stale = [chunk_id for chunk_id in existing if chunk_id not in current_ids]
+        if stale and not await self.vector_store.delete_chunks(file_path, stale):
+            raise RuntimeError(f"Failed to delete stale chunks for: {file_path}")
+        
+        return len(stale)
+    
+    async def _record_document(self, file_path: str, content_type: str, chunk_count: int,
+                               file_info: Dict[str, Any] = None):
+        """Add or update the document record, including its manifest fields (size, mtime, hash)"""
         
-        # Update document record
         doc_id = await self.vector_store.add_document_record(file_path, {
             'content_type': content_type,
-            'file_size': file_path_obj.stat().st_size,
-            'chunk_count': len(chunks)
+            'file_size': Path(file_path).stat().st_size,
+            'chunk_count': chunk_count,
+            **(file_info or {})
         })
         
         if doc_id:
-            await self.vector_store.update_document_chunk_count(file_path, len(chunks))
-        
-        return {
-            'chunk_count': len(chunks),
-            'embeddings_count': len(embeddings),
-            'content_type': content_type
-        }
+            await self.vector_store.update_document_chunk_count(file_path, chunk_count)
     
     def _detect_programming_language(self, extension: str) -> str:
         """Detect programming language from file extension"""
@@ -208,6 +295,29 @@ async def main():
                        help='Embedding model to use')
     parser.add_argument('--chunk-size', type=int, default=1000, help='Chunk size for document splitting')
     parser.add_argument('--chunk-overlap', type=int, default=200, help='Chunk overlap size')
+    parser.add_argument('--content-defined', action='store_true',
+                       help='Content-defined chunk boundaries and ids; re-ingesting an edited file embeds '
+                            'only changed chunks (default ids are positional, so an edit re-embeds every '
+                            'chunk after it)')
+    parser.add_argument('--stream-threshold-mb', type=float, default=32,
+                       help='Chunk files larger than this while reading them (0 = never)')
+    parser.add_argument('--stream-window-mb', type=float, default=1,
+                       help='Characters (in millions) held per read window when streaming')
+    parser.add_argument('--chunk-workers', type=int, default=1,
+                       help='Processes chunking files in parallel for directory ingests (0 = one per core)')
+    parser.add_argument('--read-concurrency', type=int, default=4, help='Concurrent file reads')
+    parser.add_argument('--chunk-concurrency', type=int,
+                       help='Files chunked concurrently (default: 2 per chunk worker)')
+    parser.add_argument('--embed-concurrency', type=int, default=1, help='Embedding batches in flight')
+    parser.add_argument('--store-concurrency', type=int, default=2, help='Store batches in flight')
+    parser.add_argument('--embed-batch-size', type=int, default=256, help='Chunks per embed/store batch')
+    parser.add_argument('--queue-size', type=int, default=64, help='Items buffered between stages')
+    parser.add_argument('--full', action='store_true',
+                       help='Re-process every file, even those unchanged since the last run')
+    parser.add_argument('--partition-by', choices=PARTITION_KEYS,
+                       help='Partition the embeddings table by this column')
+    parser.add_argument('--migrate-partitions', action='store_true',
+                       help='Convert an existing unpartitioned embeddings table (requires --partition-by)')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
     
     args = parser.parse_args()
@@ -223,7 +333,7 @@ async def main():
             logger.error("Database URL not provided. Set DATABASE_URL environment variable or use --database-url")
             return 1
         
-        vector_store = PgVectorStore(database_url)
+        vector_store = PgVectorStore(database_url, partition_by=args.partition_by)
         
         # Embedding generator
         embedding_generator = create_embedding_generator(
@@ -233,14 +343,39 @@ async def main():
         # Document chunker
         chunker = MultiModalChunker(
             chunk_size=args.chunk_size,
-            chunk_overlap=args.chunk_overlap
+            chunk_overlap=args.chunk_overlap,
+            stream_window_size=int(args.stream_window_mb * 1024 * 1024),
+            content_defined=args.content_defined
         )
         
         # Initialize vector store
         await vector_store.initialize(dimension=embedding_generator.config.dimension)
         
+        if args.migrate_partitions:
+            if not args.partition_by:
+                logger.error("--migrate-partitions requires --partition-by")
+                return 1
+            migration = await vector_store.migrate_to_partitioned()
+            if not migration['success']:
+                return 1
+            print(f"Partitioned embeddings table by {args.partition_by}: "
+                  f"{migration['rows']} rows in {migration['seconds']:.1f}s")
+        
         # Create ingestion pipeline
-        pipeline = DocumentIngestionPipeline(vector_store, embedding_generator, chunker)
+        pipeline = DocumentIngestionPipeline(
+            vector_store, embedding_generator, chunker,
+            stream_threshold=int(args.stream_threshold_mb * 1024 * 1024),
+            chunk_workers=args.chunk_workers or os.cpu_count() or 1,
+            pipeline_config=PipelineConfig(
+                read_concurrency=args.read_concurrency,
+                chunk_concurrency=args.chunk_concurrency,
+                embed_concurrency=args.embed_concurrency,
+                store_concurrency=args.store_concurrency,
+                embed_batch_size=args.embed_batch_size,
+                queue_size=args.queue_size
+            ),
+            incremental=not args.full
+        )
         
         # Process input path
         input_path = Path(args.path)
@@ -252,6 +387,9 @@ async def main():
             print(f"\nFile Processing Results:")
             print(f"  Chunks created: {results['chunk_count']}")
             print(f"  Embeddings generated: {results['embeddings_count']}")
+            if results.get('reused_count') or results.get('deleted_count'):
+                print(f"  Unchanged chunks reused: {results['reused_count']}")
+                print(f"  Stale chunks deleted: {results['deleted_count']}")
             print(f"  Content type: {results['content_type']}")
             
         elif input_path.is_dir():
@@ -260,9 +398,21 @@ async def main():
             
             print(f"\nDirectory Processing Results:")
             print(f"  Files processed: {results['processed_files']}")
+            print(f"  Files unchanged (skipped): {results['skipped_files']}")
+            print(f"  Removed files deleted: {results['deleted_files']}")
             print(f"  Total chunks created: {results['total_chunks']}")
+            print(f"  Chunks embedded: {results['embedded_chunks']}")
             print(f"  Processing time: {results['processing_time']:.2f} seconds")
             
+            print(f"\nPipeline Stages:")
+            print(f"  {'stage':<9} {'workers':>7} {'items':>9} {'rate':>16} {'busy':>8} {'queue avg/max':>16}")
+            for name, stage in results['stages'].items():
+                rate = f"{stage['throughput']:.1f} {stage['unit']}/s"
+                depth = (f"{stage['avg_queue_depth']:.1f}/{stage['max_queue_depth']} of {stage['queue_capacity']}"
+                         if stage['queue_capacity'] else '-')
+                print(f"  {name:<9} {stage['concurrency']:>7} {stage['items']:>9} {rate:>16} "
+                      f"{stage['busy_seconds']:>7.1f}s {depth:>16}")
+            
             if results['failed_files']:
                 print(f"  Failed files: {len(results['failed_files'])}")
                 for failed_file in results['failed_files']:
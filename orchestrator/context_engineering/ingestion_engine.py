@@ -0,0 +1,640 @@
+"""
+Staged Ingestion Engine
+=======================
+
+Pipelined directory ingestion: discover -> read -> chunk -> embed -> store.
+
+Stages run concurrently, connected by bounded asyncio queues, each with its
+own number of workers. A full queue blocks the stage feeding it, so a slow
+embedder throttles reading instead of letting chunks pile up in memory;
+file bytes read but not yet chunked are additionally capped by a byte
+budget. With a chunk process pool the read and chunk stages merge: files
+go to the pool by path in size-bounded batches and workers read them.
+The embed stage packs new chunks from consecutive files into fixed-size
+batches, so embedding and storing run on full batches however small the
+files are. A file's stale chunks are deleted and its document record is
+written once all of its new chunks are stored.
+
+Runs are incremental. The documents table doubles as a manifest of each
+file's size, mtime and content hash: files whose size and mtime match are
+skipped without being read, files whose content hash matches are only
+re-recorded, changed files replace just their own chunks, and recorded
+files that no longer exist are removed with ``delete_document``.
+
+Every stage keeps counters and the input queue is sampled for depth, so
+runs report per-stage throughput and where work was waiting.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from .parallel_chunking import ParallelChunker, read_text_and_hash, chunk_text
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PipelineConfig:
+    """Per-stage concurrency and buffering for staged ingestion"""
+    read_concurrency: int = 4
+    chunk_concurrency: Optional[int] = None  # None: 2 per chunk worker process
+    embed_concurrency: int = 1
+    store_concurrency: int = 2
+    queue_size: int = 64  # Items per inter-stage queue
+    read_ahead_bytes: int = 64 * 1024 * 1024  # File bytes read but not yet chunked
+    embed_batch_size: int = 256  # Chunks per embed/store batch, across files
+    batch_timeout: float = 0.05  # Seconds to wait for more chunks before sending a partial batch
+    report_interval: float = 10.0  # Seconds between progress log lines (0 = none)
+
+@dataclass
+class StageStats:
+    """Throughput and input-queue depth of one stage"""
+    name: str
+    unit: str
+    concurrency: int
+    queue_capacity: int = 0
+    items: int = 0
+    nbytes: int = 0
+    busy_seconds: float = 0.0
+    first_start: Optional[float] = None
+    last_end: Optional[float] = None
+    depth_samples: int = 0
+    depth_total: int = 0
+    max_depth: int = 0
+
+    def record(self, started: float, items: int, nbytes: int = 0):
+        """Count items processed by a worker since started"""
+        now = time.perf_counter()
+        self.items += items
+        self.nbytes += nbytes
+        self.busy_seconds += now - started
+        self.first_start = started if self.first_start is None else min(self.first_start, started)
+        self.last_end = now
+
+    def sample(self, depth: int):
+        """Record one observation of the input queue depth"""
+        self.depth_samples += 1
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary for reports"""
+        wall = (self.last_end - self.first_start) if self.first_start is not None else 0.0
+        return {
+            'unit': self.unit,
+            'concurrency': self.concurrency,
+            'items': self.items,
+            'megabytes': self.nbytes / (1024 * 1024),
+            'seconds': wall,
+            'busy_seconds': self.busy_seconds,
+            'throughput': self.items / wall if wall > 0 else 0.0,
+            'queue_capacity': self.queue_capacity,
+            'avg_queue_depth': self.depth_total / self.depth_samples if self.depth_samples else 0.0,
+            'max_queue_depth': self.max_depth
+        }
+
+@dataclass
+class _FileState:
+    """A file's chunks on their way through embed and store"""
+    file_path: str
+    content_type: str
+    file_info: Dict[str, Any]  # Manifest fields: file_size, mtime_ns, content_hash
+    chunk_count: int
+    existing: Dict[str, int]
+    chunk_ids: set
+    new_chunks: List[Dict[str, Any]]
+    reused_chunks: List[Dict[str, Any]]
+    remaining: int = 0  # New chunks not yet stored
+    reused_stored: bool = False
+    embedded: int = 0
+    finished: bool = False
+
+@dataclass
+class _Batch:
+    """Chunks from one or more files, embedded and stored together"""
+    entries: List[Tuple[_FileState, Dict[str, Any]]] = field(default_factory=list)
+    files: List[_FileState] = field(default_factory=list)  # Files whose reused chunks ride along
+
+class _ByteBudget:
+    """Caps the bytes held between stages; one oversized item may always pass"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, nbytes: int):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.used == 0 or self.used + nbytes <= self.limit)
+            self.used += nbytes
+
+    async def release(self, nbytes: int):
+        async with self._condition:
+            self.used -= nbytes
+            self._condition.notify_all()
+
+def _scan_next(walker, extensions: Tuple[str, ...], recursive: bool):
+    """Next (directory, [(name, size, mtime_ns, error)]) from an os.walk, or None when done"""
+    entry = next(walker, None)
+    if entry is None:
+        return None
+    root, dirs, files = entry
+    if not recursive:
+        dirs.clear()
+
+    found = []
+    for name in sorted(files):
+        if name.endswith(extensions):
+            try:
+                stat = os.stat(os.path.join(root, name))
+                found.append((name, stat.st_size, stat.st_mtime_ns, None))
+            except OSError as e:
+                found.append((name, None, None, e))
+    return root, found
+
+class IngestionEngine:
+    """Runs a DocumentIngestionPipeline's directory ingest as concurrent stages"""
+
+    def __init__(self, pipeline, config: PipelineConfig = None):
+        self.pipeline = pipeline
+        self.config = config or PipelineConfig()
+
+        chunk_workers = max(1, pipeline.chunk_workers)
+        self.parallel_chunker = ParallelChunker(pipeline.chunker, workers=chunk_workers) if chunk_workers > 1 else None
+        self.chunk_concurrency = self.config.chunk_concurrency or (2 * chunk_workers if self.parallel_chunker else 1)
+
+    async def run(self, directory: Path, recursive: bool = True) -> Dict[str, Any]:
+        """Ingest every supported file under directory"""
+        config = self.config
+        self.results = {
+            'processed_files': 0,
+            'skipped_files': 0,
+            'deleted_files': 0,
+            'total_chunks': 0,
+            'embedded_chunks': 0,
+            'failed_files': [],
+            'processing_time': 0
+        }
+        self.large_files: List[Path] = []
+        self.budget = _ByteBudget(config.read_ahead_bytes)
+
+        # What earlier runs recorded under this directory, and what this run finds;
+        # paths are resolved so they match however the directory was spelled
+        directory = Path(directory).resolve()
+        self.manifest = await self.pipeline.vector_store.get_document_manifest(str(directory))
+        self.seen = set()
+        self.unreadable: List[Path] = []
+
+        self.read_queue = asyncio.Queue(config.queue_size)
+        self.chunk_queue = asyncio.Queue(config.queue_size)
+        self.embed_queue = asyncio.Queue(config.queue_size)
+        self.batch_queue = asyncio.Queue(max(2, config.embed_concurrency))
+        self.store_queue = asyncio.Queue(max(2, config.store_concurrency))
+
+        # With a chunk pool, workers read and hash files themselves: the chunk stage
+        # takes discovered files straight from the read queue in size-bounded batches
+        pooled = self.parallel_chunker is not None
+        read_concurrency = self.parallel_chunker.workers if pooled else config.read_concurrency
+        self.stages = {
+            'discover': StageStats('discover', 'files', 1),
+            'read': StageStats('read', 'files', read_concurrency, config.queue_size),
+            'chunk': StageStats('chunk', 'files', self.chunk_concurrency, config.queue_size),
+            'embed': StageStats('embed', 'chunks', config.embed_concurrency, config.queue_size),
+            'store': StageStats('store', 'chunks', config.store_concurrency, self.store_queue.maxsize)
+        }
+        if pooled:
+            stage_queues = [('read', self.read_queue), ('chunk', self.read_queue)]
+            read_and_chunk = [
+                self._run_stage(self._discover(directory, recursive), 1, self.read_queue, self.chunk_concurrency),
+                self._run_stage(self._pool_chunk_worker, self.chunk_concurrency, self.embed_queue, 1)
+            ]
+        else:
+            stage_queues = [('read', self.read_queue), ('chunk', self.chunk_queue)]
+            read_and_chunk = [
+                self._run_stage(self._discover(directory, recursive), 1, self.read_queue, config.read_concurrency),
+                self._run_stage(self._read_worker, config.read_concurrency, self.chunk_queue, self.chunk_concurrency),
+                self._run_stage(self._chunk_worker, self.chunk_concurrency, self.embed_queue, 1)
+            ]
+        stage_queues += [('embed', self.embed_queue), ('store', self.store_queue)]
+
+        start_time = time.perf_counter()
+        monitor = asyncio.create_task(self._monitor(stage_queues))
+        try:
+            await asyncio.gather(
+                *read_and_chunk,
+                self._run_stage(self._batch_chunks(), 1, self.batch_queue, config.embed_concurrency),
+                self._run_stage(self._embed_worker, config.embed_concurrency, self.store_queue,
+                                config.store_concurrency),
+                self._run_stage(self._store_worker, config.store_concurrency, None, 0)
+            )
+        finally:
+            monitor.cancel()
+            if self.parallel_chunker:
+                self.parallel_chunker.close()
+
+        await self._delete_removed_files(directory, recursive)
+
+        # Files above the stream threshold are chunked while read, one at a time
+        for file_path in self.large_files:
+            try:
+                file_results = await self.pipeline.ingest_file(str(file_path))
+                self._count_file(file_path, file_results['chunk_count'], file_results['embeddings_count'])
+            except Exception as e:
+                logger.error(f"Failed to process {file_path}: {str(e)}")
+                self.results['failed_files'].append(str(file_path))
+
+        self.results['processing_time'] = time.perf_counter() - start_time
+        self.results['stages'] = {name: stats.to_dict() for name, stats in self.stages.items()}
+        return self.results
+
+    async def _run_stage(self, worker, concurrency: int, output: Optional[asyncio.Queue], consumers: int):
+        """
+        Run a stage's workers, then signal end of input to the next stage
+
+        worker is either a coroutine (a single producer) or a coroutine
+        function started concurrency times.
+        """
+        if asyncio.iscoroutine(worker):
+            await worker
+        else:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        if output is not None:
+            for _ in range(consumers):
+                await output.put(None)
+
+    async def _monitor(self, stage_queues: List[Tuple[str, asyncio.Queue]]):
+        """Sample queue depths and periodically log progress"""
+        last_report = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.1)
+            for name, queue in stage_queues:
+                self.stages[name].sample(queue.qsize())
+
+            interval = self.config.report_interval
+            if interval and time.perf_counter() - last_report >= interval:
+                last_report = time.perf_counter()
+                logger.info("Pipeline: " + " | ".join(
+                    f"{name} {self.stages[name].items} {self.stages[name].unit} q={queue.qsize()}/{queue.maxsize}"
+                    for name, queue in stage_queues
+                ))
+
+    async def _discover(self, directory: Path, recursive: bool):
+        """Walk the directory one listing at a time, queueing new and modified files"""
+        extensions = tuple(self.pipeline.supported_extensions)
+        stats = self.stages['discover']
+        walker = os.walk(directory, onerror=lambda error: self.unreadable.append(Path(error.filename)))
+
+        while True:
+            started = time.perf_counter()
+            listing = await asyncio.to_thread(_scan_next, walker, extensions, recursive)
+            if listing is None:
+                break
+            root, found = listing
+
+            for name, size, mtime_ns, error in found:
+                file_path = Path(root) / name
+                self.seen.add(str(file_path))
+                if error is not None:
+                    self._fail(file_path, error)
+                    continue
+
+                record = self.manifest.get(str(file_path))
+                if (self.pipeline.incremental and record
+                        and record.get('file_size') == size and record.get('mtime_ns') == mtime_ns):
+                    self.results['skipped_files'] += 1
+                    continue
+
+                if self.pipeline.stream_threshold and size > self.pipeline.stream_threshold:
+                    self.large_files.append(file_path)
+                else:
+                    await self.read_queue.put((file_path, {'file_size': size, 'mtime_ns': mtime_ns}))
+            stats.record(started, len(found))
+
+        logger.info(f"Found {stats.items} files, {self.results['skipped_files']} unchanged since the last run")
+
+    async def _read_worker(self):
+        """Read and hash files off the event loop, within the read-ahead budget"""
+        stats = self.stages['read']
+        while (item := await self.read_queue.get()) is not None:
+            file_path, file_info = item
+            size = file_info['file_size']
+            await self.budget.acquire(size)
+            started = time.perf_counter()
+            try:
+                content, file_info['content_hash'] = await asyncio.to_thread(read_text_and_hash, str(file_path))
+            except Exception as e:
+                await self.budget.release(size)
+                self._fail(file_path, e)
+                continue
+            stats.record(started, 1, size)
+
+            if self._stored_hash(file_path) == file_info['content_hash']:
+                await self.budget.release(size)
+                del content
+                await self._record_unchanged(file_path, file_info)
+                continue
+
+            await self.chunk_queue.put((file_path, file_info, content))
+
+    async def _chunk_worker(self):
+        """Chunk files read by the read stage and look up stored chunk ids"""
+        stats = self.stages['chunk']
+        pipeline = self.pipeline
+        while (item := await self.chunk_queue.get()) is not None:
+            file_path, file_info, content = item
+            size = file_info['file_size']
+            started = time.perf_counter()
+            try:
+                content_type, language = self._content_type(file_path)
+                chunks = await asyncio.to_thread(chunk_text, pipeline.chunker, content, str(file_path),
+                                                 content_type, language)
+            except Exception as e:
+                self._fail(file_path, e)
+                continue
+            finally:
+                del content
+                await self.budget.release(size)
+            stats.record(started, 1)
+
+            await self._queue_file(file_path, content_type, file_info, chunks)
+
+    async def _pool_chunk_worker(self):
+        """
+        Send batches of discovered files to the chunk pool
+
+        A batch takes whatever files are already queued, up to the pool's
+        batch_bytes and max_batch_files; the read-ahead budget is charged
+        with their sizes from stat while the batch is out, since workers
+        read the files themselves. Only paths go to the pool, and compact
+        records come back.
+        """
+        read_stats, chunk_stats = self.stages['read'], self.stages['chunk']
+        chunker = self.parallel_chunker
+        done = False
+        while not done and (item := await self.read_queue.get()) is not None:
+            batch, size = [item], item[1]['file_size']
+            while len(batch) < chunker.max_batch_files and size < chunker.batch_bytes:
+                try:
+                    item = self.read_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+                size += item[1]['file_size']
+
+            tasks = []
+            for file_path, _ in batch:
+                content_type, language = self._content_type(file_path)
+                tasks.append((str(file_path), content_type, language, self._stored_hash(file_path)))
+
+            await self.budget.acquire(size)
+            started = time.perf_counter()
+            try:
+                results = await chunker.chunk_batch(tasks)
+            except Exception as e:
+                for file_path, _ in batch:
+                    self._fail(file_path, e)
+                continue
+            finally:
+                await self.budget.release(size)
+            read_stats.record(started, len(batch), size)
+            chunk_stats.record(started, len(batch))
+
+            for (file_path, file_info), chunked in zip(batch, results):
+                if chunked.error:
+                    self._fail(file_path, RuntimeError(chunked.error))
+                    continue
+                file_info['content_hash'] = chunked.content_hash
+                if chunked.unchanged:
+                    await self._record_unchanged(file_path, file_info)
+                    continue
+                await self._queue_file(file_path, chunked.content_type, file_info, chunked.to_chunks())
+
+    def _content_type(self, file_path: Path) -> Tuple[str, Optional[str]]:
+        """(content type, programming language or None) of a file"""
+        pipeline = self.pipeline
+        content_type = pipeline.supported_extensions.get(file_path.suffix.lower(), 'text')
+        language = pipeline._detect_programming_language(file_path.suffix) if content_type == 'code' else None
+        return content_type, language
+
+    def _stored_hash(self, file_path: Path) -> Optional[str]:
+        """Content hash recorded for a file by an earlier run, if runs are incremental"""
+        if not self.pipeline.incremental:
+            return None
+        return self.manifest.get(str(file_path), {}).get('content_hash')
+
+    async def _record_unchanged(self, file_path: Path, file_info: Dict[str, Any]):
+        """Touched but unchanged: remember the new mtime so the next run skips it unread"""
+        record = self.manifest[str(file_path)]
+        content_type, _ = self._content_type(file_path)
+        try:
+            await self.pipeline._record_document(str(file_path), content_type, record.get('chunk_count', 0),
+                                                 file_info)
+        except Exception as e:
+            self._fail(file_path, e)
+            return
+        self.results['skipped_files'] += 1
+
+    async def _queue_file(self, file_path: Path, content_type: str, file_info: Dict[str, Any],
+                          chunks: List[Dict[str, Any]]):
+        """Look up a chunked file's stored chunk ids and pass its new chunks on to embedding"""
+        pipeline = self.pipeline
+        try:
+            if not chunks:
+                await pipeline._ingest_chunks(str(file_path), content_type, [], file_info)
+                self._count_file(file_path, 0, 0)
+                return
+
+            # Stored chunks whose ids the new chunking reproduces keep their embeddings:
+            # all unchanged chunks with content-defined ids, but with the default
+            # positional ids only those before the first edit. A new file has none
+            if pipeline.chunker.content_defined or str(file_path) in self.manifest:
+                existing = await pipeline.vector_store.get_chunk_ids(str(file_path))
+            else:
+                existing = {}
+        except Exception as e:
+            self._fail(file_path, e)
+            return
+
+        new_chunks = [chunk for chunk in chunks if chunk['id'] not in existing]
+        await self.embed_queue.put(_FileState(
+            file_path=str(file_path),
+            content_type=content_type,
+            file_info=file_info,
+            chunk_count=len(chunks),
+            existing=existing,
+            chunk_ids={chunk['id'] for chunk in chunks},
+            new_chunks=new_chunks,
+            reused_chunks=[chunk for chunk in chunks if chunk['id'] in existing],
+            remaining=len(new_chunks)
+        ))
+
+    async def _batch_chunks(self):
+        """Pack new chunks from consecutive files into embed batches"""
+        batch_size = self.config.embed_batch_size
+        batch = _Batch()
+
+        while True:
+            try:
+                if batch.entries or batch.files:
+                    state = await asyncio.wait_for(self.embed_queue.get(), self.config.batch_timeout)
+                else:
+                    state = await self.embed_queue.get()
+            except asyncio.TimeoutError:
+                # Upstream is slow; send what there is rather than hold it
+                await self.batch_queue.put(batch)
+                batch = _Batch()
+                continue
+            if state is None:
+                break
+
+            batch.files.append(state)
+            for chunk in state.new_chunks:
+                batch.entries.append((state, chunk))
+                if len(batch.entries) >= batch_size:
+                    await self.batch_queue.put(batch)
+                    batch = _Batch()
+            state.new_chunks = []
+
+        if batch.entries or batch.files:
+            await self.batch_queue.put(batch)
+
+    async def _embed_worker(self):
+        """Embed each batch as one matrix"""
+        stats = self.stages['embed']
+        while (batch := await self.batch_queue.get()) is not None:
+            embeddings = None
+            if batch.entries:
+                started = time.perf_counter()
+                try:
+                    embeddings = await self.pipeline.embedding_generator.encode_matrix(
+                        [chunk['content'] for _, chunk in batch.entries])
+                    stats.record(started, len(batch.entries))
+                except Exception as e:
+                    # Only files with chunks in this call fail; the rest still need storing
+                    self._fail_files({id(state): state for state, _ in batch.entries}.values(), e)
+                    batch = _Batch(files=[state for state in batch.files if not state.finished])
+                    if not batch.files:
+                        continue
+            await self.store_queue.put((batch, embeddings))
+
+    async def _store_worker(self):
+        """Store batches, then finish files whose chunks are all stored"""
+        stats = self.stages['store']
+        vector_store = self.pipeline.vector_store
+        while (item := await self.store_queue.get()) is not None:
+            batch, embeddings = item
+            started = time.perf_counter()
+            try:
+                for state in batch.files:
+                    if state.reused_chunks:
+                        updated = await vector_store.update_chunk_positions(
+                            state.file_path,
+                            [chunk['id'] for chunk in state.reused_chunks],
+                            [chunk['chunk_index'] for chunk in state.reused_chunks],
+                            [chunk['metadata'] for chunk in state.reused_chunks]
+                        )
+                        if not updated:
+                            raise RuntimeError(f"Failed to update chunk positions for: {state.file_path}")
+                    state.reused_stored = True
+
+                if batch.entries:
+                    chunks = [chunk for _, chunk in batch.entries]
+                    stored = await vector_store.add_embeddings(
+                        embeddings,
+                        ids=[chunk['id'] for chunk in chunks],
+                        contents=[chunk['content'] for chunk in chunks],
+                        metadata=[chunk['metadata'] for chunk in chunks],
+                        source_files=[chunk['source_file'] for chunk in chunks],
+                        chunk_indices=[chunk['chunk_index'] for chunk in chunks],
+                        content_types=[chunk['content_type'] for chunk in chunks]
+                    )
+                    if not stored:
+                        raise RuntimeError("Failed to store embeddings for: " +
+                                           ", ".join(sorted({state.file_path for state, _ in batch.entries})))
+                    for state, _ in batch.entries:
+                        state.embedded += 1
+                        state.remaining -= 1
+                    stats.record(started, len(chunks))
+            except Exception as e:
+                self._fail_files(self._batch_files(batch), e)
+                continue
+
+            for state in self._batch_files(batch):
+                if state.remaining == 0 and state.reused_stored:
+                    await self._finish_file(state)
+
+    async def _finish_file(self, state: _FileState):
+        """Delete stale chunks and record the document once all chunks are stored"""
+        if state.finished:
+            return
+        state.finished = True
+        try:
+            await self.pipeline._delete_stale_chunks(state.file_path, state.existing, state.chunk_ids)
+            await self.pipeline._record_document(state.file_path, state.content_type, state.chunk_count,
+                                                 state.file_info)
+        except Exception as e:
+            self._fail(Path(state.file_path), e)
+            return
+        self._count_file(Path(state.file_path), state.chunk_count, state.embedded)
+
+    async def _delete_removed_files(self, directory: Path, recursive: bool):
+        """Delete the chunks of recorded files under directory that no longer exist"""
+        extensions = tuple(self.pipeline.supported_extensions)
+        candidates = []
+        for file_path in self.manifest:
+            path = Path(file_path)
+            if file_path in self.seen or not file_path.endswith(extensions) or not path.is_relative_to(directory):
+                continue
+            if not recursive and path.parent != directory:
+                continue
+            # Files under a directory that could not be listed were not seen, not removed
+            if any(path.is_relative_to(unreadable) for unreadable in self.unreadable):
+                continue
+            candidates.append(file_path)
+
+        exists = await asyncio.to_thread(lambda: [os.path.exists(file_path) for file_path in candidates])
+        for file_path, still_exists in zip(candidates, exists):
+            if still_exists:
+                continue
+            if await self.pipeline.vector_store.delete_document(file_path):
+                self.results['deleted_files'] += 1
+            else:
+                self._fail(Path(file_path), RuntimeError("Failed to delete removed document"))
+
+        if self.results['deleted_files']:
+            logger.info(f"Deleted {self.results['deleted_files']} documents no longer on disk")
+
+    def _batch_files(self, batch: _Batch) -> List[_FileState]:
+        """Distinct files with chunks in a batch"""
+        states = {id(state): state for state in batch.files}
+        states.update((id(state), state) for state, _ in batch.entries)
+        return list(states.values())
+
+    def _fail_files(self, states, error: Exception):
+        """Fail files whose chunks could not be embedded or stored"""
+        for state in states:
+            state.reused_stored = True
+            state.remaining = 0
+            if not state.finished:
+                state.finished = True
+                self._fail(Path(state.file_path), error)
+
+    def _fail(self, file_path: Path, error: Exception):
+        """Record a failed file"""
+        logger.error(f"Failed to process {file_path}: {str(error)}")
+        self.results['failed_files'].append(str(file_path))
+
+    def _count_file(self, file_path: Path, chunk_count: int, embeddings_count: int):
+        """Add one finished file to the totals"""
+        self.results['processed_files'] += 1
+        self.results['total_chunks'] += chunk_count
+        self.results['embedded_chunks'] += embeddings_count
+
+        logger.info(f"Processed {file_path.name}: {chunk_count} chunks")
@@ -96,30 +96,40 @@ class PatternRecognitionEngine:
         
         features = []
         
-        for task in tasks:
+        described = [task for task in tasks if 'task_description' in task]
+        if len(described) < len(tasks):
+            logger.warning(f"Skipping {len(tasks) - len(described)} tasks without a description")
+        if not described:
+            return features
+        
+        # Embed all task descriptions in one call
+        task_embeddings = await self.embedding_generator.generate_embeddings(
+            [task['task_description'] for task in described]
+        )
+        if len(task_embeddings) != len(described):
+            logger.warning("Failed to generate task embeddings")
+            return features
+        
+        for task, task_embedding in zip(described, task_embeddings):
             try:
-                # Generate embedding for task description
-                task_embedding = await self.embedding_generator.generate_embeddings([task['task_description']])
+                feature_vector = {
+                    'task_id': task.get('id'),
+                    'embedding': task_embedding['embedding'],
+                    'task_type': task.get('task_type', 'unknown'),
+                    'success': task.get('success', False),
+                    'execution_time': task.get('execution_time', 0),
+                    'agent_used': task.get('agent_used', 'unknown'),
+                    'context_size': len(str(task.get('context_used', {}))),
+                    'outcome_length': len(task.get('outcome', '')),
+                    'timestamp': task.get('created_at', datetime.now())
+                }
+                
+                # Extract linguistic features
+                linguistic_features = self._extract_linguistic_features(task['task_description'])
+                feature_vector.update(linguistic_features)
+                
+                features.append(feature_vector)
                 
-                if task_embedding:
-                    feature_vector = {
-                        'task_id': task.get('id'),
-                        'embedding': task_embedding[0]['embedding'],
-                        'task_type': task.get('task_type', 'unknown'),
-                        'success': task.get('success', False),
-                        'execution_time': task.get('execution_time', 0),
-                        'agent_used': task.get('agent_used', 'unknown'),
-                        'context_size': len(str(task.get('context_used', {}))),
-                        'outcome_length': len(task.get('outcome', '')),
-                        'timestamp': task.get('created_at', datetime.now())
-                    }
-                    
-                    # Extract linguistic features
-                    linguistic_features = self._extract_linguistic_features(task['task_description'])
-                    feature_vector.update(linguistic_features)
-                    
-                    features.append(feature_vector)
-                    
             except Exception as e:
                 logger.warning(f"Error extracting features for task {task.get('id')}: {str(e)}")
                 continue
@@ -304,15 +314,19 @@ class PatternRecognitionEngine:
         """Store identified patterns in the database"""
         
         try:
-            for pattern in patterns:
-                # Generate embedding for pattern description
-                pattern_embedding = await self.embedding_generator.generate_embeddings([pattern.description])
-                
-                if pattern_embedding and hasattr(self.vector_store, 'add_context_pattern'):
+            # Embed all pattern descriptions in one call
+            pattern_embeddings = []
+            if patterns and hasattr(self.vector_store, 'add_context_pattern'):
+                pattern_embeddings = await self.embedding_generator.generate_embeddings(
+                    [pattern.description for pattern in patterns]
+                )
+            
+            for i, pattern in enumerate(patterns):
+                if len(pattern_embeddings) == len(patterns):
                     await self.vector_store.add_context_pattern(
                         pattern_name=pattern.pattern_id,
                         pattern_type=pattern.pattern_type,
-                        embedding=pattern_embedding[0]['embedding'],
+                        embedding=pattern_embeddings[i]['embedding'],
                         metadata=asdict(pattern)
                     )
                 
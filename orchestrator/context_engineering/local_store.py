@@ -0,0 +1,1035 @@
+"""
+Local Vector Store
+==================
+
+Embedded vector store with the same async API as PgVectorStore, for tests,
+CI and small deployments that should not need a pgvector server.
+
+Embeddings live in a memory-mapped float32 matrix (unit-normalized, one row
+per slot) and everything else in a SQLite sidecar that is loaded into
+columnar in-memory arrays at startup. Search is a vectorized brute-force
+scan, optionally narrowed by an IVF (inverted file) partitioning of the
+matrix into k-means lists.
+
+SQLite calls run in worker threads, one at a time. Writes commit to the
+sidecar before the in-memory arrays change, and upserted vectors go to
+unused slots, so a failed write leaves memory matching what is on disk.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import operator
+import os
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from .vector_store import VectorSearchResult
+from .snapshot import SnapshotWriter, SnapshotReader, TEXT_COLUMNS
+from .pg_binary import serialize_metadata, embedding_columns_from_dicts
+from .similarity import top_k_indices, cosine_top_k
+
+logger = logging.getLogger(__name__)
+
+_VECTOR_FILE = 'vectors.f32'
+_SIDECAR_FILE = 'metadata.sqlite'
+
+# Comparison operators accepted in metadata range filters (as in PgVectorStore)
+_RANGE_OPERATORS = {'$gt': operator.gt, '$gte': operator.ge, '$lt': operator.lt, '$lte': operator.le}
+
+_TOKEN_PATTERN = re.compile(r'\w\w+')
+
+def _tokenize(text: str) -> Set[str]:
+    """Lower-cased word tokens used by the text half of hybrid search"""
+    return set(_TOKEN_PATTERN.findall((text or '').lower()))
+
+def _json_contains(value: Any, pattern: Any) -> bool:
+    """JSONB ``@>`` semantics for decoded JSON values"""
+    if isinstance(pattern, dict):
+        return isinstance(value, dict) and all(
+            key in value and _json_contains(value[key], item) for key, item in pattern.items()
+        )
+    if isinstance(pattern, list):
+        return isinstance(value, list) and all(
+            any(_json_contains(element, item) for element in value) for item in pattern
+        )
+    if isinstance(value, list):
+        return any(_json_contains(element, pattern) for element in value)
+    return value == pattern and isinstance(value, bool) == isinstance(pattern, bool)
+
+def _metadata_matches(metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Evaluate PgVectorStore-style metadata filters against one metadata dict"""
+    for key, condition in filters.items():
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+
+        unsupported = set(condition) - set(_RANGE_OPERATORS) - {'$eq', '$in', '$exists'}
+        if unsupported:
+            raise ValueError(f"Unsupported metadata filter operators for '{key}': {sorted(unsupported)}")
+
+        if '$eq' in condition and not _json_contains(metadata, {key: condition['$eq']}):
+            return False
+        if '$in' in condition and not any(_json_contains(metadata, {key: item}) for item in condition['$in']):
+            return False
+        if '$exists' in condition and (key in metadata) != bool(condition['$exists']):
+            return False
+
+        for name, compare in _RANGE_OPERATORS.items():
+            if name not in condition:
+                continue
+            bound = condition[name]
+            value = metadata.get(key)
+            if isinstance(bound, (int, float)) and not isinstance(bound, bool):
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    return False
+                if not compare(float(value), float(bound)):
+                    return False
+            else:
+                if value is None:
+                    return False
+                text = value if isinstance(value, str) else json.dumps(value)
+                if not compare(text, str(bound)):
+                    return False
+
+    return True
+
+class LocalVectorStore:
+    """Memory-mapped NumPy vector store implementing the PgVectorStore API"""
+
+    # Per-slot columns kept in memory (mirrors the embeddings table)
+    _columns = ('id', 'content', 'metadata', 'source_file', 'content_type', 'namespace')
+
+    def __init__(self, path: str = None, ivf_lists: int = 0, ivf_probes: int = 8,
+                 ivf_min_rows: int = 20000, bulk_load_threshold: int = 500):
+        self.path = Path(path or os.getenv('LOCAL_VECTOR_STORE_PATH', '.vector_store'))
+        self.ivf_lists = ivf_lists  # Number of IVF lists (0 disables IVF)
+        self.ivf_probes = ivf_probes  # Lists scanned per query
+        self.ivf_min_rows = ivf_min_rows  # Brute force below this many rows
+        self.bulk_load_threshold = bulk_load_threshold  # Kept for API compatibility
+        self.table_name = 'document_embeddings'
+        self.dimension = None
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._vectors: Optional[np.memmap] = None
+        self._capacity = 0
+        self._n_slots = 0  # High-water mark of used slots
+        self._live = np.zeros(0, dtype=bool)
+        self._chunk_index = np.zeros(0, dtype=np.int64)
+        self._data: Dict[str, np.ndarray] = {name: np.empty(0, dtype=object) for name in self._columns}
+        self._slot_by_id: Dict[str, int] = {}
+        self._free_slots: List[int] = []
+        self._token_index: Dict[str, Set[int]] = defaultdict(set)
+
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+
+        self._patterns: Dict[str, Dict[str, Any]] = {}
+
+        self._db_lock = asyncio.Lock()  # One sidecar call at a time
+        self._write_lock = asyncio.Lock()  # Writes plan, commit and publish as one step
+
+    async def initialize(self, dimension: int = 384):
+        """Open (or create) the store directory and load it into memory"""
+        self.dimension = dimension
+        await asyncio.to_thread(self._open)
+
+        if self.ivf_lists and self._live.sum() >= self.ivf_min_rows:
+            self.build_ivf()
+
+        logger.info(f"Initialized LocalVectorStore at {self.path} with {len(self._slot_by_id)} embeddings")
+
+    def _open(self):
+        """Open the sidecar and load the store (in a worker thread)"""
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._db = sqlite3.connect(str(self.path / _SIDECAR_FILE), check_same_thread=False)
+        self._create_tables()
+
+        stored_dimension = self._db.execute(
+            "SELECT value FROM settings WHERE key = 'dimension'"
+        ).fetchone()
+        if stored_dimension is None:
+            self._db.execute("INSERT INTO settings (key, value) VALUES ('dimension', ?)", (str(self.dimension),))
+            self._db.commit()
+        elif int(stored_dimension[0]) != self.dimension:
+            raise ValueError(f"Store at {self.path} has dimension {stored_dimension[0]}, not {self.dimension}")
+
+        self._load()
+
+    async def _run_db(self, fn, *args):
+        """Run a sidecar call in a worker thread, one at a time"""
+        async with self._db_lock:
+            return await asyncio.to_thread(fn, *args)
+
+    def _create_tables(self):
+        """Create the sidecar tables"""
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                slot INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT DEFAULT '{}',
+                source_file TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                content_type TEXT DEFAULT 'text',
+                namespace TEXT DEFAULT 'default'
+            );
+            CREATE INDEX IF NOT EXISTS chunks_source_file_idx ON chunks (source_file);
+            CREATE TABLE IF NOT EXISTS documents (
+                file_path TEXT PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                file_size INTEGER,
+                processed_at TEXT,
+                chunk_count INTEGER DEFAULT 0,
+                metadata TEXT DEFAULT '{}'
+            );
+            CREATE TABLE IF NOT EXISTS context_patterns (
+                pattern_name TEXT PRIMARY KEY,
+                pattern_type TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                success_count INTEGER DEFAULT 0,
+                usage_count INTEGER DEFAULT 0,
+                metadata TEXT DEFAULT '{}'
+            );
+            CREATE TABLE IF NOT EXISTS historical_tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_description TEXT NOT NULL,
+                task_type TEXT,
+                context_used TEXT DEFAULT '{}',
+                success INTEGER DEFAULT 0,
+                execution_time REAL,
+                agent_used TEXT,
+                created_at TEXT
+            );
+        """)
+        self._db.commit()
+
+    def _load(self):
+        """Load the sidecar into columnar arrays and map the vector file"""
+        rows = self._db.execute("""
+            SELECT slot, id, content, metadata, source_file, chunk_index, content_type, namespace
+            FROM chunks ORDER BY slot
+        """).fetchall()
+
+        n_slots = rows[-1][0] + 1 if rows else 0
+        vector_path = self.path / _VECTOR_FILE
+        existing_rows = os.path.getsize(vector_path) // (self.dimension * 4) if vector_path.exists() else 0
+        if existing_rows < n_slots:
+            raise ValueError(f"{vector_path} holds {existing_rows} vectors but the sidecar references {n_slots}")
+
+        self._ensure_capacity(max(n_slots, existing_rows))
+        self._n_slots = n_slots
+
+        for slot, chunk_id, content, metadata, source_file, chunk_index, content_type, namespace in rows:
+            self._set_row(slot, chunk_id, content, json.loads(metadata or '{}'),
+                          source_file, chunk_index, content_type, namespace)
+
+        self._free_slots = [int(slot) for slot in np.flatnonzero(~self._live[:n_slots])][::-1]
+
+        for pattern_name, pattern_type, embedding, success_count, usage_count, metadata in self._db.execute(
+            "SELECT pattern_name, pattern_type, embedding, success_count, usage_count, metadata FROM context_patterns"
+        ):
+            self._patterns[pattern_name] = {
+                'pattern_type': pattern_type,
+                'embedding': np.frombuffer(embedding, dtype=np.float32),
+                'success_count': success_count,
+                'usage_count': usage_count,
+                'metadata': json.loads(metadata or '{}')
+            }
+
+    def _ensure_capacity(self, rows: int):
+        """Grow the vector file and per-slot arrays to hold at least rows slots"""
+        if rows <= self._capacity:
+            return
+
+        new_capacity = max(rows, self._capacity * 2, 1024)
+        vector_path = self.path / _VECTOR_FILE
+
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+
+        with open(vector_path, 'ab') as f:
+            f.truncate(new_capacity * self.dimension * 4)
+        self._vectors = np.memmap(vector_path, dtype=np.float32, mode='r+',
+                                  shape=(new_capacity, self.dimension))
+
+        grow = new_capacity - self._capacity
+        self._live = np.concatenate([self._live, np.zeros(grow, dtype=bool)])
+        self._chunk_index = np.concatenate([self._chunk_index, np.zeros(grow, dtype=np.int64)])
+        self._assignments = np.concatenate([self._assignments, np.full(grow, -1, dtype=np.int32)])
+        for name in self._columns:
+            self._data[name] = np.concatenate([self._data[name], np.empty(grow, dtype=object)])
+
+        self._capacity = new_capacity
+
+    def _set_row(self, slot: int, chunk_id: str, content: str, metadata: Dict[str, Any],
+                 source_file: str, chunk_index: int, content_type: str, namespace: str):
+        """Fill the in-memory columns of a slot"""
+        if self._live[slot]:
+            self._unindex_text(slot)
+
+        self._data['id'][slot] = chunk_id
+        self._data['content'][slot] = content
+        self._data['metadata'][slot] = metadata
+        self._data['source_file'][slot] = source_file
+        self._data['content_type'][slot] = content_type or 'text'
+        self._data['namespace'][slot] = namespace or 'default'
+        self._chunk_index[slot] = chunk_index or 0
+        self._live[slot] = True
+        self._slot_by_id[chunk_id] = slot
+
+        for token in _tokenize(content):
+            self._token_index[token].add(slot)
+
+    def _unindex_text(self, slot: int):
+        """Remove a slot from the text index"""
+        for token in _tokenize(self._data['content'][slot]):
+            slots = self._token_index.get(token)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._token_index[token]
+
+    def _plan_slots(self, count: int) -> Tuple[List[int], List[int], int]:
+        """
+        Unused slots for count rows: (slots, free slots left, new high-water mark)
+
+        Freed slots are reused first. The vector file grows to fit, but no
+        in-memory state is changed until the caller publishes the plan.
+        """
+        free_slots = list(self._free_slots)
+        n_slots = self._n_slots
+        slots = []
+        for _ in range(count):
+            if free_slots:
+                slots.append(free_slots.pop())
+            else:
+                slots.append(n_slots)
+                n_slots += 1
+        self._ensure_capacity(n_slots)
+        return slots, free_slots, n_slots
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """Unit-normalize rows so cosine similarity is a dot product"""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    async def add_embeddings(self, embeddings: Union[List[Dict[str, Any]], np.ndarray],
+                           ids: List[str] = None,
+                           contents: List[str] = None,
+                           metadata: List[Any] = None,
+                           source_files: List[str] = None,
+                           chunk_indices: List[int] = None,
+                           content_types: List[str] = None,
+                           namespaces: List[str] = None) -> bool:
+        """
+        Add embeddings to the vector store
+
+        Same contract as PgVectorStore.add_embeddings: a list of embedding
+        dictionaries, or a matrix with the other fields given as columns.
+
+        Returns:
+            Success status
+        """
+        if len(embeddings) == 0:
+            return True
+
+        try:
+            if isinstance(embeddings, np.ndarray):
+                if ids is None or contents is None:
+                    logger.error("Adding an embedding matrix requires ids and contents")
+                    return False
+                columns = {
+                    'vectors': embeddings, 'ids': ids, 'contents': contents, 'metadata': metadata,
+                    'source_files': source_files, 'chunk_indices': chunk_indices,
+                    'content_types': content_types, 'namespaces': namespaces
+                }
+            else:
+                columns = embedding_columns_from_dicts(embeddings)
+
+            stats = await self.bulk_add_embeddings(**columns)
+            return stats['success']
+
+        except Exception as e:
+            logger.error(f"Error adding embeddings: {str(e)}")
+            return False
+
+    async def bulk_add_embeddings(self,
+                                vectors: np.ndarray,
+                                ids: List[str],
+                                contents: List[str],
+                                metadata: List[Any] = None,
+                                source_files: List[str] = None,
+                                chunk_indices: List[int] = None,
+                                content_types: List[str] = None,
+                                namespaces: List[str] = None,
+                                rows_per_chunk: int = 1000) -> Dict[str, Any]:
+        """
+        Upsert a batch of embeddings given as a matrix plus columns
+
+        Same contract as PgVectorStore.bulk_add_embeddings; the last
+        occurrence of a repeated id wins.
+        """
+        n_rows = len(ids)
+        stats = {'success': False, 'rows': n_rows, 'seconds': 0.0, 'rows_per_sec': 0.0}
+
+        if n_rows == 0:
+            stats['success'] = True
+            return stats
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape != (n_rows, self.dimension):
+            logger.error(f"Bulk load expects a ({n_rows}, {self.dimension}) matrix, got {vectors.shape}")
+            return stats
+
+        metadata = metadata if metadata is not None else [{}] * n_rows
+        source_files = source_files if source_files is not None else [''] * n_rows
+        chunk_indices = chunk_indices if chunk_indices is not None else [0] * n_rows
+        content_types = content_types if content_types is not None else ['text'] * n_rows
+        namespaces = namespaces if namespaces is not None else ['default'] * n_rows
+
+        start_time = time.perf_counter()
+
+        try:
+            async with self._write_lock:
+                # The last occurrence of a repeated id wins
+                rows = sorted({chunk_id: i for i, chunk_id in enumerate(ids)}.values())
+                slots, free_slots, n_slots = self._plan_slots(len(rows))
+
+                entries = []
+                for i, slot in zip(rows, slots):
+                    serialized = serialize_metadata(metadata[i])
+                    entries.append((int(slot), ids[i], contents[i] or '', serialized, source_files[i] or '',
+                                    int(chunk_indices[i] or 0), content_types[i] or 'text',
+                                    namespaces[i] or 'default'))
+
+                # Upserted ids move to fresh slots, so no live vector changes before the commit
+                normalized = self._normalize(vectors[rows])
+                self._vectors[slots] = normalized
+
+                def write():
+                    self._vectors.flush()
+                    with self._db:
+                        self._db.executemany("""
+                            INSERT OR REPLACE INTO chunks
+                            (slot, id, content, metadata, source_file, chunk_index, content_type, namespace)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """, entries)
+
+                await self._run_db(write)
+
+                self._free_slots, self._n_slots = free_slots, n_slots
+                for slot, chunk_id, content, serialized, source_file, chunk_index, content_type, namespace in entries:
+                    if chunk_id in self._slot_by_id:
+                        self._free_slot(self._slot_by_id[chunk_id])
+                    self._set_row(slot, chunk_id, content, json.loads(serialized),
+                                  source_file, chunk_index, content_type, namespace)
+                if self._centroids is not None:
+                    self._assignments[slots] = np.argmax(normalized @ self._centroids.T, axis=1)
+
+            if self.ivf_lists and self._centroids is None and len(self._slot_by_id) >= self.ivf_min_rows:
+                self.build_ivf()
+
+            elapsed = time.perf_counter() - start_time
+            stats.update({
+                'success': True,
+                'seconds': elapsed,
+                'rows_per_sec': n_rows / elapsed if elapsed > 0 else float(n_rows)
+            })
+            logger.info(f"Added {n_rows} embeddings to local vector store")
+
+        except Exception as e:
+            stats['seconds'] = time.perf_counter() - start_time
+            logger.error(f"Error adding embeddings: {str(e)}")
+
+        return stats
+
+    def build_ivf(self, n_lists: int = None, iterations: int = 10, sample_size: int = 50000, seed: int = 42):
+        """
+        Partition the stored vectors into IVF lists with spherical k-means
+
+        Centroids are trained on a sample and every live row is assigned to
+        its nearest centroid; rows added later are assigned on insert.
+        """
+        n_lists = n_lists or self.ivf_lists
+        live_slots = np.flatnonzero(self._live[:self._n_slots])
+        if n_lists <= 0 or len(live_slots) < n_lists:
+            return
+
+        start_time = time.perf_counter()
+        rng = np.random.default_rng(seed)
+        sample = self._vectors[rng.choice(live_slots, size=min(sample_size, len(live_slots)), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(n_lists):
+                members = sample[labels == list_id]
+                if len(members):
+                    centroids[list_id] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+
+        self._centroids = centroids.astype(np.float32)
+        self._assignments[:] = -1
+        for start in range(0, len(live_slots), 65536):
+            batch = live_slots[start:start + 65536]
+            self._assignments[batch] = np.argmax(self._vectors[batch] @ self._centroids.T, axis=1)
+
+        logger.info(f"Built IVF with {n_lists} lists over {len(live_slots)} vectors "
+                    f"in {time.perf_counter() - start_time:.1f}s")
+
+    def _candidate_mask(self, filters: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Live slots passing the column and metadata filters"""
+        mask = self._live[:self._n_slots].copy()
+        if not filters:
+            return mask
+
+        for column in ('content_type', 'source_file', 'namespace'):
+            if column not in filters:
+                continue
+            value = filters[column]
+            values = self._data[column][:self._n_slots]
+            if isinstance(value, (list, tuple, set)):
+                mask &= np.isin(values, list(value))
+            else:
+                mask &= values == value
+
+        metadata_filters = filters.get('metadata')
+        if metadata_filters:
+            for slot in np.flatnonzero(mask):
+                if not _metadata_matches(self._data['metadata'][slot], metadata_filters):
+                    mask[slot] = False
+
+        return mask
+
+    def _probe_mask(self, query: np.ndarray) -> Optional[np.ndarray]:
+        """Slots in the IVF lists nearest to a (normalized) query, or None without IVF"""
+        if self._centroids is None:
+            return None
+        probes = min(self.ivf_probes, len(self._centroids))
+        nearest_lists = np.argpartition(-(self._centroids @ query), probes - 1)[:probes]
+        return np.isin(self._assignments[:self._n_slots], nearest_lists)
+
+    def _top_k(self, scores: np.ndarray, candidates: np.ndarray, limit: int,
+               similarity_threshold: float) -> List[Tuple[int, float]]:
+        """Best (slot, score) pairs among candidate slots"""
+        if limit <= 0:
+            return []
+        candidates = candidates[scores[candidates] >= similarity_threshold]
+        ordered = candidates[top_k_indices(scores[candidates], limit)]
+        return [(int(slot), float(scores[slot])) for slot in ordered]
+
+    def _result(self, slot: int, score: float) -> VectorSearchResult:
+        """Build a search result for a slot"""
+        return VectorSearchResult(
+            id=self._data['id'][slot],
+            content=self._data['content'][slot],
+            metadata=self._data['metadata'][slot],
+            similarity_score=score,
+            source_file=self._data['source_file'][slot],
+            chunk_index=int(self._chunk_index[slot]),
+            content_type=self._data['content_type'][slot]
+        )
+
+    def _search(self, query: np.ndarray, mask: np.ndarray, limit: int,
+                similarity_threshold: float) -> List[Tuple[int, float]]:
+        """Top-k slots for one normalized query within mask"""
+        probe = self._probe_mask(query)
+        if probe is not None:
+            probed = np.flatnonzero(mask & probe)
+            # Fall back to the full scan when the probed lists are too sparse
+            if len(probed) >= limit:
+                scores = np.full(self._n_slots, -np.inf, dtype=np.float32)
+                scores[probed] = self._vectors[probed] @ query
+                hits = self._top_k(scores, probed, limit, similarity_threshold)
+                if len(hits) >= limit:
+                    return hits
+
+        candidates = np.flatnonzero(mask)
+        scores = np.full(self._n_slots, -np.inf, dtype=np.float32)
+        scores[candidates] = self._vectors[candidates] @ query
+        return self._top_k(scores, candidates, limit, similarity_threshold)
+
+    async def similarity_search(self,
+                              query_embedding: List[float],
+                              limit: int = 10,
+                              similarity_threshold: float = 0.0,
+                              filters: Dict[str, Any] = None,
+                              ef_search: int = None,
+                              recall_profile: str = None) -> List[VectorSearchResult]:
+        """
+        Perform similarity search
+
+        ``ef_search`` and ``recall_profile`` are accepted for API compatibility
+        and ignored; IVF recall is governed by ``ivf_probes``.
+        """
+        try:
+            query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+            hits = self._search(query, self._candidate_mask(filters), limit, similarity_threshold)
+            results = [self._result(slot, score) for slot, score in hits]
+
+            logger.info(f"Found {len(results)} similar documents")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in similarity search: {str(e)}")
+            return []
+
+    async def similarity_search_many(self,
+                                   query_embeddings: List[List[float]],
+                                   limit: int = 10,
+                                   similarity_threshold: float = 0.0,
+                                   filters: Dict[str, Any] = None,
+                                   ef_search: int = None,
+                                   recall_profile: str = None) -> List[List[VectorSearchResult]]:
+        """Perform several similarity searches, scoring all queries in one matrix product"""
+        if not len(query_embeddings):
+            return []
+
+        try:
+            queries = self._normalize(np.asarray(query_embeddings, dtype=np.float32))
+            mask = self._candidate_mask(filters)
+
+            if self._centroids is not None:
+                return [
+                    [self._result(slot, score) for slot, score in self._search(query, mask, limit, similarity_threshold)]
+                    for query in queries
+                ]
+
+            candidates = np.flatnonzero(mask)
+            block = self._vectors[candidates] @ queries.T
+            results = []
+            for column in range(len(queries)):
+                scores = np.full(self._n_slots, -np.inf, dtype=np.float32)
+                scores[candidates] = block[:, column]
+                hits = self._top_k(scores, candidates, limit, similarity_threshold)
+                results.append([self._result(slot, score) for slot, score in hits])
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in batched similarity search: {str(e)}")
+            return [[] for _ in query_embeddings]
+
+    def _text_ranking(self, query_text: str, limit: int, mask: np.ndarray) -> List[int]:
+        """Candidate slots ranked by the idf-weighted overlap of their tokens with the query"""
+        live_rows = max(len(self._slot_by_id), 1)
+        scores: Dict[int, float] = defaultdict(float)
+        for token in _tokenize(query_text):
+            slots = self._token_index.get(token)
+            if not slots:
+                continue
+            idf = math.log(1 + live_rows / len(slots))
+            for slot in slots:
+                if mask[slot]:
+                    scores[slot] += idf
+        return sorted(scores, key=lambda slot: (-scores[slot], slot))[:limit]
+
+    async def hybrid_search(self,
+                          query_embedding: List[float],
+                          query_text: str,
+                          limit: int = 10,
+                          vector_weight: float = 0.7,
+                          text_weight: float = 0.3,
+                          rrf_k: int = 60,
+                          candidate_pool: int = None,
+                          filters: Dict[str, Any] = None) -> List[VectorSearchResult]:
+        """
+        Hybrid search combining vector similarity and text search
+
+        Fuses the vector ranking and an inverted-index text ranking with the
+        same weighted reciprocal rank fusion and score normalization as
+        PgVectorStore.hybrid_search; filters restrict both rankings.
+        """
+        candidate_pool = candidate_pool or max(limit * 4, 20)
+
+        try:
+            query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+            mask = self._candidate_mask(filters)
+            vector_hits = [slot for slot, _ in self._search(query, mask, candidate_pool, -1.0)]
+            text_hits = self._text_ranking(query_text, candidate_pool, mask)
+
+            fused: Dict[int, float] = defaultdict(float)
+            for rank, slot in enumerate(vector_hits, start=1):
+                fused[slot] += vector_weight / (rrf_k + rank)
+            for rank, slot in enumerate(text_hits, start=1):
+                fused[slot] += text_weight / (rrf_k + rank)
+
+            best_score = (vector_weight + text_weight) / (rrf_k + 1)
+            ranked = sorted(fused, key=lambda slot: -fused[slot])[:limit]
+            return [self._result(slot, fused[slot] / best_score) for slot in ranked]
+
+        except Exception as e:
+            logger.error(f"Error in hybrid search: {str(e)}")
+            return await self.similarity_search(query_embedding, limit, filters=filters)
+
+    async def get_surrounding_chunks(self, source_file: str, chunk_index: int,
+                                   window_size: int, exclude_id: str = None) -> List[Dict[str, Any]]:
+        """Get the chunks of a document within window_size of chunk_index"""
+        n_slots = self._n_slots
+        mask = (self._live[:n_slots]
+                & (self._data['source_file'][:n_slots] == source_file)
+                & (self._chunk_index[:n_slots] >= max(0, chunk_index - window_size))
+                & (self._chunk_index[:n_slots] <= chunk_index + window_size))
+
+        slots = [slot for slot in np.flatnonzero(mask) if self._data['id'][slot] != exclude_id]
+        slots.sort(key=lambda slot: self._chunk_index[slot])
+        return [
+            {
+                'content': self._data['content'][slot],
+                'chunk_index': int(self._chunk_index[slot]),
+                'metadata': self._data['metadata'][slot]
+            }
+            for slot in slots
+        ]
+
+    async def add_document_record(self, file_path: str, metadata: Dict[str, Any] = None) -> int:
+        """Add a document record and return its ID"""
+        def write():
+            file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            with self._db:
+                self._db.execute("""
+                    INSERT INTO documents (file_path, file_name, file_size, processed_at, metadata)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (file_path) DO UPDATE SET
+                        file_size = excluded.file_size,
+                        processed_at = excluded.processed_at,
+                        metadata = excluded.metadata
+                """, (file_path, os.path.basename(file_path), file_size,
+                      datetime.now().isoformat(), json.dumps(metadata or {})))
+            return self._db.execute("SELECT rowid FROM documents WHERE file_path = ?", (file_path,)).fetchone()[0]
+
+        try:
+            return await self._run_db(write)
+
+        except Exception as e:
+            logger.error(f"Error adding document record: {str(e)}")
+            return None
+
+    async def update_document_chunk_count(self, file_path: str, chunk_count: int):
+        """Update the chunk count for a document"""
+        def write():
+            with self._db:
+                self._db.execute("UPDATE documents SET chunk_count = ? WHERE file_path = ?",
+                                 (chunk_count, file_path))
+
+        try:
+            await self._run_db(write)
+
+        except Exception as e:
+            logger.error(f"Error updating chunk count: {str(e)}")
+
+    async def get_document_manifest(self, path_prefix: str = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Recorded state of ingested documents, keyed by file path
+
+        Each entry holds the document metadata written at ingestion
+        (file_size, mtime_ns and content_hash among it) plus chunk_count.
+        path_prefix limits the result to paths starting with it.
+        """
+        def read():
+            return self._db.execute("""
+                SELECT file_path, file_size, chunk_count, metadata FROM documents
+                WHERE ? IS NULL OR substr(file_path, 1, length(?)) = ?
+            """, (path_prefix, path_prefix, path_prefix)).fetchall()
+
+        try:
+            rows = await self._run_db(read)
+            return {file_path: {'file_size': file_size, **json.loads(metadata or '{}'), 'chunk_count': chunk_count}
+                    for file_path, file_size, chunk_count, metadata in rows}
+
+        except Exception as e:
+            logger.error(f"Error getting document manifest: {str(e)}")
+            return {}
+
+    async def get_document_stats(self) -> Dict[str, Any]:
+        """Get statistics about stored documents"""
+        live = self._live[:self._n_slots]
+        content_types, counts = np.unique(
+            self._data['content_type'][:self._n_slots][live].astype(str), return_counts=True
+        )
+        order = np.argsort(-counts, kind='stable')
+        lengths = [len(content) for content in self._data['content'][:self._n_slots][live]]
+
+        return {
+            'total_chunks': int(live.sum()),
+            'total_documents': len(set(self._data['source_file'][:self._n_slots][live])),
+            'avg_chunk_length': float(np.mean(lengths)) if lengths else 0.0,
+            'content_types': len(content_types),
+            'content_type_distribution': {
+                str(content_types[i]): int(counts[i]) for i in order
+            }
+        }
+
+    async def get_index_stats(self) -> Dict[str, Any]:
+        """Get sizes of the vector matrix and IVF structures"""
+        return {
+            'storage_mode': 'local',
+            'vector_index': 'ivf' if self._centroids is not None else 'brute_force',
+            'rows': len(self._slot_by_id),
+            'capacity': self._capacity,
+            'vector_bytes': self._capacity * (self.dimension or 0) * 4,
+            'ivf_lists': 0 if self._centroids is None else len(self._centroids),
+            'ivf_probes': self.ivf_probes
+        }
+
+    def _free_slot(self, slot: int):
+        """Drop a slot's row and make the slot reusable"""
+        self._unindex_text(slot)
+        del self._slot_by_id[self._data['id'][slot]]
+        self._live[slot] = False
+        self._assignments[slot] = -1
+        for name in self._columns:
+            self._data[name][slot] = None
+        self._free_slots.append(int(slot))
+
+    async def get_chunk_ids(self, source_file: str) -> Dict[str, int]:
+        """Ids of a document's stored chunks, mapped to their chunk index"""
+        n_slots = self._n_slots
+        slots = np.flatnonzero(self._live[:n_slots] & (self._data['source_file'][:n_slots] == source_file))
+        return {self._data['id'][slot]: int(self._chunk_index[slot]) for slot in slots}
+
+    async def delete_chunks(self, source_file: str, ids: List[str]) -> bool:
+        """Delete specific chunks of a document"""
+        def write(slots):
+            with self._db:
+                self._db.executemany("DELETE FROM chunks WHERE slot = ?", [(int(slot),) for slot in slots])
+
+        try:
+            async with self._write_lock:
+                slots = [self._slot_by_id[chunk_id] for chunk_id in ids
+                         if chunk_id in self._slot_by_id
+                         and self._data['source_file'][self._slot_by_id[chunk_id]] == source_file]
+                await self._run_db(write, slots)
+                for slot in slots:
+                    self._free_slot(slot)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error deleting chunks: {str(e)}")
+            return False
+
+    async def update_chunk_positions(self, source_file: str, ids: List[str],
+                                   chunk_indices: List[int], metadata: List[Any]) -> bool:
+        """Update where stored chunks now sit in their document, keeping their embeddings"""
+        def write(records):
+            with self._db:
+                self._db.executemany("UPDATE chunks SET chunk_index = ?, metadata = ? WHERE slot = ?", records)
+
+        try:
+            async with self._write_lock:
+                records = []
+                for chunk_id, chunk_index, chunk_metadata in zip(ids, chunk_indices, metadata):
+                    slot = self._slot_by_id.get(chunk_id)
+                    if slot is None or self._data['source_file'][slot] != source_file:
+                        continue
+                    records.append((int(chunk_index), serialize_metadata(chunk_metadata), int(slot)))
+
+                await self._run_db(write, records)
+                for chunk_index, serialized, slot in records:
+                    self._chunk_index[slot] = chunk_index
+                    self._data['metadata'][slot] = json.loads(serialized)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error updating chunk positions: {str(e)}")
+            return False
+
+    async def delete_document(self, source_file: str) -> bool:
+        """Delete all chunks for a specific document"""
+        def write():
+            with self._db:
+                self._db.execute("DELETE FROM chunks WHERE source_file = ?", (source_file,))
+                self._db.execute("DELETE FROM documents WHERE file_path = ?", (source_file,))
+
+        try:
+            async with self._write_lock:
+                await self._run_db(write)
+                n_slots = self._n_slots
+                slots = np.flatnonzero(self._live[:n_slots] & (self._data['source_file'][:n_slots] == source_file))
+                for slot in slots:
+                    self._free_slot(slot)
+
+            logger.info(f"Deleted document: {source_file}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error deleting document: {str(e)}")
+            return False
+
+    async def add_context_pattern(self, pattern_name: str, pattern_type: str,
+                                embedding: List[float], metadata: Dict[str, Any] = None):
+        """Add a context pattern for learning"""
+        vector = self._normalize(np.asarray(embedding, dtype=np.float32))
+
+        def write():
+            with self._db:
+                self._db.execute("""
+                    INSERT INTO context_patterns (pattern_name, pattern_type, embedding, metadata)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (pattern_name) DO UPDATE SET
+                        embedding = excluded.embedding,
+                        metadata = excluded.metadata
+                """, (pattern_name, pattern_type, vector.tobytes(), json.dumps(metadata or {})))
+
+        try:
+            async with self._write_lock:
+                await self._run_db(write)
+                existing = self._patterns.get(pattern_name, {})
+                self._patterns[pattern_name] = {
+                    'pattern_type': existing.get('pattern_type', pattern_type),
+                    'embedding': vector,
+                    'success_count': existing.get('success_count', 0),
+                    'usage_count': existing.get('usage_count', 0),
+                    'metadata': metadata or {}
+                }
+
+        except Exception as e:
+            logger.error(f"Error adding context pattern: {str(e)}")
+
+    async def find_similar_patterns(self, query_embedding: List[float],
+                                  pattern_type: str = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """Find similar context patterns"""
+        try:
+            names = [name for name, pattern in self._patterns.items()
+                     if pattern_type is None or pattern['pattern_type'] == pattern_type]
+            if not names:
+                return []
+
+            query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+            order, scores = cosine_top_k(
+                query, np.stack([self._patterns[name]['embedding'] for name in names]), limit, normalized=True
+            )
+
+            return [
+                {
+                    'pattern_name': names[i],
+                    'pattern_type': self._patterns[names[i]]['pattern_type'],
+                    'metadata': self._patterns[names[i]]['metadata'],
+                    'success_count': self._patterns[names[i]]['success_count'],
+                    'usage_count': self._patterns[names[i]]['usage_count'],
+                    'similarity': float(score)
+                }
+                for i, score in zip(order, scores)
+            ]
+
+        except Exception as e:
+            logger.error(f"Error finding similar patterns: {str(e)}")
+            return []
+
+    async def record_task_outcome(self, task_description: str, task_type: str,
+                                context_used: Dict[str, Any], success: bool,
+                                execution_time: float = None, agent_used: str = None):
+        """Record task execution outcome for learning"""
+        def write():
+            with self._db:
+                self._db.execute("""
+                    INSERT INTO historical_tasks
+                    (task_description, task_type, context_used, success, execution_time, agent_used, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (task_description, task_type, json.dumps(context_used, default=str), int(success),
+                      execution_time, agent_used, datetime.now().isoformat()))
+
+        try:
+            await self._run_db(write)
+
+        except Exception as e:
+            logger.error(f"Error recording task outcome: {str(e)}")
+
+    async def export_snapshot(self, path: str, batch_size: int = 5000) -> Dict[str, Any]:
+        """Export all embeddings in the snapshot format shared with PgVectorStore"""
+        stats = {'success': False, 'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+        start_time = time.perf_counter()
+
+        try:
+            writer = SnapshotWriter(path, self.dimension, source={'store': 'local', 'path': str(self.path)})
+            live_slots = np.flatnonzero(self._live[:self._n_slots])
+            try:
+                for start in range(0, len(live_slots), batch_size):
+                    slots = live_slots[start:start + batch_size]
+                    columns = {name: list(self._data[name][slots]) for name in TEXT_COLUMNS}
+                    columns['metadata'] = [json.dumps(value, default=str) for value in columns['metadata']]
+                    columns['chunk_index'] = self._chunk_index[slots]
+                    writer.write_batch(self._vectors[slots], columns)
+            except Exception:
+                writer.close(complete=False)
+                raise
+
+            manifest = writer.close()
+            elapsed = time.perf_counter() - start_time
+            stats.update({
+                'success': True,
+                'rows': manifest['rows'],
+                'seconds': elapsed,
+                'rows_per_sec': manifest['rows'] / elapsed if elapsed > 0 else float(manifest['rows'])
+            })
+
+        except Exception as e:
+            stats['seconds'] = time.perf_counter() - start_time
+            logger.error(f"Error exporting snapshot: {str(e)}")
+
+        return stats
+
+    async def import_snapshot(self, path: str, batch_size: int = 50000) -> Dict[str, Any]:
+        """Load a snapshot written by either store"""
+        stats = {'success': False, 'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+        start_time = time.perf_counter()
+
+        try:
+            reader = SnapshotReader(path)
+            if reader.dimension != self.dimension:
+                raise ValueError(f"Snapshot dimension {reader.dimension} != store dimension {self.dimension}")
+
+            for vectors, columns in reader.iter_batches(batch_size):
+                batch_stats = await self.bulk_add_embeddings(
+                    vectors=vectors,
+                    ids=columns['id'],
+                    contents=columns['content'],
+                    metadata=columns['metadata'],
+                    source_files=columns['source_file'],
+                    chunk_indices=columns['chunk_index'],
+                    content_types=columns['content_type'],
+                    namespaces=columns['namespace']
+                )
+                if not batch_stats['success']:
+                    raise RuntimeError(f"Load failed after {stats['rows']} rows")
+                stats['rows'] += len(vectors)
+
+            elapsed = time.perf_counter() - start_time
+            stats.update({
+                'success': True,
+                'seconds': elapsed,
+                'rows_per_sec': stats['rows'] / elapsed if elapsed > 0 else float(stats['rows'])
+            })
+
+        except Exception as e:
+            stats['seconds'] = time.perf_counter() - start_time
+            logger.error(f"Error importing snapshot: {str(e)}")
+
+        return stats
+
+    async def wait_for_index_builds(self):
+        """No background index builds; kept for API compatibility"""
+        return None
+
+    async def close(self):
+        """Flush the vector file and close the sidecar"""
+        if self._vectors is not None:
+            self._vectors.flush()
+        if self._db is not None:
+            await self._run_db(self._db.close)
+            self._db = None
+            logger.info("Closed local vector store")
@@ -0,0 +1,221 @@
+"""
+ONNX Embedding Backend
+======================
+
+CPU inference of sentence-transformer models through ONNX Runtime.
+
+``export_onnx_model`` traces the model's transformer to an ONNX graph,
+optionally writes a dynamically quantized int8 copy, saves the tokenizer
+next to it and checks both against the PyTorch output (cosine similarity)
+before recording the result in ``export.json``. ``OnnxEmbeddingModel``
+loads such a directory and exposes the subset of the SentenceTransformer
+interface the embedding generator uses (``encode``, ``tokenizer``,
+``max_seq_length``, ``get_sentence_embedding_dimension``).
+
+``onnxruntime`` is needed to run exported models; exporting additionally
+needs ``torch`` and ``onnx``. Both are imported lazily.
+"""
+
+import inspect
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MANIFEST = "export.json"
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+
+# Mixed prose and code used by the parity check
+PARITY_TEXTS = [
+    "How do I configure the vector store for partitioned tables?",
+    "The orchestrator schedules agents and collects their results.",
+    "def chunk_document(content, source_file):\n    return splitter.split_text(content)",
+    "SELECT id, content FROM document_embeddings ORDER BY embedding <=> $1 LIMIT 10;",
+    "Retry the request with exponential backoff when the API returns 429.",
+    "short",
+    "A much longer passage that keeps going so that the tokenizer has to produce a sequence "
+    "several times longer than the other inputs, which exercises padding and attention masks "
+    "inside every batch that mixes it with the short examples above.",
+    "{\"agent\": \"reviewer\", \"skills\": [\"python\", \"sql\"], \"priority\": 2}"
+]
+
+def default_export_dir(model_name: str) -> Path:
+    """Export directory for a model under ONNX_MODEL_DIR (default .onnx_models)"""
+    return Path(os.getenv('ONNX_MODEL_DIR', '.onnx_models')) / model_name.replace('/', '__')
+
+def _pool(hidden: np.ndarray, attention_mask: np.ndarray, mode: str) -> np.ndarray:
+    """Pool token embeddings into sentence embeddings like sentence-transformers"""
+    if mode == 'cls':
+        return hidden[:, 0]
+    mask = attention_mask[..., None].astype(np.float32)
+    if mode == 'max':
+        return np.where(mask > 0, hidden, -1e9).max(axis=1)
+    return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+def _pooling_mode(module) -> str:
+    """Pooling mode of a sentence-transformers Pooling module, across library versions"""
+    if hasattr(module, 'get_pooling_mode_str'):
+        return module.get_pooling_mode_str()
+    return getattr(module, 'pooling_mode', 'mean')
+
+def _cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity of two matrices"""
+    a = a / np.clip(np.linalg.norm(a, axis=1, keepdims=True), 1e-12, None)
+    b = b / np.clip(np.linalg.norm(b, axis=1, keepdims=True), 1e-12, None)
+    return (a * b).sum(axis=1)
+
+class OnnxEmbeddingModel:
+    """Exported sentence-transformer run by ONNX Runtime on CPU"""
+
+    def __init__(self, model_dir: str, quantized: bool = True, intra_op_threads: int = 0):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.model_dir = Path(model_dir)
+        self.quantized = quantized
+        self.manifest = json.loads((self.model_dir / EXPORT_MANIFEST).read_text())
+
+        model_file = INT8_FILE if quantized else FP32_FILE
+        if not (self.model_dir / model_file).exists():
+            raise FileNotFoundError(f"{model_file} not found in {self.model_dir}")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = onnxruntime.InferenceSession(
+            str(self.model_dir / model_file), options, providers=['CPUExecutionProvider']
+        )
+
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+        self.max_seq_length = self.manifest['max_seq_length']
+        self.pooling = self.manifest['pooling']
+        self.input_names = self.manifest['input_names']
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.manifest['dimension']
+
+    def encode(self, sentences: List[str], batch_size: int = 32, normalize_embeddings: bool = False,
+               show_progress_bar: bool = False, convert_to_numpy: bool = True) -> np.ndarray:
+        """Encode sentences into an (n, dimension) float32 matrix"""
+        embeddings = np.empty((len(sentences), self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        for start in range(0, len(sentences), batch_size):
+            batch = list(sentences[start:start + batch_size])
+            features = self.tokenizer(batch, padding=True, truncation=True,
+                                      max_length=self.max_seq_length, return_tensors='np')
+            inputs = {name: features[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+            embeddings[start:start + len(batch)] = _pool(hidden, features['attention_mask'], self.pooling)
+
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+def check_parity(reference_model, onnx_model: OnnxEmbeddingModel,
+                 texts: List[str] = None) -> Dict[str, float]:
+    """Cosine similarity between reference (PyTorch) and ONNX embeddings of the same texts"""
+    texts = texts or PARITY_TEXTS
+    expected = reference_model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    actual = onnx_model.encode(texts)
+    cosines = _cosine_rows(np.asarray(expected, dtype=np.float32), actual)
+    return {'min_cosine': float(cosines.min()), 'mean_cosine': float(cosines.mean()), 'texts': len(texts)}
+
+def export_onnx_model(model_name: str, output_dir: str = None, quantize: bool = True,
+                      parity_check: bool = True, parity_threshold: float = 0.98,
+                      opset: int = 14) -> Dict[str, Any]:
+    """
+    Export a sentence-transformer model to ONNX (and int8) with parity checks
+
+    Args:
+        model_name: Sentence-transformer model name or path
+        output_dir: Export directory (default: default_export_dir(model_name))
+        quantize: Also write a dynamically quantized int8 graph
+        parity_check: Compare exported graphs with the PyTorch model
+        parity_threshold: Minimum cosine similarity a graph must reach
+        opset: ONNX opset version
+
+    Returns:
+        The export manifest, including parity results
+
+    Raises:
+        ValueError: if a graph misses the parity threshold
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir) if output_dir else default_export_dir(model_name)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    reference = SentenceTransformer(model_name, device='cpu')
+    transformer = reference[0]
+    pooling = _pooling_mode(reference[1]) if len(reference) > 1 else 'mean'
+    if pooling not in ('mean', 'cls', 'max'):
+        raise ValueError(f"Unsupported pooling mode for ONNX export: {pooling}")
+
+    dummy = transformer.tokenizer(["export the embedding model"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+
+    class _TokenEmbeddings(torch.nn.Module):
+        """Transformer body returning token embeddings for positional inputs"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)))[0]
+
+    axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names + ['token_embeddings']}
+    # Newer torch defaults to the dynamo exporter, which does not take dynamic_axes
+    exporter = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            _TokenEmbeddings(transformer.auto_model.eval()),
+            tuple(dummy[name] for name in input_names),
+            str(output_dir / FP32_FILE),
+            input_names=input_names,
+            output_names=['token_embeddings'],
+            dynamic_axes=axes,
+            opset_version=opset,
+            do_constant_folding=True,
+            **exporter
+        )
+    transformer.tokenizer.save_pretrained(str(output_dir))
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(str(output_dir / FP32_FILE), str(output_dir / INT8_FILE), weight_type=QuantType.QInt8)
+
+    manifest = {
+        'model_name': model_name,
+        'dimension': reference.get_sentence_embedding_dimension(),
+        'max_seq_length': reference.max_seq_length,
+        'pooling': pooling,
+        'input_names': input_names,
+        'opset': opset,
+        'graphs': {'fp32': FP32_FILE, **({'int8': INT8_FILE} if quantize else {})},
+        'parity': {}
+    }
+    (output_dir / EXPORT_MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+    if parity_check:
+        for variant in manifest['graphs']:
+            onnx_model = OnnxEmbeddingModel(str(output_dir), quantized=(variant == 'int8'))
+            manifest['parity'][variant] = check_parity(reference, onnx_model)
+            logger.info(f"ONNX {variant} parity for {model_name}: {manifest['parity'][variant]}")
+        (output_dir / EXPORT_MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+        failing = {variant: result['min_cosine'] for variant, result in manifest['parity'].items()
+                   if result['min_cosine'] < parity_threshold}
+        if failing:
+            raise ValueError(f"ONNX export of {model_name} below parity threshold {parity_threshold}: {failing}")
+
+    logger.info(f"Exported {model_name} to ONNX in {output_dir}")
+    return manifest
@@ -0,0 +1,242 @@
+"""
+OpenAI Embedding Dispatch
+=========================
+
+Concurrent, rate-limited dispatch of embedding batches to the OpenAI API.
+
+Texts are split into batches that a fixed number of workers send in
+parallel. Every request first takes its share of a requests-per-minute and
+a tokens-per-minute budget, so the client stays under the account limits
+instead of discovering them through 429s. Rate-limit, timeout, connection
+and server errors are retried with jittered exponential backoff (honouring
+``Retry-After``); a rate-limit response also pauses every worker. Batches
+that still fail are reported through ``EmbeddingBatchError`` rather than
+being replaced by placeholder vectors.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import openai
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying besides 5xx: timeout, lock conflict, rate limit
+_RETRY_STATUSES = {408, 409, 429}
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+class EmbeddingBatchError(Exception):
+    """
+    Some embedding batches failed after all retries
+
+    ``embeddings`` holds the rows that did succeed; rows where ``failed`` is
+    True carry no embedding and must not be used.
+    """
+
+    def __init__(self, message: str, embeddings: np.ndarray, failed: np.ndarray,
+                 errors: List[Tuple[int, int, str]]):
+        super().__init__(message)
+        self.embeddings = embeddings
+        self.failed = failed
+        self.errors = errors  # (start, end, error) per failed batch
+
+class RateLimiter:
+    """Token buckets for requests per minute and tokens per minute"""
+
+    def __init__(self, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None):
+        # Each bucket: [capacity, level, refill per second]; limits of 0/None are unbounded.
+        # Providers enforce per-minute limits over shorter windows too, so bursts
+        # are capped at one second's worth of budget. A request larger than that
+        # still pays in full: the level goes negative and later callers wait
+        # until refill has repaid the debt.
+        self._buckets = {
+            name: [max(1.0, limit / 60.0), max(1.0, limit / 60.0), limit / 60.0]
+            for name, limit in (('requests', requests_per_minute), ('tokens', tokens_per_minute))
+            if limit
+        }
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        for bucket in self._buckets.values():
+            bucket[1] = min(bucket[0], bucket[1] + elapsed * bucket[2])
+
+    def pause(self, seconds: float):
+        """Hold back every caller for a while (after a rate-limit response)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until one request of the given token size fits the budget, then charge it"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # Callers are served in arrival order, so large batches are not starved
+        async with self._lock:
+            needs = {'requests': 1.0, 'tokens': float(tokens)}
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                wait = self._paused_until - now
+                for name, (capacity, level, rate) in self._buckets.items():
+                    # A request larger than the burst waits for a full bucket
+                    need = min(needs[name], capacity)
+                    if level < need:
+                        wait = max(wait, (need - level) / rate)
+
+                if wait <= 0:
+                    for name, bucket in self._buckets.items():
+                        bucket[1] -= needs[name]
+                    return
+
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+class OpenAIEmbeddingDispatcher:
+    """Send embedding batches concurrently within rate limits, with retries"""
+
+    def __init__(self, client, model: str = "text-embedding-ada-002",
+                 batch_size: int = 100,
+                 max_concurrency: int = 4,
+                 requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None,
+                 max_retries: int = 6,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failed_batches = 0
+        self.prompt_tokens = 0
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into an (n, dimension) float32 matrix
+
+        Raises:
+            EmbeddingBatchError: if any batch failed after all retries
+        """
+        batches = [(start, min(start + self.batch_size, len(texts)))
+                   for start in range(0, len(texts), self.batch_size)]
+        results: Dict[int, np.ndarray] = {}
+        errors: List[Tuple[int, int, str]] = []
+        pending = iter(batches)
+
+        async def worker():
+            # Workers share one iterator, so batches go out in input order
+            for start, end in pending:
+                try:
+                    results[start] = await self._request(texts[start:end])
+                except Exception as e:
+                    self.failed_batches += 1
+                    logger.error(f"OpenAI embedding batch {start}-{end} failed: {str(e)}")
+                    errors.append((start, end, str(e)))
+
+        await asyncio.gather(*(worker() for _ in range(min(self.max_concurrency, len(batches)))))
+
+        dimension = next(iter(results.values())).shape[1] if results else 0
+        embeddings = np.zeros((len(texts), dimension), dtype=np.float32)
+        failed = np.zeros(len(texts), dtype=bool)
+        for start, end in batches:
+            if start in results:
+                embeddings[start:end] = results[start]
+            else:
+                failed[start:end] = True
+
+        if errors:
+            raise EmbeddingBatchError(
+                f"{len(errors)} of {len(batches)} embedding batches failed ({int(failed.sum())} texts)",
+                embeddings, failed, sorted(errors)
+            )
+        return embeddings
+
+    async def _request(self, batch: List[str]) -> np.ndarray:
+        """One batch, retried with backoff on transient errors"""
+        tokens = sum(estimate_tokens(text) for text in batch)
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(tokens)
+            self.requests += 1
+            try:
+                response = await self.client.embeddings.create(model=self.model, input=batch)
+            except Exception as e:
+                if attempt == self.max_retries or not self._is_retryable(e):
+                    raise
+
+                delay = self._retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0.5, 1.0) * min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                if isinstance(e, openai.RateLimitError):
+                    self.rate_limited += 1
+                    self.limiter.pause(delay)
+
+                self.retries += 1
+                logger.warning(f"Retrying embedding batch in {delay:.2f}s "
+                               f"(attempt {attempt + 1}/{self.max_retries}): {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+
+            data = sorted(response.data, key=lambda item: item.index)
+            if len(data) != len(batch):
+                raise RuntimeError(f"Expected {len(batch)} embeddings, got {len(data)}")
+            usage = getattr(response, 'usage', None)
+            self.prompt_tokens += getattr(usage, 'prompt_tokens', 0) or 0
+            return np.asarray([item.embedding for item in data], dtype=np.float32)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Transient failures: connection problems, timeouts, rate limits, 5xx"""
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in _RETRY_STATUSES or error.status_code >= 500
+        return False
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Server-requested delay in seconds, if any"""
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None)
+        if not headers:
+            return None
+        try:
+            if headers.get('retry-after-ms') is not None:
+                return float(headers['retry-after-ms']) / 1000.0
+            if headers.get('retry-after') is not None:
+                return float(headers['retry-after'])
+        except ValueError:
+            pass
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Request, retry and limiter counters"""
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited,
+            'failed_batches': self.failed_batches,
+            'prompt_tokens': self.prompt_tokens,
+            'limiter_wait_seconds': self.limiter.waited_seconds,
+            'max_concurrency': self.max_concurrency
+        }
@@ -0,0 +1,201 @@
+"""
+Parallel Chunking
+=================
+
+Process-pool chunking for directory ingests.
+
+Reading, hashing, chunking and semantic tagging are pure CPU work, so
+``ParallelChunker`` sends batches of files to worker processes that each
+hold a copy of the ``DocumentChunker``. A task names a file, never its
+text: workers read and hash the files themselves, skip any whose hash
+matches the one the caller already has stored, and send back compact
+records: one ``(id, content, metadata dict)`` tuple per chunk
+instead of chunk dicts holding ``ChunkMetadata`` instances, which cost a
+class lookup and instance rebuild per chunk to unpickle. Stores accept the
+metadata dicts as they are.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+
+from .chunking import DocumentChunker
+
+logger = logging.getLogger(__name__)
+
+# (file path, content type, programming language or None, stored content hash or None)
+FileTask = Tuple[str, str, Optional[str], Optional[str]]
+
+@dataclass
+class ChunkedFile:
+    """Chunks of one file as compact records"""
+    file_path: str
+    content_type: str
+    records: List[Tuple[str, str, Dict[str, Any]]] = field(default_factory=list)  # (id, content, metadata)
+    content_hash: Optional[str] = None
+    unchanged: bool = False  # content hash matched the task's stored hash; not chunked
+    error: Optional[str] = None
+
+    def to_chunks(self) -> List[Dict[str, Any]]:
+        """Chunk dicts in DocumentChunker's format, with metadata as plain dicts"""
+        return [{
+            'id': chunk_id,
+            'content': content,
+            'metadata': metadata,
+            'source_file': metadata['source_file'],
+            'chunk_index': metadata['chunk_index'],
+            'content_type': metadata['chunk_type']
+        } for chunk_id, content, metadata in self.records]
+
+def read_text(file_path: str) -> str:
+    """Read a file as UTF-8, falling back to Latin-1"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except UnicodeDecodeError:
+        # Try with different encoding
+        with open(file_path, 'r', encoding='latin-1') as f:
+            return f.read()
+
+def read_text_and_hash(file_path: str) -> Tuple[str, str]:
+    """Read a file as read_text does, along with the sha256 of its bytes"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+    try:
+        return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').read(), content_hash
+    except UnicodeDecodeError:
+        return io.TextIOWrapper(io.BytesIO(data), encoding='latin-1').read(), content_hash
+
+def chunk_text(chunker: DocumentChunker, content: str, file_path: str, content_type: str,
+               language: str = None) -> List[Dict[str, Any]]:
+    """Chunk a file's text by content type"""
+    if not content.strip():
+        return []
+
+    if content_type == 'code':
+        return chunker.chunk_code_file(content, file_path, language)
+    return chunker.chunk_document(content, file_path, content_type)
+
+def read_and_chunk(chunker: DocumentChunker, file_path: str, content_type: str,
+                   language: str = None) -> List[Dict[str, Any]]:
+    """Read a file and chunk it by content type"""
+    return chunk_text(chunker, read_text(file_path), file_path, content_type, language)
+
+def _records(chunks: List[Dict[str, Any]]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """Compact records for chunk dicts"""
+    return [(chunk['id'], chunk['content'], dict(vars(chunk['metadata']))) for chunk in chunks]
+
+# Each worker process's chunker, set by _init_worker
+_worker_chunker: Optional[DocumentChunker] = None
+
+def _init_worker(chunker: DocumentChunker):
+    """Keep the pickled chunker for every batch this worker runs"""
+    global _worker_chunker
+    _worker_chunker = chunker
+    # Per-file chunking logs would flood the parent's output from every worker
+    logging.getLogger('context_engineering.chunking').setLevel(logging.WARNING)
+
+def _chunk_batch(tasks: List[FileTask]) -> List[ChunkedFile]:
+    """Read, hash and chunk a batch of files in a worker process"""
+    results = []
+    for file_path, content_type, language, stored_hash in tasks:
+        try:
+            content, content_hash = read_text_and_hash(file_path)
+            if stored_hash is not None and content_hash == stored_hash:
+                results.append(ChunkedFile(file_path=file_path, content_type=content_type,
+                                           content_hash=content_hash, unchanged=True))
+                continue
+            chunks = chunk_text(_worker_chunker, content, file_path, content_type, language)
+            results.append(ChunkedFile(file_path=file_path, content_type=content_type, records=_records(chunks),
+                                       content_hash=content_hash))
+        except Exception as e:
+            results.append(ChunkedFile(file_path=file_path, content_type=content_type, error=str(e)))
+    return results
+
+class ParallelChunker:
+    """Chunk many files across a process pool"""
+
+    def __init__(self, chunker: DocumentChunker, workers: int = None,
+                 batch_bytes: int = 4 * 1024 * 1024, max_batch_files: int = 64):
+        self.chunker = chunker
+        self.workers = workers or os.cpu_count() or 1
+        # Files are grouped until a batch holds batch_bytes or max_batch_files,
+        # amortizing the per-task round trip over many small files
+        self.batch_bytes = batch_bytes
+        self.max_batch_files = max_batch_files
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the pool on first use"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.chunker,))
+        return self._executor
+
+    def _batches(self, tasks: List[FileTask]) -> List[List[FileTask]]:
+        """Group tasks by total file size"""
+        batches = []
+        batch, batch_size = [], 0
+        for task in tasks:
+            try:
+                size = os.path.getsize(task[0])
+            except OSError:
+                size = 0
+            if batch and (batch_size + size > self.batch_bytes or len(batch) >= self.max_batch_files):
+                batches.append(batch)
+                batch, batch_size = [], 0
+            batch.append(task)
+            batch_size += size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def chunk_batch(self, tasks: List[FileTask]) -> List[ChunkedFile]:
+        """Chunk one batch of files in a single worker, results in task order"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), _chunk_batch, tasks)
+
+    async def chunk_files(self, tasks: List[FileTask]) -> AsyncIterator[ChunkedFile]:
+        """
+        Yield each file's chunks as its batch completes (not in task order)
+
+        At most two batches per worker are in flight, so finished results
+        never pile up far ahead of the consumer.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        pending_batches = iter(self._batches(tasks))
+        in_flight = set()
+
+        def submit() -> bool:
+            batch = next(pending_batches, None)
+            if batch is None:
+                return False
+            in_flight.add(loop.run_in_executor(executor, _chunk_batch, batch))
+            return True
+
+        try:
+            while len(in_flight) < 2 * self.workers and submit():
+                pass
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    in_flight.discard(future)
+                    submit()
+                    for chunked in future.result():
+                        yield chunked
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def close(self):
+        """Shut the worker pool down"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
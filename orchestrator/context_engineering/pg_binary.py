@@ -0,0 +1,166 @@
+"""
+PostgreSQL Binary Wire Format Helpers
+=====================================
+
+Encoders for the PostgreSQL binary COPY format used by the bulk loading paths
+of the vector store, and the binary asyncpg codec for the pgvector ``vector``
+type.
+"""
+
+import json
+import struct
+from dataclasses import asdict, is_dataclass
+from typing import List, Dict, Any, Optional, Iterator, Sequence, AsyncIterator
+
+import numpy as np
+
+# Binary COPY framing: signature, flags field, header extension length
+COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+COPY_TRAILER = struct.pack('>h', -1)
+
+_NULL_FIELD = struct.pack('>i', -1)
+_INT32_FIELD = struct.Struct('>ii')
+_FIELD_LENGTH = struct.Struct('>i')
+_FIELD_COUNT = struct.Struct('>h')
+_VECTOR_HEADER = struct.Struct('>hh')
+
+# Column order used by the embedding COPY stream
+EMBEDDING_COPY_COLUMNS = ['id', 'content', 'embedding', 'metadata',
+                          'source_file', 'chunk_index', 'content_type', 'namespace']
+
+def encode_vector(value: Any) -> bytes:
+    """
+    Encode a vector in pgvector's binary format
+    
+    Accepts numpy arrays or sequences of floats; the payload is produced with a
+    single dtype conversion instead of per-element Python floats.
+    """
+    vector = np.asarray(value, dtype='>f4')
+    if vector.ndim != 1:
+        raise ValueError(f"Expected a 1-D vector, got shape {vector.shape}")
+    return _VECTOR_HEADER.pack(vector.shape[0], 0) + vector.tobytes()
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Decode pgvector's binary format to a float32 numpy array"""
+    dimension, _ = _VECTOR_HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype='>f4', count=dimension,
+                         offset=_VECTOR_HEADER.size).astype(np.float32)
+
+async def register_vector_codec(conn) -> None:
+    """
+    Register the binary ``vector`` codec on an asyncpg connection
+    
+    Intended as the ``init`` hook of ``asyncpg.create_pool``; the pgvector
+    extension must already be installed.
+    """
+    schema = await conn.fetchval("""
+        SELECT n.nspname
+        FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE t.typname = 'vector'
+        LIMIT 1;
+    """)
+    if schema is None:
+        raise ValueError("pgvector 'vector' type not found; is the extension installed?")
+    
+    await conn.set_type_codec(
+        'vector',
+        schema=schema,
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format='binary'
+    )
+
+def serialize_metadata(metadata: Any) -> str:
+    """Serialize chunk metadata (dict, dataclass or JSON text) to JSON text"""
+    if metadata is None:
+        return '{}'
+    if isinstance(metadata, str):
+        return metadata
+    if is_dataclass(metadata):
+        metadata = asdict(metadata)
+    return json.dumps(metadata, default=str)
+
+def _text_field(value: Optional[str]) -> bytes:
+    """Encode a TEXT field"""
+    if value is None:
+        return _NULL_FIELD
+    data = value.encode('utf-8')
+    return _FIELD_LENGTH.pack(len(data)) + data
+
+def _jsonb_field(value: str) -> bytes:
+    """Encode a JSONB field (version byte followed by JSON text)"""
+    data = b'\x01' + value.encode('utf-8')
+    return _FIELD_LENGTH.pack(len(data)) + data
+
+def encode_embedding_copy_rows(vectors: np.ndarray,
+                               ids: Sequence[str],
+                               contents: Sequence[str],
+                               metadata: Sequence[Any],
+                               source_files: Sequence[str],
+                               chunk_indices: Sequence[int],
+                               content_types: Sequence[str],
+                               namespaces: Sequence[str] = None,
+                               rows_per_chunk: int = 1000) -> Iterator[bytes]:
+    """
+    Encode embedding rows as a binary COPY stream
+
+    Vectors are converted to big-endian float32 in one vectorized pass; each
+    row then only appends a slice of that buffer, so no per-element Python
+    floats are created.
+
+    Args:
+        vectors: (n, dim) float matrix
+        ids, contents, metadata, source_files, chunk_indices, content_types:
+            Column values, each of length n
+        namespaces: Per-row namespaces (defaults to 'default')
+        rows_per_chunk: Number of rows encoded per yielded buffer
+
+    Yields:
+        Chunks of the COPY stream, header first and trailer last
+    """
+    matrix = np.ascontiguousarray(vectors, dtype='>f4')
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a 2-D vector matrix, got shape {matrix.shape}")
+
+    n_rows, dimension = matrix.shape
+    row_bytes = matrix.view(np.uint8).reshape(n_rows, dimension * 4)
+    vector_prefix = struct.pack('>ihh', 4 + dimension * 4, dimension, 0)
+    field_count = _FIELD_COUNT.pack(len(EMBEDDING_COPY_COLUMNS))
+
+    buffer = bytearray(COPY_HEADER)
+    for i in range(n_rows):
+        buffer += field_count
+        buffer += _text_field(ids[i])
+        buffer += _text_field(contents[i] or '')
+        buffer += vector_prefix
+        buffer += row_bytes[i].tobytes()
+        buffer += _jsonb_field(serialize_metadata(metadata[i]))
+        buffer += _text_field(source_files[i] or '')
+        buffer += _INT32_FIELD.pack(4, int(chunk_indices[i] or 0))
+        buffer += _text_field(content_types[i] or 'text')
+        buffer += _text_field((namespaces[i] if namespaces is not None else None) or 'default')
+
+        if (i + 1) % rows_per_chunk == 0:
+            yield bytes(buffer)
+            buffer = bytearray()
+
+    buffer += COPY_TRAILER
+    yield bytes(buffer)
+
+async def as_async_source(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Adapt a synchronous chunk iterator to the async source asyncpg COPY expects"""
+    for chunk in chunks:
+        yield chunk
+
+def embedding_columns_from_dicts(embeddings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert embedding dictionaries to the columnar layout used by the COPY path"""
+    return {
+        'vectors': np.asarray([emb.get('embedding') for emb in embeddings], dtype=np.float32),
+        'ids': [emb.get('id') for emb in embeddings],
+        'contents': [emb.get('text', emb.get('content', '')) for emb in embeddings],
+        'metadata': [emb.get('metadata', {}) for emb in embeddings],
+        'source_files': [emb.get('source_file', '') for emb in embeddings],
+        'chunk_indices': [emb.get('chunk_index', 0) for emb in embeddings],
+        'content_types': [emb.get('content_type', 'text') for emb in embeddings],
+        'namespaces': [emb.get('namespace', 'default') for emb in embeddings]
+    }
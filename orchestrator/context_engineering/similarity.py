@@ -0,0 +1,92 @@
+"""
+Similarity Kernels
+==================
+
+Batched cosine-similarity kernels over float32 matrices.
+
+Rows are normalized once and similarities come from matrix products;
+top-k selection uses ``argpartition`` (linear time) and only sorts the k
+survivors. Matrix-vs-matrix top-k works in row blocks so the full score
+matrix never has to exist at once.
+"""
+
+from typing import Tuple, Union
+
+import numpy as np
+
+def as_matrix(vectors) -> np.ndarray:
+    """View vectors (a matrix, a vector or a list of either) as a 2-D float32 array"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix.reshape(1, -1) if matrix.ndim == 1 else matrix
+
+def normalize_rows(matrix) -> np.ndarray:
+    """Unit-normalize rows; all-zero rows stay zero"""
+    matrix = as_matrix(matrix)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+def cosine_matrix(a, b, normalized: bool = False) -> np.ndarray:
+    """(len(a), len(b)) cosine similarities; pass normalized=True for unit rows"""
+    if not normalized:
+        a, b = normalize_rows(a), normalize_rows(b)
+    return as_matrix(a) @ as_matrix(b).T
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores along the last axis, best first"""
+    n = scores.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        part = np.broadcast_to(np.arange(n), scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1, kind='stable')
+    return np.take_along_axis(part, order, axis=-1)
+
+def cosine_top_k(query, matrix, k: int, normalized: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of matrix by cosine similarity to one query vector
+
+    Returns:
+        (row indices, similarities), best first
+    """
+    scores = cosine_matrix(query, matrix, normalized=normalized)[0]
+    indices = top_k_indices(scores, k)
+    return indices, scores[indices]
+
+def cosine_top_k_many(queries, matrix, k: int, normalized: bool = False,
+                      block_rows: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of matrix for every query row, in blocks of query rows
+
+    Returns:
+        (indices, similarities), each of shape (len(queries), min(k, len(matrix)))
+    """
+    if not normalized:
+        queries, matrix = normalize_rows(queries), normalize_rows(matrix)
+    queries, matrix = as_matrix(queries), as_matrix(matrix)
+
+    k = max(0, min(k, matrix.shape[0]))
+    indices = np.empty((queries.shape[0], k), dtype=np.int64)
+    scores = np.empty((queries.shape[0], k), dtype=np.float32)
+    for start in range(0, queries.shape[0], block_rows):
+        block = queries[start:start + block_rows] @ matrix.T
+        block_indices = top_k_indices(block, k)
+        indices[start:start + len(block)] = block_indices
+        scores[start:start + len(block)] = np.take_along_axis(block, block_indices, axis=1)
+    return indices, scores
+
+def apply_domain_weights(embeddings, scale: Union[float, np.ndarray] = None,
+                         bias: Union[float, np.ndarray] = None, normalize: bool = True) -> np.ndarray:
+    """
+    Scale and shift embeddings in one broadcast pass, then re-normalize rows
+
+    scale and bias may be scalars or per-dimension vectors.
+    """
+    adjusted = np.array(as_matrix(embeddings), dtype=np.float32)
+    if scale is not None:
+        adjusted *= np.asarray(scale, dtype=np.float32)
+    if bias is not None:
+        adjusted += np.asarray(bias, dtype=np.float32)
+    return normalize_rows(adjusted) if normalize else adjusted
@@ -0,0 +1,163 @@
+"""
+Vector Store Snapshots
+======================
+
+Compact on-disk format for backing up, cloning and warm-starting a vector
+store without re-embedding.
+
+A snapshot is a directory holding:
+
+    manifest.json       format version, dimension, row count and column layout
+    vectors.f32         all embeddings as one contiguous little-endian float32 block
+    <column>.bin        UTF-8 text of a string column, rows concatenated
+    <column>.idx        int64 end offset of each row in <column>.bin
+    chunk_index.i32     little-endian int32 chunk indices
+
+Rows are written and read in batches, and readers memory-map the files, so
+neither side needs the whole store in memory.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# String columns stored as offset-indexed UTF-8 blobs
+TEXT_COLUMNS = ('id', 'content', 'metadata', 'source_file', 'content_type', 'namespace')
+
+_MANIFEST = 'manifest.json'
+_VECTORS = 'vectors.f32'
+_CHUNK_INDEX = 'chunk_index.i32'
+
+class SnapshotWriter:
+    """Append rows to a snapshot directory batch by batch"""
+
+    def __init__(self, path: str, dimension: int, source: Dict[str, Any] = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self.source = source or {}
+        self.rows = 0
+
+        self._vectors = open(self.path / _VECTORS, 'wb')
+        self._chunk_index = open(self.path / _CHUNK_INDEX, 'wb')
+        self._blobs = {name: open(self.path / f"{name}.bin", 'wb') for name in TEXT_COLUMNS}
+        self._offsets = {name: open(self.path / f"{name}.idx", 'wb') for name in TEXT_COLUMNS}
+        self._blob_sizes = {name: 0 for name in TEXT_COLUMNS}
+
+    def write_batch(self, vectors: np.ndarray, columns: Dict[str, Sequence[Any]]):
+        """
+        Append a batch of rows
+
+        Args:
+            vectors: (n, dimension) matrix
+            columns: TEXT_COLUMNS and 'chunk_index', each of length n
+        """
+        matrix = np.ascontiguousarray(vectors, dtype='<f4')
+        if matrix.ndim != 2 or matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected an (n, {self.dimension}) matrix, got {matrix.shape}")
+
+        n_rows = matrix.shape[0]
+        self._vectors.write(matrix.tobytes())
+        self._chunk_index.write(np.asarray(columns['chunk_index'], dtype='<i4').tobytes())
+
+        for name in TEXT_COLUMNS:
+            encoded = [(value or '').encode('utf-8') for value in columns[name]]
+            if len(encoded) != n_rows:
+                raise ValueError(f"Column '{name}' has {len(encoded)} values, expected {n_rows}")
+
+            ends = np.cumsum([len(value) for value in encoded], dtype=np.int64) + self._blob_sizes[name]
+            self._blobs[name].write(b''.join(encoded))
+            self._offsets[name].write(ends.astype('<i8').tobytes())
+            if n_rows:
+                self._blob_sizes[name] = int(ends[-1])
+
+        self.rows += n_rows
+
+    def close(self, complete: bool = True) -> Dict[str, Any]:
+        """Flush all column files and, unless the export was aborted, write the manifest"""
+        for handle in [self._vectors, self._chunk_index, *self._blobs.values(), *self._offsets.values()]:
+            handle.close()
+
+        if not complete:
+            return {}
+
+        manifest = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'rows': self.rows,
+            'dimension': self.dimension,
+            'text_columns': list(TEXT_COLUMNS),
+            'source': self.source
+        }
+
+        # Written last: a snapshot without a manifest is incomplete
+        with open(self.path / _MANIFEST, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        return manifest
+
+class SnapshotReader:
+    """Memory-mapped, batched access to a snapshot directory"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+        manifest_path = self.path / _MANIFEST
+        if not manifest_path.exists():
+            raise ValueError(f"Not a complete snapshot (missing {_MANIFEST}): {path}")
+
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version: {self.manifest.get('format_version')}")
+
+        self.rows = int(self.manifest['rows'])
+        self.dimension = int(self.manifest['dimension'])
+
+        expected_size = self.rows * self.dimension * 4
+        actual_size = os.path.getsize(self.path / _VECTORS)
+        if actual_size != expected_size:
+            raise ValueError(f"Vector block is {actual_size} bytes, expected {expected_size}")
+
+        self.vectors = self._map(_VECTORS, '<f4', (self.rows, self.dimension))
+        self.chunk_index = self._map(_CHUNK_INDEX, '<i4', (self.rows,))
+        self._blobs = {name: self._map(f"{name}.bin", np.uint8, None) for name in TEXT_COLUMNS}
+        self._offsets = {name: self._map(f"{name}.idx", '<i8', (self.rows,)) for name in TEXT_COLUMNS}
+
+    def _map(self, file_name: str, dtype: Any, shape: Tuple[int, ...] = None) -> np.ndarray:
+        """Memory-map a column file (empty files map to empty arrays)"""
+        file_path = self.path / file_name
+        if os.path.getsize(file_path) == 0:
+            return np.zeros(shape or (0,), dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _text_slice(self, name: str, start: int, stop: int) -> List[str]:
+        """Decode rows [start, stop) of a text column"""
+        ends = self._offsets[name][start:stop]
+        first = int(self._offsets[name][start - 1]) if start > 0 else 0
+        data = self._blobs[name][first:int(ends[-1]) if len(ends) else first].tobytes()
+
+        values = []
+        previous = 0
+        for end in (ends - first).tolist():
+            values.append(data[previous:end].decode('utf-8'))
+            previous = end
+        return values
+
+    def iter_batches(self, batch_size: int = 5000) -> Iterator[Tuple[np.ndarray, Dict[str, List[Any]]]]:
+        """Yield (float32 vectors, columns) for consecutive batches of rows"""
+        for start in range(0, self.rows, batch_size):
+            stop = min(start + batch_size, self.rows)
+            columns = {name: self._text_slice(name, start, stop) for name in TEXT_COLUMNS}
+            columns['chunk_index'] = self.chunk_index[start:stop].tolist()
+            yield np.asarray(self.vectors[start:stop], dtype=np.float32), columns
@@ -0,0 +1,94 @@
+"""
+Vector Store Snapshot CLI
+=========================
+
+Back up, clone or warm-start the context engineering vector store without
+re-embedding documents.
+
+Usage:
+    python snapshot_cli.py export --path /backups/embeddings
+    python snapshot_cli.py import --path /backups/embeddings
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+from pathlib import Path
+import logging
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from context_engineering.snapshot import SnapshotReader
+from context_engineering.vector_store import PgVectorStore, PARTITION_KEYS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+async def main():
+    """Main CLI function"""
+
+    parser = argparse.ArgumentParser(description='Export or import vector store snapshots')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Write all embeddings to a snapshot directory')
+
+    import_parser = subparsers.add_parser('import', help='Bulk load a snapshot directory')
+    import_parser.add_argument('--partition-by', choices=PARTITION_KEYS,
+                               help='Partition a newly created embeddings table by this column')
+
+    for subparser in (export_parser, import_parser):
+        subparser.add_argument('--path', required=True, help='Snapshot directory')
+        subparser.add_argument('--database-url', help='Database URL (defaults to environment variable)')
+        subparser.add_argument('--table-name', default='document_embeddings', help='Embeddings table')
+        subparser.add_argument('--batch-size', type=int, default=50000, help='Rows per batch')
+        subparser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    database_url = args.database_url or os.getenv('DATABASE_URL')
+    if not database_url:
+        logger.error("Database URL not provided. Set DATABASE_URL environment variable or use --database-url")
+        return 1
+
+    try:
+        if args.command == 'export':
+            # Read-only: the existing table supplies the dimension and nothing is created
+            vector_store = PgVectorStore(database_url, table_name=args.table_name)
+            await vector_store.connect()
+        else:
+            vector_store = PgVectorStore(database_url, table_name=args.table_name,
+                                         partition_by=args.partition_by)
+            await vector_store.initialize(dimension=SnapshotReader(args.path).dimension)
+
+        try:
+            if args.command == 'export':
+                stats = await vector_store.export_snapshot(args.path, batch_size=args.batch_size)
+            else:
+                stats = await vector_store.import_snapshot(args.path, batch_size=args.batch_size)
+                await vector_store.wait_for_index_builds()
+        finally:
+            await vector_store.close()
+
+        if not stats['success']:
+            return 1
+
+        print(f"\nSnapshot {args.command} results:")
+        print(f"  Rows: {stats['rows']}")
+        print(f"  Time: {stats['seconds']:.2f} seconds ({stats['rows_per_sec']:.0f} rows/sec)")
+        return 0
+
+    except Exception as e:
+        logger.error(f"Snapshot {args.command} failed: {str(e)}")
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -9,15 +9,31 @@ Advanced vector storage and retrieval using PostgreSQL with pgvector extension.
 import asyncio
 import asyncpg
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 import logging
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, asdict
 import json
+import re
+import time
 from datetime import datetime
 import os
 
+from .pg_binary import (
+    EMBEDDING_COPY_COLUMNS, encode_embedding_copy_rows, as_async_source,
+    embedding_columns_from_dicts, serialize_metadata, register_vector_codec
+)
+from .snapshot import SnapshotWriter, SnapshotReader, TEXT_COLUMNS
+
 logger = logging.getLogger(__name__)
 
+class _StoreConnection(asyncpg.Connection):
+    """Pool connection that keeps the store's hot statements prepared"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hot_statements: Dict[str, Any] = {}  # Query text -> PreparedStatement
+
 @dataclass
 class VectorSearchResult:
     """Result from vector similarity search"""
@@ -29,27 +45,88 @@ class VectorSearchResult:
     chunk_index: int
     content_type: str
 
+# Storage modes for the ANN index: full-precision vectors, or a compact
+# expression index (half precision / binary quantized) reranked at full precision
+STORAGE_MODES = ('full', 'halfvec', 'binary')
+
+# Columns the embeddings table can be LIST-partitioned by
+PARTITION_KEYS = ('content_type', 'namespace')
+
+# Content types produced by the chunkers; each gets its own partition
+DEFAULT_CONTENT_TYPE_PARTITIONS = ('text', 'markdown', 'code', 'json', 'config', 'markup')
+
+# Range operators accepted in metadata filters
+_RANGE_OPERATORS = {'$gt': '>', '$gte': '>=', '$lt': '<', '$lte': '<='}
+
+# Named ef_search operating points for similarity search
+RECALL_PROFILES = {
+    'fast': 20,
+    'balanced': 40,
+    'accurate': 100,
+    'exhaustive': 400
+}
+
+@dataclass
+class HNSWConfig:
+    """Configuration for HNSW index builds and queries"""
+    m: int = 16  # Graph connectivity
+    ef_construction: int = 64  # Candidate list size during build
+    ef_search: int = 40  # Default candidate list size during search
+    concurrent_build_rows: int = 50000  # Build CONCURRENTLY in the background above this row estimate
+    maintenance_work_mem: Optional[str] = None  # e.g. '2GB' for faster builds
+    exact_scan_max_rows: int = 5000  # Filters matching at most this many rows are ranked exactly
+    filtered_candidate_factor: int = 10  # ANN candidate pool multiplier for less selective filters
+    filter_estimate_ttl: float = 300.0  # Seconds a filter's selectivity estimate is reused
+
 class PgVectorStore:
     """PostgreSQL vector store with pgvector extension"""
     
-    def __init__(self, connection_string: str = None, table_name: str = "document_embeddings"):
+    _result_columns = "id, content, metadata, source_file, chunk_index, content_type"
+    # Stored (non-generated) columns of the embeddings table
+    _stored_columns = ("id, content, embedding, metadata, source_file, chunk_index, "
+                       "content_type, namespace, created_at, updated_at")
+    
+    def __init__(self, connection_string: str = None, table_name: str = "document_embeddings",
+                 bulk_load_threshold: int = 500, statement_cache_size: int = 256,
+                 hnsw_config: HNSWConfig = None, storage_mode: str = "full",
+                 rerank_factor: int = 4, partition_by: str = None,
+                 partitions: List[str] = None):
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unsupported storage mode: {storage_mode}")
+        if partition_by is not None and partition_by not in PARTITION_KEYS:
+            raise ValueError(f"Unsupported partition key: {partition_by}")
+        
         self.connection_string = connection_string or os.getenv('DATABASE_URL')
         self.table_name = table_name
+        self.bulk_load_threshold = bulk_load_threshold  # Batches this large go through COPY
+        self.statement_cache_size = statement_cache_size  # asyncpg's automatic cache for the other statements
+        self.hnsw_config = hnsw_config or HNSWConfig()
+        self.storage_mode = storage_mode
+        self.rerank_factor = rerank_factor  # Quantized candidates fetched per requested result
+        self.partition_by = partition_by  # LIST partition key of the embeddings table, if any
+        if partitions is None:
+            partitions = list(DEFAULT_CONTENT_TYPE_PARTITIONS) if partition_by == 'content_type' else []
+        self.partitions = list(partitions)  # Values with a dedicated partition; others go to the default one
+        self._partitioned = False  # Whether the existing table is actually partitioned
         self.pool = None
         self.dimension = None
+        self._index_build_tasks: List[asyncio.Task] = []
+        # (table, compiled filter) -> (strategy, monotonic time it was estimated)
+        self._filter_strategies: Dict[Tuple[str, str], Tuple[str, float]] = {}
     
     async def initialize(self, dimension: int = 384):
         """Initialize the vector store and create necessary tables"""
         self.dimension = dimension
         
         try:
-            # Create connection pool
-            self.pool = await asyncpg.create_pool(
-                self.connection_string,
-                min_size=2,
-                max_size=10,
-                command_timeout=60
-            )
+            # The vector type has to exist before pooled connections register its codec
+            conn = await asyncpg.connect(self.connection_string)
+            try:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            finally:
+                await conn.close()
+            
+            self.pool = await self._create_pool()
             
             # Create tables and indexes
             await self._create_tables()
@@ -61,6 +138,48 @@ class PgVectorStore:
             logger.error(f"Failed to initialize vector store: {str(e)}")
             raise
     
+    async def connect(self):
+        """
+        Open the store on an existing embeddings table without running any DDL
+        
+        For read-only use such as snapshot export: the dimension and partition
+        key are read from the table instead of being created to match.
+        
+        Raises:
+            RuntimeError: If the embeddings table does not exist
+        """
+        conn = await asyncpg.connect(self.connection_string)
+        try:
+            dimension = await conn.fetchval("""
+                SELECT atttypmod FROM pg_attribute
+                WHERE attrelid = to_regclass($1) AND attname = 'embedding';
+            """, self.table_name)
+            partition_key = await self._partition_key(conn, self.table_name)
+        finally:
+            await conn.close()
+        
+        if dimension is None:
+            raise RuntimeError(f"Embeddings table {self.table_name} does not exist")
+        
+        self.dimension = dimension
+        self.partition_by = partition_key or self.partition_by
+        self._partitioned = partition_key is not None
+        self.pool = await self._create_pool()
+        logger.info(f"Connected to {self.table_name} with dimension {dimension}")
+    
+    async def _create_pool(self):
+        """Connection pool; vectors cross the wire as binary float32"""
+        return await asyncpg.create_pool(
+            self.connection_string,
+            min_size=2,
+            max_size=10,
+            command_timeout=60,
+            statement_cache_size=self.statement_cache_size,
+            server_settings={'hnsw.ef_search': str(self.hnsw_config.ef_search)},
+            init=register_vector_codec,
+            connection_class=_StoreConnection
+        )
+    
     async def _create_tables(self):
         """Create necessary tables for vector storage"""
         
@@ -68,19 +187,29 @@ class PgVectorStore:
             # Enable pgvector extension
             await conn.execute("CREATE EXTENSION IF NOT EXISTS vector;")
             
-            # Create main embeddings table
+            # Create main embeddings table (and its partitions when configured)
+            partition_key = await self._partition_key(conn, self.table_name)
+            if partition_key is None and await self._table_exists(conn, self.table_name):
+                if self.partition_by:
+                    logger.warning(f"{self.table_name} is not partitioned; "
+                                   f"run migrate_to_partitioned() to partition it by {self.partition_by}")
+            else:
+                # An existing partitioned table keeps its own key
+                self.partition_by = partition_key or self.partition_by
+                await conn.execute(self._embeddings_table_sql(self.table_name))
+                if self.partition_by:
+                    await self._create_partitions(conn, self.table_name)
+            self._partitioned = bool(await self._partition_key(conn, self.table_name))
+            
+            # Backfill columns on tables created before they existed
             await conn.execute(f"""
-                CREATE TABLE IF NOT EXISTS {self.table_name} (
-                    id TEXT PRIMARY KEY,
-                    content TEXT NOT NULL,
-                    embedding vector({self.dimension}) NOT NULL,
-                    metadata JSONB DEFAULT '{{}}',
-                    source_file TEXT NOT NULL,
-                    chunk_index INTEGER NOT NULL,
-                    content_type TEXT DEFAULT 'text',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
+                ALTER TABLE {self.table_name}
+                ADD COLUMN IF NOT EXISTS content_tsv tsvector
+                GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+            """)
+            await conn.execute(f"""
+                ALTER TABLE {self.table_name}
+                ADD COLUMN IF NOT EXISTS namespace TEXT NOT NULL DEFAULT 'default';
             """)
             
             # Create documents table for tracking source documents
@@ -128,16 +257,94 @@ class PgVectorStore:
                 );
             """)
     
+    def _embeddings_table_sql(self, table_name: str) -> str:
+        """CREATE TABLE statement for the embeddings table, partitioned when configured"""
+        primary_key = f"id, {self.partition_by}" if self.partition_by else "id"
+        partition_clause = f" PARTITION BY LIST ({self.partition_by})" if self.partition_by else ""
+        return f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                embedding vector({self.dimension}) NOT NULL,
+                metadata JSONB DEFAULT '{{}}',
+                source_file TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                content_type TEXT DEFAULT 'text',
+                namespace TEXT NOT NULL DEFAULT 'default',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+                PRIMARY KEY ({primary_key})
+            ){partition_clause};
+        """
+    
+    def _partition_name(self, value: Optional[str]) -> str:
+        """Name of the partition holding a partition key value (None for the default partition)"""
+        if value is None:
+            return f"{self.table_name}_p_default"
+        return f"{self.table_name}_p_{re.sub(r'[^a-z0-9_]', '_', value.lower())}"
+    
+    async def _create_partitions(self, conn, table_name: str):
+        """Create the configured LIST partitions plus a default partition"""
+        for value in self.partitions:
+            literal = value.replace("'", "''")
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self._partition_name(value)}
+                PARTITION OF {table_name} FOR VALUES IN ('{literal}');
+            """)
+        
+        await conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self._partition_name(None)}
+            PARTITION OF {table_name} DEFAULT;
+        """)
+    
+    async def _table_exists(self, conn, table_name: str) -> bool:
+        """Whether a table exists on the search path"""
+        return await conn.fetchval("SELECT to_regclass($1) IS NOT NULL;", table_name)
+    
+    async def _partition_key(self, conn, table_name: str) -> Optional[str]:
+        """Partition key column of a table, or None if it is not partitioned"""
+        definition = await conn.fetchval("""
+            SELECT pg_get_partkeydef(c.oid)
+            FROM pg_class c
+            WHERE c.oid = to_regclass($1) AND c.relkind = 'p';
+        """, table_name)
+        if not definition:
+            return None
+        # e.g. "LIST (content_type)"
+        return definition[definition.index('(') + 1:definition.rindex(')')].strip()
+    
+    async def _list_partitions(self, conn) -> List[str]:
+        """Names of the partitions of the embeddings table"""
+        rows = await conn.fetch("""
+            SELECT c.relname
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass($1)
+            ORDER BY c.relname;
+        """, self.table_name)
+        return [row['relname'] for row in rows]
+    
+    @property
+    def _conflict_target(self) -> str:
+        """Upsert conflict target matching the embeddings table's primary key"""
+        return f"id, {self.partition_by}" if self._partitioned else "id"
+    
     async def _create_indexes(self):
         """Create indexes for efficient querying"""
         
+        # Vector similarity indexes (HNSW for fast approximate search); a
+        # partitioned table gets one graph per partition so pruned queries
+        # only walk the partitions they target
+        if self._partitioned:
+            async with self.pool.acquire() as conn:
+                partitions = await self._list_partitions(conn)
+            for partition in partitions:
+                await self._create_vector_index(self._vector_index_name(partition), partition)
+        else:
+            await self._create_vector_index(self._vector_index_name(self.table_name), self.table_name)
+        await self._create_vector_index(self._vector_index_name("context_patterns"), "context_patterns")
+        
         async with self.pool.acquire() as conn:
-            # Vector similarity index (HNSW for fast approximate search)
-            await conn.execute(f"""
-                CREATE INDEX IF NOT EXISTS {self.table_name}_embedding_idx 
-                ON {self.table_name} USING hnsw (embedding vector_cosine_ops);
-            """)
-            
             # Metadata indexes
             await conn.execute(f"""
                 CREATE INDEX IF NOT EXISTS {self.table_name}_source_file_idx 
@@ -154,6 +361,12 @@ class PgVectorStore:
                 ON {self.table_name} USING GIN (metadata);
             """)
             
+            # Full-text index for the text half of hybrid search
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS {self.table_name}_content_tsv_idx 
+                ON {self.table_name} USING GIN (content_tsv);
+            """)
+            
             # Documents table indexes
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS documents_file_path_idx 
@@ -161,68 +374,721 @@ class PgVectorStore:
             """)
             
             # Context patterns indexes
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS context_patterns_embedding_idx 
-                ON context_patterns USING hnsw (embedding vector_cosine_ops);
-            """)
-            
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS context_patterns_type_idx 
                 ON context_patterns (pattern_type);
             """)
     
-    async def add_embeddings(self, embeddings: List[Dict[str, Any]]) -> bool:
+    async def add_partition(self, value: str) -> bool:
+        """
+        Give a partition key value its own partition and vector index
+        
+        Rows with that value already in the default partition are moved
+        into the new partition before it is attached.
+        """
+        if not self._partitioned:
+            logger.error(f"{self.table_name} is not partitioned")
+            return False
+        
+        partition = self._partition_name(value)
+        default_partition = self._partition_name(None)
+        literal = value.replace("'", "''")
+        columns = self._stored_columns
+        
+        try:
+            async with self.pool.acquire() as conn:
+                if await self._table_exists(conn, partition):
+                    return True
+                
+                async with conn.transaction():
+                    await conn.execute(f"""
+                        CREATE TABLE {partition}
+                        (LIKE {self.table_name} INCLUDING DEFAULTS INCLUDING GENERATED);
+                    """)
+                    await conn.execute(f"""
+                        WITH moved AS (
+                            DELETE FROM {default_partition}
+                            WHERE {self.partition_by} = $1
+                            RETURNING {columns}
+                        )
+                        INSERT INTO {partition} ({columns}) SELECT {columns} FROM moved;
+                    """, value)
+                    await conn.execute(f"""
+                        ALTER TABLE {self.table_name}
+                        ATTACH PARTITION {partition} FOR VALUES IN ('{literal}');
+                    """)
+            
+            await self._create_vector_index(self._vector_index_name(partition), partition)
+            if value not in self.partitions:
+                self.partitions.append(value)
+            
+            logger.info(f"Added partition {partition}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error adding partition {partition}: {str(e)}")
+            return False
+    
+    async def migrate_to_partitioned(self) -> Dict[str, Any]:
+        """
+        Rebuild an existing unpartitioned embeddings table as a partitioned one
+        
+        Rows are copied into a new table partitioned by ``partition_by``,
+        which then replaces the old table inside a single transaction (writers
+        are blocked for the duration of the copy). Vector and metadata indexes
+        are built afterwards, per partition.
+        
+        Returns:
+            Migration statistics (success, rows, seconds)
+        """
+        if not self.partition_by:
+            raise ValueError("migrate_to_partitioned requires partition_by")
+        
+        stats = {'success': False, 'rows': 0, 'seconds': 0.0}
+        new_table = f"{self.table_name}_partitioned"
+        columns = self._stored_columns
+        start_time = time.perf_counter()
+        
+        try:
+            async with self.pool.acquire() as conn:
+                if await self._partition_key(conn, self.table_name):
+                    stats['success'] = True
+                    return stats
+                
+                async with conn.transaction():
+                    await conn.execute(f"LOCK TABLE {self.table_name} IN SHARE MODE;")
+                    await conn.execute(self._embeddings_table_sql(new_table))
+                    await self._create_partitions(conn, new_table)
+                    
+                    status = await conn.execute(f"""
+                        INSERT INTO {new_table} ({columns})
+                        SELECT {columns} FROM {self.table_name};
+                    """)
+                    stats['rows'] = int(status.split()[-1])
+                    
+                    await conn.execute(f"DROP TABLE {self.table_name};")
+                    await conn.execute(f"ALTER TABLE {new_table} RENAME TO {self.table_name};")
+                    await conn.execute(f"""
+                        ALTER TABLE {self.table_name}
+                        RENAME CONSTRAINT {new_table}_pkey TO {self.table_name}_pkey;
+                    """)
+            
+            self._partitioned = True
+            await self._create_indexes()
+            
+            stats['seconds'] = time.perf_counter() - start_time
+            stats['success'] = True
+            logger.info(f"Partitioned {self.table_name} by {self.partition_by}: "
+                        f"{stats['rows']} rows in {stats['seconds']:.1f}s")
+            
+        except Exception as e:
+            stats['seconds'] = time.perf_counter() - start_time
+            logger.error(f"Error partitioning {self.table_name}: {str(e)}")
+        
+        return stats
+    
+    def _vector_index_name(self, table_name: str) -> str:
+        """Name of the ANN index for a table in the current storage mode"""
+        if self.storage_mode == 'full':
+            return f"{table_name}_embedding_idx"
+        return f"{table_name}_embedding_{self.storage_mode}_idx"
+    
+    def _index_expression(self, vector_ref: str = "embedding") -> str:
+        """Indexed expression for a vector in the current storage mode"""
+        if self.storage_mode == 'halfvec':
+            return f"({vector_ref})::halfvec({self.dimension})"
+        if self.storage_mode == 'binary':
+            return f"binary_quantize({vector_ref})::bit({self.dimension})"
+        return vector_ref
+    
+    def _ann_distance(self, vector_ref: str) -> str:
+        """Index-driven distance expression between stored embeddings and vector_ref"""
+        # Cast first so query parameters are still sent with the vector codec
+        query_expression = self._index_expression(f"{vector_ref}::vector")
+        operator = '<~>' if self.storage_mode == 'binary' else '<=>'
+        return f"{self._index_expression()} {operator} {query_expression}"
+    
+    def _candidate_limit(self, limit: int, strategy: str = "ann") -> int:
+        """Rows fetched from the ANN index for a requested limit"""
+        factor = 1 if self.storage_mode == 'full' else self.rerank_factor
+        if strategy == 'post_filter':
+            factor *= self.hnsw_config.filtered_candidate_factor
+        return limit * factor
+    
+    def _nearest_rows_sql(self, table_name: str, columns: str, vector_ref: str,
+                          limit_ref: str, filter_conditions: List[str] = None,
+                          threshold_ref: str = None, score_alias: str = "similarity_score",
+                          strategy: str = "ann", partition_conditions: List[str] = None) -> str:
+        """
+        SQL for the nearest rows to vector_ref, scored at full precision
+        
+        Strategies:
+            ann: filters share the WHERE clause of the index scan
+            exact: filtered rows are fenced off (``OFFSET 0``) so the ANN index
+                is bypassed and every match is ranked exactly
+            post_filter: an enlarged ANN candidate pool is fetched first and
+                filtered afterwards
+        
+        In quantized storage modes the compact index produces
+        ``limit * rerank_factor`` candidates, which are then reranked by exact
+        cosine distance on the full-precision column.
+        
+        Partition key conditions always sit next to the index scan so that
+        the planner prunes to the matching partitions' indexes.
+        """
+        filter_clause = " AND ".join(filter_conditions) if filter_conditions else "TRUE"
+        scope_clause = " AND ".join(partition_conditions) if partition_conditions else "TRUE"
+        threshold_clause = f"1 - (embedding <=> {vector_ref}) >= {threshold_ref}" if threshold_ref else "TRUE"
+        score = f"1 - (embedding <=> {vector_ref}) as {score_alias}"
+        
+        if strategy == 'exact':
+            return f"""
+                SELECT {columns}, {score}
+                FROM (
+                    SELECT {columns}, embedding
+                    FROM {table_name}
+                    WHERE {scope_clause} AND {filter_clause}
+                    OFFSET 0
+                ) filtered
+                WHERE {threshold_clause}
+                ORDER BY embedding <=> {vector_ref}
+                LIMIT {limit_ref}
+            """
+        
+        if self.storage_mode == 'full' and strategy == 'ann':
+            return f"""
+                SELECT {columns}, {score}
+                FROM {table_name}
+                WHERE {threshold_clause} AND {scope_clause} AND {filter_clause}
+                ORDER BY embedding <=> {vector_ref}
+                LIMIT {limit_ref}
+            """
+        
+        inner_filter, outer_filter = filter_clause, "TRUE"
+        if strategy == 'post_filter':
+            inner_filter, outer_filter = "TRUE", filter_clause
+        
+        return f"""
+            SELECT {columns}, {score}
+            FROM (
+                SELECT {columns}, embedding
+                FROM {table_name}
+                WHERE {scope_clause} AND {inner_filter}
+                ORDER BY {self._ann_distance(vector_ref)}
+                LIMIT {limit_ref} * {self._candidate_limit(1, strategy)}
+            ) candidates
+            WHERE {threshold_clause} AND {outer_filter}
+            ORDER BY embedding <=> {vector_ref}
+            LIMIT {limit_ref}
+        """
+    
+    async def _choose_filter_strategy(self, table_name: str,
+                                      filters: Optional[Dict[str, Any]]) -> str:
+        """
+        Pick how a filtered search uses the ANN index
+        
+        Matching rows are counted up to ``exact_scan_max_rows`` + 1 (a bounded
+        scan driven by the btree/GIN filter indexes). Selective filters are
+        ranked exactly over their matches; the rest post-filter an enlarged
+        ANN candidate pool. Filters on the partition key alone need neither:
+        pruning already restricts the search to the matching partitions.
+        
+        The choice is cached per filter for ``filter_estimate_ttl`` seconds,
+        so repeated searches with the same filter skip the count.
+        """
+        partition_filters, row_filters = self._split_partition_filters(filters)
+        params = []
+        conditions = self._build_filter_conditions(row_filters, params)
+        if not conditions:
+            return 'ann'
+        conditions += self._build_filter_conditions(partition_filters, params)
+        
+        key = (table_name, json.dumps([conditions, params], default=str))
+        cached = self._filter_strategies.get(key)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < self.hnsw_config.filter_estimate_ttl:
+            return cached[0]
+        
+        max_rows = int(self.hnsw_config.exact_scan_max_rows)
+        async with self.pool.acquire() as conn:
+            matching = await conn.fetchval(f"""
+                SELECT count(*) FROM (
+                    SELECT 1 FROM {table_name}
+                    WHERE {" AND ".join(conditions)}
+                    LIMIT {max_rows + 1}
+                ) matches;
+            """, *params)
+        
+        strategy = 'exact' if matching <= max_rows else 'post_filter'
+        self._filter_strategies.pop(key, None)
+        self._filter_strategies[key] = (strategy, now)
+        while len(self._filter_strategies) > 1024:
+            del self._filter_strategies[next(iter(self._filter_strategies))]
+        return strategy
+    
+    def _similarity_query(self, vector_param: Any, vector_ref: str, limit: int,
+                          similarity_threshold: float, filters: Optional[Dict[str, Any]],
+                          strategy: str) -> Tuple[str, List[Any]]:
+        """
+        Build the nearest-rows query and its parameters for a strategy
+        
+        Post-filtered queries leave the similarity threshold to the caller so
+        an underfilled candidate pool can be told apart from a strict threshold.
+        """
+        params = [vector_param, limit]
+        threshold_ref = None
+        if strategy != 'post_filter':
+            params.append(similarity_threshold)
+            threshold_ref = "$3"
+        
+        partition_filters, row_filters = self._split_partition_filters(filters)
+        partition_conditions = self._build_filter_conditions(partition_filters, params)
+        filter_conditions = self._build_filter_conditions(row_filters, params)
+        query = self._nearest_rows_sql(
+            self.table_name, self._result_columns, vector_ref, "$2",
+            filter_conditions, threshold_ref=threshold_ref, strategy=strategy,
+            partition_conditions=partition_conditions
+        )
+        return query, params
+    
+    def _split_partition_filters(self, filters: Optional[Dict[str, Any]]
+                                 ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Split filters into (partition key filters, remaining filters)"""
+        if not filters or not self._partitioned or self.partition_by not in filters:
+            return {}, filters or {}
+        
+        row_filters = dict(filters)
+        return {self.partition_by: row_filters.pop(self.partition_by)}, row_filters
+    
+    async def _create_vector_index(self, index_name: str, table_name: str):
+        """
+        Create an HNSW index with the configured build parameters
+        
+        The indexed expression and operator class follow the storage mode:
+        ``vector`` cosine for full precision, ``halfvec`` cosine for half
+        precision and ``bit`` Hamming distance for binary quantization.
+        
+        Tables whose row estimate exceeds ``concurrent_build_rows`` get the
+        index built with ``CREATE INDEX CONCURRENTLY`` in a background task,
+        so startup does not block and writes continue during the build. An
+        invalid index left behind by an interrupted concurrent build is
+        dropped and rebuilt.
+        """
+        config = self.hnsw_config
+        
+        async with self.pool.acquire() as conn:
+            state = await conn.fetchrow("""
+                SELECT i.indisvalid
+                FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+                WHERE c.relname = $1;
+            """, index_name)
+            
+            if state is not None and state['indisvalid']:
+                return
+            
+            if state is not None:
+                logger.warning(f"Dropping invalid index {index_name} before rebuilding")
+                await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+            
+            estimated_rows = await conn.fetchval("""
+                SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE relname = $1;
+            """, table_name) or 0
+        
+        opclass = {
+            'full': 'vector_cosine_ops',
+            'halfvec': 'halfvec_cosine_ops',
+            'binary': 'bit_hamming_ops'
+        }[self.storage_mode]
+        
+        concurrently = estimated_rows >= config.concurrent_build_rows
+        statement = f"""
+            CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {index_name}
+            ON {table_name} USING hnsw (({self._index_expression()}) {opclass})
+            WITH (m = {int(config.m)}, ef_construction = {int(config.ef_construction)});
+        """
+        
+        if concurrently:
+            logger.info(f"Building {index_name} concurrently in the background "
+                        f"(~{estimated_rows} rows)")
+            task = asyncio.create_task(self._build_index(index_name, statement))
+            self._index_build_tasks.append(task)
+        else:
+            await self._build_index(index_name, statement)
+    
+    async def _build_index(self, index_name: str, statement: str):
+        """Run an index build statement on a dedicated connection"""
+        try:
+            async with self.pool.acquire() as conn:
+                if self.hnsw_config.maintenance_work_mem:
+                    await conn.execute(
+                        "SELECT set_config('maintenance_work_mem', $1, false);",
+                        self.hnsw_config.maintenance_work_mem
+                    )
+                
+                start_time = time.perf_counter()
+                await conn.execute(statement)
+                logger.info(f"Built index {index_name} in {time.perf_counter() - start_time:.1f}s")
+                
+                if self.hnsw_config.maintenance_work_mem:
+                    await conn.execute("RESET maintenance_work_mem;")
+                    
+        except Exception as e:
+            logger.error(f"Error building index {index_name}: {str(e)}")
+    
+    async def wait_for_index_builds(self):
+        """Wait for background index builds started during initialization"""
+        if self._index_build_tasks:
+            await asyncio.gather(*self._index_build_tasks, return_exceptions=True)
+            self._index_build_tasks = []
+    
+    def _resolve_ef_search(self, candidates: int, ef_search: Optional[int],
+                           recall_profile: Optional[str]) -> Optional[int]:
+        """Resolve the ef_search for a query, or None to use the connection default"""
+        if ef_search is None and recall_profile is not None:
+            if recall_profile not in RECALL_PROFILES:
+                raise ValueError(f"Unknown recall profile: {recall_profile}")
+            ef_search = RECALL_PROFILES[recall_profile]
+        
+        if ef_search is None:
+            ef_search = self.hnsw_config.ef_search
+        
+        # HNSW returns at most ef_search rows
+        ef_search = max(int(ef_search), candidates)
+        return None if ef_search == self.hnsw_config.ef_search else ef_search
+    
+    @asynccontextmanager
+    async def _search_connection(self, ef_search: Optional[int] = None):
+        """Acquire a connection, scoping hnsw.ef_search to a transaction when overridden"""
+        async with self.pool.acquire() as conn:
+            if ef_search is None:
+                yield conn
+            else:
+                async with conn.transaction():
+                    await conn.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)};")
+                    yield conn
+    
+    async def add_embeddings(self, embeddings: Union[List[Dict[str, Any]], np.ndarray],
+                           ids: List[str] = None,
+                           contents: List[str] = None,
+                           metadata: List[Any] = None,
+                           source_files: List[str] = None,
+                           chunk_indices: List[int] = None,
+                           content_types: List[str] = None,
+                           namespaces: List[str] = None) -> bool:
         """
         Add embeddings to the vector store
         
+        Embeddings are either a list of embedding dictionaries or an
+        (n, dimension) float32 matrix with the other fields given as columns
+        (ids and contents are required). The matrix form is passed through
+        without building a Python object per vector.
+        
         Args:
-            embeddings: List of embedding dictionaries
+            embeddings: List of embedding dictionaries, or a matrix
+            ids: Chunk ids (matrix form)
+            contents: Chunk texts (matrix form)
+            metadata: Per-row metadata, dicts or dataclasses (matrix form)
+            source_files: Per-row source files (matrix form)
+            chunk_indices: Per-row chunk indices (matrix form)
+            content_types: Per-row content types (matrix form)
+            namespaces: Per-row namespaces (matrix form)
             
         Returns:
             Success status
         """
-        if not embeddings:
+        if len(embeddings) == 0:
             return True
         
+        if isinstance(embeddings, np.ndarray):
+            if ids is None or contents is None:
+                logger.error("Adding an embedding matrix requires ids and contents")
+                return False
+            columns = {
+                'vectors': embeddings, 'ids': ids, 'contents': contents, 'metadata': metadata,
+                'source_files': source_files, 'chunk_indices': chunk_indices,
+                'content_types': content_types, 'namespaces': namespaces
+            }
+        else:
+            try:
+                columns = embedding_columns_from_dicts(embeddings)
+            except ValueError as e:
+                logger.error(f"Error preparing embeddings: {str(e)}")
+                return False
+        
+        n_rows = len(columns['ids'])
+        
+        # Large batches are streamed through binary COPY instead of per-row inserts
+        if n_rows >= self.bulk_load_threshold:
+            stats = await self.bulk_add_embeddings(**columns)
+            return stats['success']
+        
         try:
+            defaults = {'metadata': {}, 'source_files': '', 'chunk_indices': 0,
+                        'content_types': 'text', 'namespaces': 'default'}
+            for name, default in defaults.items():
+                if columns[name] is None:
+                    columns[name] = [default] * n_rows
+            
+            values = list(zip(
+                columns['ids'],
+                columns['contents'],
+                columns['vectors'],
+                [serialize_metadata(m) for m in columns['metadata']],
+                columns['source_files'],
+                [int(i) for i in columns['chunk_indices']],
+                columns['content_types'],
+                columns['namespaces']
+            ))
+            
             async with self.pool.acquire() as conn:
-                # Prepare data for batch insert
-                values = []
-                for emb in embeddings:
-                    values.append((
-                        emb.get('id'),
-                        emb.get('text', emb.get('content', '')),
-                        emb.get('embedding'),
-                        json.dumps(emb.get('metadata', {})),
-                        emb.get('source_file', ''),
-                        emb.get('chunk_index', 0),
-                        emb.get('content_type', 'text')
-                    ))
-                
                 # Batch insert
-                await conn.executemany(f"""
+                upsert = await self._hot_statement(conn, f"""
                     INSERT INTO {self.table_name} 
-                    (id, content, embedding, metadata, source_file, chunk_index, content_type)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7)
-                    ON CONFLICT (id) DO UPDATE SET
+                    (id, content, embedding, metadata, source_file, chunk_index, content_type, namespace)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                    ON CONFLICT ({self._conflict_target}) DO UPDATE SET
                         content = EXCLUDED.content,
                         embedding = EXCLUDED.embedding,
                         metadata = EXCLUDED.metadata,
                         updated_at = CURRENT_TIMESTAMP;
-                """, values)
+                """)
+                await upsert.executemany(values)
                 
-                logger.info(f"Added {len(embeddings)} embeddings to vector store")
+                logger.info(f"Added {n_rows} embeddings to vector store")
                 return True
                 
         except Exception as e:
             logger.error(f"Error adding embeddings: {str(e)}")
             return False
     
+    async def bulk_add_embeddings(self,
+                                vectors: np.ndarray,
+                                ids: List[str],
+                                contents: List[str],
+                                metadata: List[Any] = None,
+                                source_files: List[str] = None,
+                                chunk_indices: List[int] = None,
+                                content_types: List[str] = None,
+                                namespaces: List[str] = None,
+                                rows_per_chunk: int = 1000) -> Dict[str, Any]:
+        """
+        Bulk load embeddings through binary COPY and a set-based upsert
+        
+        Rows are streamed into a transaction-scoped staging table with
+        ``COPY ... FROM STDIN (FORMAT binary)`` and merged into the embeddings
+        table with a single ``INSERT ... SELECT ... ON CONFLICT``. When an id
+        appears more than once in the batch, the last occurrence wins.
+        
+        Args:
+            vectors: (n, dimension) float32 matrix
+            ids: Chunk ids
+            contents: Chunk texts
+            metadata: Per-row metadata (dicts or dataclasses)
+            source_files: Per-row source files
+            chunk_indices: Per-row chunk indices
+            content_types: Per-row content types
+            namespaces: Per-row namespaces
+            rows_per_chunk: Rows encoded per COPY buffer
+            
+        Returns:
+            Load statistics including rows/sec
+        """
+        n_rows = len(ids)
+        stats = {'success': False, 'rows': n_rows, 'seconds': 0.0, 'rows_per_sec': 0.0}
+        
+        if n_rows == 0:
+            stats['success'] = True
+            return stats
+        
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != n_rows:
+            logger.error(f"Bulk load expects a ({n_rows}, dim) matrix, got {vectors.shape}")
+            return stats
+        if self.dimension and vectors.shape[1] != self.dimension:
+            logger.error(f"Bulk load dimension mismatch: {vectors.shape[1]} != {self.dimension}")
+            return stats
+        
+        metadata = metadata if metadata is not None else [{}] * n_rows
+        source_files = source_files if source_files is not None else [''] * n_rows
+        chunk_indices = chunk_indices if chunk_indices is not None else [0] * n_rows
+        content_types = content_types if content_types is not None else ['text'] * n_rows
+        namespaces = namespaces if namespaces is not None else ['default'] * n_rows
+        
+        staging_table = f"{self.table_name}_staging"
+        start_time = time.perf_counter()
+        
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(f"""
+                        CREATE TEMP TABLE {staging_table} (
+                            ord BIGSERIAL,
+                            id TEXT NOT NULL,
+                            content TEXT NOT NULL,
+                            embedding vector({vectors.shape[1]}) NOT NULL,
+                            metadata JSONB,
+                            source_file TEXT,
+                            chunk_index INTEGER,
+                            content_type TEXT,
+                            namespace TEXT
+                        ) ON COMMIT DROP;
+                    """)
+                    
+                    chunks = encode_embedding_copy_rows(
+                        vectors, ids, contents, metadata, source_files,
+                        chunk_indices, content_types, namespaces, rows_per_chunk=rows_per_chunk
+                    )
+                    await conn.copy_to_table(
+                        staging_table,
+                        source=as_async_source(chunks),
+                        columns=EMBEDDING_COPY_COLUMNS,
+                        format='binary'
+                    )
+                    
+                    await conn.execute(f"""
+                        INSERT INTO {self.table_name}
+                        (id, content, embedding, metadata, source_file, chunk_index, content_type, namespace)
+                        SELECT DISTINCT ON ({self._conflict_target})
+                            id, content, embedding, metadata, source_file, chunk_index, content_type, namespace
+                        FROM {staging_table}
+                        ORDER BY {self._conflict_target}, ord DESC
+                        ON CONFLICT ({self._conflict_target}) DO UPDATE SET
+                            content = EXCLUDED.content,
+                            embedding = EXCLUDED.embedding,
+                            metadata = EXCLUDED.metadata,
+                            updated_at = CURRENT_TIMESTAMP;
+                    """)
+            
+            elapsed = time.perf_counter() - start_time
+            stats.update({
+                'success': True,
+                'seconds': elapsed,
+                'rows_per_sec': n_rows / elapsed if elapsed > 0 else float(n_rows)
+            })
+            logger.info(f"Bulk loaded {n_rows} embeddings in {elapsed:.2f}s "
+                        f"({stats['rows_per_sec']:.0f} rows/sec)")
+            
+        except Exception as e:
+            stats['seconds'] = time.perf_counter() - start_time
+            logger.error(f"Error bulk loading embeddings: {str(e)}")
+        
+        return stats
+    
+    async def export_snapshot(self, path: str, batch_size: int = 5000) -> Dict[str, Any]:
+        """
+        Export all embeddings to a snapshot directory (see snapshot.py)
+        
+        Rows are streamed through a server-side cursor inside a read-only
+        repeatable-read transaction, so the snapshot is consistent and only
+        one batch is held in memory at a time.
+        
+        Returns:
+            Export statistics including rows/sec
+        """
+        stats = {'success': False, 'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+        columns = ", ".join(TEXT_COLUMNS + ('chunk_index', 'embedding'))
+        start_time = time.perf_counter()
+        
+        try:
+            async with self.pool.acquire() as conn:
+                # The table's declared dimension, which may differ from the one passed to initialize()
+                dimension = await conn.fetchval("""
+                    SELECT atttypmod FROM pg_attribute
+                    WHERE attrelid = to_regclass($1) AND attname = 'embedding';
+                """, self.table_name)
+                
+                writer = SnapshotWriter(path, dimension or self.dimension, source={
+                    'table': self.table_name,
+                    'storage_mode': self.storage_mode,
+                    'partition_by': self.partition_by if self._partitioned else None
+                })
+                
+                try:
+                    async with conn.transaction(isolation='repeatable_read', readonly=True):
+                        cursor = await conn.cursor(f"SELECT {columns} FROM {self.table_name};")
+                        while True:
+                            rows = await cursor.fetch(batch_size)
+                            if not rows:
+                                break
+                            writer.write_batch(
+                                np.stack([row['embedding'] for row in rows]),
+                                {name: [row[name] for row in rows] for name in TEXT_COLUMNS + ('chunk_index',)}
+                            )
+                except Exception:
+                    writer.close(complete=False)
+                    raise
+                
+                manifest = writer.close()
+            
+            elapsed = time.perf_counter() - start_time
+            stats.update({
+                'success': True,
+                'rows': manifest['rows'],
+                'seconds': elapsed,
+                'rows_per_sec': manifest['rows'] / elapsed if elapsed > 0 else float(manifest['rows'])
+            })
+            logger.info(f"Exported {stats['rows']} embeddings to {path} in {elapsed:.2f}s")
+            
+        except Exception as e:
+            stats['seconds'] = time.perf_counter() - start_time
+            logger.error(f"Error exporting snapshot: {str(e)}")
+        
+        return stats
+    
+    async def import_snapshot(self, path: str, batch_size: int = 50000) -> Dict[str, Any]:
+        """
+        Load a snapshot directory through the bulk COPY path
+        
+        Existing rows with the same ids are overwritten. The snapshot's
+        dimension must match the store's.
+        
+        Returns:
+            Import statistics including rows/sec
+        """
+        stats = {'success': False, 'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+        start_time = time.perf_counter()
+        
+        try:
+            reader = SnapshotReader(path)
+            if self.dimension and reader.dimension != self.dimension:
+                raise ValueError(f"Snapshot dimension {reader.dimension} != store dimension {self.dimension}")
+            
+            for vectors, columns in reader.iter_batches(batch_size):
+                batch_stats = await self.bulk_add_embeddings(
+                    vectors=vectors,
+                    ids=columns['id'],
+                    contents=columns['content'],
+                    metadata=columns['metadata'],
+                    source_files=columns['source_file'],
+                    chunk_indices=columns['chunk_index'],
+                    content_types=columns['content_type'],
+                    namespaces=columns['namespace']
+                )
+                if not batch_stats['success']:
+                    raise RuntimeError(f"Bulk load failed after {stats['rows']} rows")
+                stats['rows'] += len(vectors)
+            
+            elapsed = time.perf_counter() - start_time
+            stats.update({
+                'success': True,
+                'seconds': elapsed,
+                'rows_per_sec': stats['rows'] / elapsed if elapsed > 0 else float(stats['rows'])
+            })
+            logger.info(f"Imported {stats['rows']} embeddings from {path} in {elapsed:.2f}s")
+            
+        except Exception as e:
+            stats['seconds'] = time.perf_counter() - start_time
+            logger.error(f"Error importing snapshot: {str(e)}")
+        
+        return stats
+    
     async def similarity_search(self, 
                               query_embedding: List[float],
                               limit: int = 10,
                               similarity_threshold: float = 0.0,
-                              filters: Dict[str, Any] = None) -> List[VectorSearchResult]:
+                              filters: Dict[str, Any] = None,
+                              ef_search: int = None,
+                              recall_profile: str = None) -> List[VectorSearchResult]:
         """
         Perform similarity search
         
@@ -230,108 +1096,338 @@ class PgVectorStore:
             query_embedding: Query vector
             limit: Maximum number of results
             similarity_threshold: Minimum similarity score
-            filters: Additional filters (content_type, source_file, etc.)
+            filters: Additional filters (content_type, source_file, typed
+                metadata filters; see _build_filter_conditions)
+            ef_search: HNSW candidate list size for this query
+            recall_profile: Named ef_search from RECALL_PROFILES (ignored if ef_search is set)
             
         Returns:
             List of search results
         """
         try:
-            async with self.pool.acquire() as conn:
-                # Build query with optional filters
-                where_conditions = ["1 - (embedding <=> $1) >= $3"]
-                params = [query_embedding, limit, similarity_threshold]
-                param_count = 3
-                
-                if filters:
-                    if 'content_type' in filters:
-                        param_count += 1
-                        where_conditions.append(f"content_type = ${param_count}")
-                        params.append(filters['content_type'])
-                    
-                    if 'source_file' in filters:
-                        param_count += 1
-                        where_conditions.append(f"source_file = ${param_count}")
-                        params.append(filters['source_file'])
-                    
-                    if 'metadata' in filters:
-                        for key, value in filters['metadata'].items():
-                            param_count += 1
-                            where_conditions.append(f"metadata->>${param_count-1} = ${param_count}")
-                            params.extend([key, str(value)])
-                            param_count += 1
-                
-                where_clause = " AND ".join(where_conditions)
-                
-                query = f"""
-                    SELECT 
-                        id, content, metadata, source_file, chunk_index, content_type,
-                        1 - (embedding <=> $1) as similarity_score
-                    FROM {self.table_name}
-                    WHERE {where_clause}
-                    ORDER BY embedding <=> $1
-                    LIMIT $2;
-                """
-                
-                rows = await conn.fetch(query, *params)
-                
-                results = []
-                for row in rows:
-                    result = VectorSearchResult(
-                        id=row['id'],
-                        content=row['content'],
-                        metadata=row['metadata'] or {},
-                        similarity_score=float(row['similarity_score']),
-                        source_file=row['source_file'],
-                        chunk_index=row['chunk_index'],
-                        content_type=row['content_type']
-                    )
-                    results.append(result)
-                
-                logger.info(f"Found {len(results)} similar documents")
-                return results
+            strategy = await self._choose_filter_strategy(self.table_name, filters)
+            ef_search = self._resolve_ef_search(
+                self._candidate_limit(limit, strategy), ef_search, recall_profile
+            )
+            
+            async with self._search_connection(ef_search) as conn:
+                query, params = self._similarity_query(
+                    query_embedding, "$1", limit, similarity_threshold, filters, strategy
+                )
+                rows = await self._fetch(conn, query, params, hot=not filters)
+            
+            if strategy == 'post_filter':
+                if len(rows) < limit:
+                    # Too few matches survived the candidate pool; rank every match exactly
+                    async with self.pool.acquire() as conn:
+                        query, params = self._similarity_query(
+                            query_embedding, "$1", limit, similarity_threshold, filters, 'exact'
+                        )
+                        rows = await conn.fetch(query, *params)
+                else:
+                    rows = [row for row in rows if row['similarity_score'] >= similarity_threshold]
+            
+            results = [self._row_to_result(row) for row in rows]
+            
+            logger.info(f"Found {len(results)} similar documents")
+            return results
                 
         except Exception as e:
             logger.error(f"Error in similarity search: {str(e)}")
             return []
     
+    async def similarity_search_many(self,
+                                   query_embeddings: List[List[float]],
+                                   limit: int = 10,
+                                   similarity_threshold: float = 0.0,
+                                   filters: Dict[str, Any] = None,
+                                   ef_search: int = None,
+                                   recall_profile: str = None) -> List[List[VectorSearchResult]]:
+        """
+        Perform several similarity searches in one round trip
+        
+        The query vectors are sent as a single array and expanded with
+        ``unnest ... WITH ORDINALITY``; each one drives its own index-ordered
+        top-k through a ``LATERAL`` join. As in similarity_search, queries
+        whose post-filtered candidate pool comes up short of ``limit`` are
+        ranked again exactly, in one more batched round trip.
+        
+        Args:
+            query_embeddings: Query vectors
+            limit: Maximum number of results per query
+            similarity_threshold: Minimum similarity score
+            filters: Additional filters shared by all queries
+            ef_search: HNSW candidate list size for each query
+            recall_profile: Named ef_search from RECALL_PROFILES (ignored if ef_search is set)
+            
+        Returns:
+            One result list per query, in input order
+        """
+        if not query_embeddings:
+            return []
+        
+        results: List[List[VectorSearchResult]] = [[] for _ in query_embeddings]
+        
+        try:
+            strategy = await self._choose_filter_strategy(self.table_name, filters)
+            ef_search = self._resolve_ef_search(
+                self._candidate_limit(limit, strategy), ef_search, recall_profile
+            )
+            
+            async with self._search_connection(ef_search) as conn:
+                rows = await self._fetch_many(conn, list(query_embeddings), limit,
+                                              similarity_threshold, filters, strategy)
+            
+            by_query: List[list] = [[] for _ in query_embeddings]
+            for row in rows:
+                by_query[row['query_index'] - 1].append(row)
+            
+            if strategy == 'post_filter':
+                underfilled = [i for i, query_rows in enumerate(by_query) if len(query_rows) < limit]
+                if underfilled:
+                    # Too few matches survived these queries' candidate pools; rank every match exactly
+                    async with self.pool.acquire() as conn:
+                        exact_rows = await self._fetch_many(
+                            conn, [query_embeddings[i] for i in underfilled], limit,
+                            similarity_threshold, filters, 'exact'
+                        )
+                    for i in underfilled:
+                        by_query[i] = []
+                    for row in exact_rows:
+                        by_query[underfilled[row['query_index'] - 1]].append(row)
+            
+            for i, query_rows in enumerate(by_query):
+                results[i] = [self._row_to_result(row) for row in query_rows
+                              if row['similarity_score'] >= similarity_threshold]
+            
+            logger.info(f"Batched similarity search: {len(query_embeddings)} queries, "
+                        f"{sum(len(query_results) for query_results in results)} results")
+                
+        except Exception as e:
+            logger.error(f"Error in batched similarity search: {str(e)}")
+        
+        return results
+    
+    async def _fetch_many(self, conn, query_embeddings: List[Any], limit: int,
+                          similarity_threshold: float, filters: Optional[Dict[str, Any]],
+                          strategy: str) -> List[asyncpg.Record]:
+        """Nearest rows for each query vector in one statement, tagged with its 1-based query_index"""
+        nearest, params = self._similarity_query(
+            query_embeddings, "q.query_vector", limit, similarity_threshold, filters, strategy
+        )
+        
+        query = f"""
+            SELECT 
+                q.query_index,
+                hit.id, hit.content, hit.metadata, hit.source_file,
+                hit.chunk_index, hit.content_type, hit.similarity_score
+            FROM unnest($1::vector[]) WITH ORDINALITY AS q(query_vector, query_index)
+            CROSS JOIN LATERAL ({nearest}) hit
+            ORDER BY q.query_index, hit.similarity_score DESC;
+        """
+        return await self._fetch(conn, query, params, hot=not filters)
+    
+    async def _hot_statement(self, conn, query: str):
+        """
+        The connection's prepared statement for a hot query, prepared on first use
+        
+        Hot statements stay prepared for the connection's lifetime, outside
+        asyncpg's LRU statement cache, so a burst of distinct filtered queries
+        cannot evict them.
+        """
+        statement = conn.hot_statements.get(query)
+        if statement is None:
+            statement = conn.hot_statements[query] = await conn.prepare(query)
+        return statement
+    
+    async def _fetch(self, conn, query: str, params: List[Any], hot: bool = False) -> List[asyncpg.Record]:
+        """Run a query, through the connection's hot prepared statement if hot"""
+        if not hot:
+            return await conn.fetch(query, *params)
+        return await (await self._hot_statement(conn, query)).fetch(*params)
+    
+    def _build_filter_conditions(self, filters: Optional[Dict[str, Any]],
+                                 params: List[Any]) -> List[str]:
+        """
+        Compile search filters to SQL conditions, appending their values to params
+        
+        ``content_type``, ``source_file`` and ``namespace`` take a value or a
+        list of values.
+        ``metadata`` maps keys to a plain value or an operator dict:
+        
+            {'$eq': v}                          equality
+            {'$in': [v1, v2]}                   any of the values
+            {'$exists': True}                   key presence
+            {'$gt'|'$gte'|'$lt'|'$lte': v}      numeric (or text) range
+        
+        Plain values, ``$eq`` and ``$in`` compile to JSONB containment
+        (``metadata @> ...``) and ``$exists`` to ``metadata ? key``, all of
+        which the GIN index on metadata can serve.
+        """
+        
+        conditions = []
+        if not filters:
+            return conditions
+        
+        for column in ('content_type', 'source_file', 'namespace'):
+            if column not in filters:
+                continue
+            value = filters[column]
+            if isinstance(value, (list, tuple, set)):
+                params.append([str(item) for item in value])
+                conditions.append(f"{column} = ANY(${len(params)}::text[])")
+            else:
+                params.append(value)
+                conditions.append(f"{column} = ${len(params)}")
+        
+        containment = {}
+        for key, value in (filters.get('metadata') or {}).items():
+            if not isinstance(value, dict):
+                containment[key] = value
+                continue
+            
+            unsupported = set(value) - set(_RANGE_OPERATORS) - {'$eq', '$in', '$exists'}
+            if unsupported:
+                raise ValueError(f"Unsupported metadata filter operators for '{key}': {sorted(unsupported)}")
+            
+            if '$eq' in value:
+                containment[key] = value['$eq']
+            
+            if '$in' in value:
+                # OR of containments (not ANY) so the GIN index serves each value
+                alternatives = []
+                for item in value['$in']:
+                    params.append(json.dumps({key: item}, default=str))
+                    alternatives.append(f"metadata @> ${len(params)}::jsonb")
+                conditions.append(f"({' OR '.join(alternatives)})" if alternatives else "FALSE")
+            
+            if '$exists' in value:
+                params.append(key)
+                presence = f"metadata ? ${len(params)}"
+                conditions.append(presence if value['$exists'] else f"NOT ({presence})")
+            
+            for operator, sql_operator in _RANGE_OPERATORS.items():
+                if operator not in value:
+                    continue
+                bound = value[operator]
+                params.append(key)
+                key_ref = f"${len(params)}"
+                if isinstance(bound, (int, float)) and not isinstance(bound, bool):
+                    params.append(float(bound))
+                    # CASE keeps non-numeric values from reaching the cast
+                    conditions.append(
+                        f"CASE WHEN jsonb_typeof(metadata->{key_ref}) = 'number' "
+                        f"THEN (metadata->>{key_ref})::float8 END {sql_operator} ${len(params)}"
+                    )
+                else:
+                    params.append(str(bound))
+                    conditions.append(f"metadata->>{key_ref} {sql_operator} ${len(params)}")
+        
+        if containment:
+            params.append(json.dumps(containment, default=str))
+            conditions.append(f"metadata @> ${len(params)}::jsonb")
+        
+        return conditions
+    
+    def _row_to_result(self, row) -> VectorSearchResult:
+        """Convert a result row to a VectorSearchResult"""
+        return VectorSearchResult(
+            id=row['id'],
+            content=row['content'],
+            metadata=row['metadata'] or {},
+            similarity_score=float(row['similarity_score']),
+            source_file=row['source_file'],
+            chunk_index=row['chunk_index'],
+            content_type=row['content_type']
+        )
+    
     async def hybrid_search(self,
                           query_embedding: List[float],
                           query_text: str,
                           limit: int = 10,
                           vector_weight: float = 0.7,
-                          text_weight: float = 0.3) -> List[VectorSearchResult]:
+                          text_weight: float = 0.3,
+                          rrf_k: int = 60,
+                          candidate_pool: int = None,
+                          filters: Dict[str, Any] = None) -> List[VectorSearchResult]:
         """
         Hybrid search combining vector similarity and text search
         
+        Runs two index-driven top-k subqueries (HNSW over ``embedding`` and GIN
+        over ``content_tsv``) and merges them with weighted reciprocal rank
+        fusion, so neither side needs a sequential scan. Rows are carried
+        through the fusion by their full primary key, which includes the
+        partition key on a partitioned table.
+        
         Args:
             query_embedding: Query vector
             query_text: Query text for full-text search
             limit: Maximum results
-            vector_weight: Weight for vector similarity
-            text_weight: Weight for text similarity
+            vector_weight: Weight for the vector ranking
+            text_weight: Weight for the text ranking
+            rrf_k: Reciprocal rank fusion damping constant
+            candidate_pool: Candidates taken from each ranking (default: 4 * limit)
+            filters: Filters applied to both rankings, as in similarity_search;
+                a partition key filter prunes both to the matching partitions
             
         Returns:
-            Ranked search results
+            Ranked search results, scored in [0, 1] relative to a hit ranked
+            first by both searches
         """
+        candidate_pool = candidate_pool or max(limit * 4, 20)
+        
         try:
-            async with self.pool.acquire() as conn:
+            strategy = await self._choose_filter_strategy(self.table_name, filters)
+            ef_search = self._resolve_ef_search(self._candidate_limit(candidate_pool, strategy), None, None)
+            async with self._search_connection(ef_search) as conn:
+                params = [query_embedding, query_text, vector_weight, text_weight, candidate_pool, rrf_k, limit]
+                partition_filters, row_filters = self._split_partition_filters(filters)
+                partition_conditions = self._build_filter_conditions(partition_filters, params)
+                filter_conditions = self._build_filter_conditions(row_filters, params)
+                text_clause = " AND ".join(["content_tsv @@ tsq"] + partition_conditions + filter_conditions)
+                
+                key = self._conflict_target
+                nearest = self._nearest_rows_sql(
+                    self.table_name, key, "$1", "$5", filter_conditions,
+                    strategy=strategy, partition_conditions=partition_conditions
+                )
                 query = f"""
+                    WITH vector_hits AS (
+                        SELECT {key}, ROW_NUMBER() OVER (ORDER BY similarity_score DESC) AS rank
+                        FROM ({nearest}) nearest
+                    ),
+                    text_hits AS (
+                        SELECT {key}, ROW_NUMBER() OVER (ORDER BY text_rank DESC) AS rank
+                        FROM (
+                            SELECT {key}, ts_rank_cd(content_tsv, tsq) AS text_rank
+                            FROM {self.table_name}, plainto_tsquery('english', $2) tsq
+                            WHERE {text_clause}
+                            ORDER BY text_rank DESC
+                            LIMIT $5
+                        ) matches
+                    ),
+                    fused AS (
+                        SELECT {key}, SUM(score) AS combined_score
+                        FROM (
+                            SELECT {key}, $3::float8 / ($6 + rank) AS score FROM vector_hits
+                            UNION ALL
+                            SELECT {key}, $4::float8 / ($6 + rank) AS score FROM text_hits
+                        ) ranked
+                        GROUP BY {key}
+                    )
                     SELECT 
-                        id, content, metadata, source_file, chunk_index, content_type,
-                        (1 - (embedding <=> $1)) * $3 + 
-                        ts_rank(to_tsvector('english', content), plainto_tsquery('english', $2)) * $4 as combined_score,
-                        1 - (embedding <=> $1) as vector_similarity,
-                        ts_rank(to_tsvector('english', content), plainto_tsquery('english', $2)) as text_similarity
-                    FROM {self.table_name}
-                    WHERE 
-                        to_tsvector('english', content) @@ plainto_tsquery('english', $2)
-                        OR (1 - (embedding <=> $1)) > 0.1
-                    ORDER BY combined_score DESC
-                    LIMIT $5;
+                        e.id, e.content, e.metadata, e.source_file, e.chunk_index, e.content_type,
+                        fused.combined_score
+                    FROM fused
+                    JOIN {self.table_name} e USING ({key})
+                    ORDER BY fused.combined_score DESC
+                    LIMIT $7;
                 """
                 
-                rows = await conn.fetch(query, query_embedding, query_text, 
-                                      vector_weight, text_weight, limit)
+                rows = await conn.fetch(query, *params)
+                
+                # Scale so a result ranked first by both searches scores 1.0
+                max_score = (vector_weight + text_weight) / (rrf_k + 1) or 1.0
                 
                 results = []
                 for row in rows:
@@ -339,7 +1435,7 @@ class PgVectorStore:
                         id=row['id'],
                         content=row['content'],
                         metadata=row['metadata'] or {},
-                        similarity_score=float(row['combined_score']),
+                        similarity_score=float(row['combined_score']) / max_score,
                         source_file=row['source_file'],
                         chunk_index=row['chunk_index'],
                         content_type=row['content_type']
@@ -351,7 +1447,28 @@ class PgVectorStore:
         except Exception as e:
             logger.error(f"Error in hybrid search: {str(e)}")
             # Fallback to vector search only
-            return await self.similarity_search(query_embedding, limit)
+            return await self.similarity_search(query_embedding, limit, filters=filters)
+    
+    async def get_surrounding_chunks(self, source_file: str, chunk_index: int,
+                                   window_size: int, exclude_id: str = None) -> List[Dict[str, Any]]:
+        """Get the chunks of a document within window_size of chunk_index"""
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await self._fetch(conn, f"""
+                    SELECT content, chunk_index, metadata
+                    FROM {self.table_name}
+                    WHERE source_file = $1 
+                    AND chunk_index BETWEEN $2 AND $3
+                    AND id != $4
+                    ORDER BY chunk_index;
+                """, [source_file, max(0, chunk_index - window_size),
+                      chunk_index + window_size, exclude_id or ''], hot=True)
+                
+                return [dict(row) for row in rows]
+                
+        except Exception as e:
+            logger.error(f"Error getting surrounding chunks: {str(e)}")
+            return []
     
     async def add_document_record(self, file_path: str, metadata: Dict[str, Any] = None) -> int:
         """Add a document record and return its ID"""
@@ -364,6 +1481,7 @@ class PgVectorStore:
                     INSERT INTO documents (file_path, file_name, file_size, metadata)
                     VALUES ($1, $2, $3, $4)
                     ON CONFLICT (file_path) DO UPDATE SET
+                        file_size = EXCLUDED.file_size,
                         processed_at = CURRENT_TIMESTAMP,
                         metadata = EXCLUDED.metadata
                     RETURNING id;
@@ -388,6 +1506,34 @@ class PgVectorStore:
         except Exception as e:
             logger.error(f"Error updating chunk count: {str(e)}")
     
+    async def get_document_manifest(self, path_prefix: str = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Recorded state of ingested documents, keyed by file path
+        
+        Each entry holds the document metadata written at ingestion
+        (file_size, mtime_ns and content_hash among it) plus chunk_count.
+        path_prefix limits the result to paths starting with it.
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch("""
+                    SELECT file_path, file_size, chunk_count, metadata FROM documents
+                    WHERE $1::text IS NULL OR left(file_path, length($1::text)) = $1::text;
+                """, path_prefix)
+                
+                manifest = {}
+                for row in rows:
+                    metadata = row['metadata'] or {}
+                    if isinstance(metadata, str):
+                        metadata = json.loads(metadata)
+                    manifest[row['file_path']] = {'file_size': row['file_size'], **metadata,
+                                                  'chunk_count': row['chunk_count']}
+                return manifest
+                
+        except Exception as e:
+            logger.error(f"Error getting document manifest: {str(e)}")
+            return {}
+    
     async def get_document_stats(self) -> Dict[str, Any]:
         """Get statistics about stored documents"""
         try:
@@ -423,6 +1569,93 @@ class PgVectorStore:
             logger.error(f"Error getting document stats: {str(e)}")
             return {}
     
+    async def get_index_stats(self) -> Dict[str, Any]:
+        """Get on-disk sizes of the indexes on the embeddings and patterns tables"""
+        try:
+            async with self.pool.acquire() as conn:
+                partitions = await self._list_partitions(conn) if self._partitioned else []
+                rows = await conn.fetch("""
+                    SELECT
+                        c.relname AS table_name,
+                        i.relname AS index_name,
+                        pg_relation_size(i.oid) AS size_bytes
+                    FROM pg_index x
+                    JOIN pg_class c ON c.oid = x.indrelid
+                    JOIN pg_class i ON i.oid = x.indexrelid
+                    WHERE c.relname = ANY($1::text[])
+                    ORDER BY size_bytes DESC;
+                """, [self.table_name, 'context_patterns'] + partitions)
+                
+                return {
+                    'storage_mode': self.storage_mode,
+                    'vector_index': self._vector_index_name(self.table_name),
+                    'partition_by': self.partition_by if self._partitioned else None,
+                    'partitions': partitions,
+                    'indexes': {
+                        row['index_name']: {
+                            'table': row['table_name'],
+                            'size_bytes': row['size_bytes']
+                        }
+                        for row in rows
+                    }
+                }
+                
+        except Exception as e:
+            logger.error(f"Error getting index stats: {str(e)}")
+            return {}
+    
+    async def get_chunk_ids(self, source_file: str) -> Dict[str, int]:
+        """Ids of a document's stored chunks, mapped to their chunk index"""
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT id, chunk_index FROM {self.table_name} WHERE source_file = $1;
+                """, source_file)
+                return {row['id']: row['chunk_index'] for row in rows}
+                
+        except Exception as e:
+            logger.error(f"Error getting chunk ids: {str(e)}")
+            return {}
+    
+    async def delete_chunks(self, source_file: str, ids: List[str]) -> bool:
+        """Delete specific chunks of a document"""
+        if not ids:
+            return True
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(f"""
+                    DELETE FROM {self.table_name} WHERE source_file = $1 AND id = ANY($2::text[]);
+                """, source_file, list(ids))
+                
+                logger.info(f"Deleted {len(ids)} chunks of {source_file}")
+                return True
+                
+        except Exception as e:
+            logger.error(f"Error deleting chunks: {str(e)}")
+            return False
+    
+    async def update_chunk_positions(self, source_file: str, ids: List[str],
+                                   chunk_indices: List[int], metadata: List[Any]) -> bool:
+        """Update where stored chunks now sit in their document, keeping their embeddings"""
+        if not ids:
+            return True
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(f"""
+                    UPDATE {self.table_name} AS t SET
+                        chunk_index = u.chunk_index,
+                        metadata = u.metadata::jsonb,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM unnest($2::text[], $3::int[], $4::text[]) AS u(id, chunk_index, metadata)
+                    WHERE t.source_file = $1 AND t.id = u.id;
+                """, source_file, list(ids), [int(i) for i in chunk_indices],
+                    [serialize_metadata(m) for m in metadata])
+                return True
+                
+        except Exception as e:
+            logger.error(f"Error updating chunk positions: {str(e)}")
+            return False
+    
     async def delete_document(self, source_file: str) -> bool:
         """Delete all chunks for a specific document"""
         try:
@@ -444,6 +1677,10 @@ class PgVectorStore:
     
     async def close(self):
         """Close the connection pool"""
+        for task in self._index_build_tasks:
+            task.cancel()
+        self._index_build_tasks = []
+        
         if self.pool:
             await self.pool.close()
             logger.info("Closed vector store connection pool")
@@ -475,23 +1712,18 @@ class ContextAwareVectorStore(PgVectorStore):
         """Find similar context patterns"""
         try:
             async with self.pool.acquire() as conn:
-                where_clause = ""
+                filter_conditions = []
                 params = [query_embedding, limit]
                 
                 if pattern_type:
-                    where_clause = "WHERE pattern_type = $3"
+                    filter_conditions.append("pattern_type = $3")
                     params.append(pattern_type)
                 
-                query = f"""
-                    SELECT 
-                        pattern_name, pattern_type, metadata,
-                        success_count, usage_count,
-                        1 - (embedding <=> $1) as similarity
-                    FROM context_patterns
-                    {where_clause}
-                    ORDER BY embedding <=> $1
-                    LIMIT $2;
-                """
+                query = self._nearest_rows_sql(
+                    "context_patterns",
+                    "pattern_name, pattern_type, metadata, success_count, usage_count",
+                    "$1", "$2", filter_conditions, score_alias="similarity"
+                )
                 
                 rows = await conn.fetch(query, *params)
                 return [dict(row) for row in rows]
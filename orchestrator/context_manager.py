@@ -150,49 +150,35 @@ class CodeAnalyzer:
             return None
     
     async def _analyze_python_code(self, file_path: str, content: str) -> CodeContext:
-        """Analyze Python code specifically"""
-        import ast
+        """Analyze Python code specifically (shares the chunker's cached parse)"""
+        from context_engineering.code_parsing import parse_python_source
         
-        try:
-            tree = ast.parse(content)
-            
-            functions = []
-            classes = []
-            imports = []
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    functions.append(node.name)
-                elif isinstance(node, ast.ClassDef):
-                    classes.append(node.name)
-                elif isinstance(node, ast.Import):
-                    for alias in node.names:
-                        imports.append(alias.name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        imports.append(node.module)
-            
-            # Calculate complexity (simplified)
-            complexity_score = len(functions) * 0.1 + len(classes) * 0.2 + len(imports) * 0.05
-            
-            # Extract dependencies from imports
-            dependencies = [imp for imp in imports if not imp.startswith('.')]
-            
-            return CodeContext(
-                file_path=file_path,
-                content=content,
-                language='python',
-                functions=functions,
-                classes=classes,
-                imports=imports,
-                dependencies=dependencies,
-                complexity_score=complexity_score,
-                last_modified=datetime.fromtimestamp(os.path.getmtime(file_path))
-            )
-            
-        except SyntaxError as e:
-            logger.warning(f"Syntax error in Python file {file_path}: {str(e)}")
+        parsed = parse_python_source(content)
+        if parsed.syntax_error is not None:
+            logger.warning(f"Syntax error in Python file {file_path}: {parsed.syntax_error}")
             return await self._analyze_generic_code(file_path, content, 'python')
+        
+        functions = list(parsed.functions)
+        classes = list(parsed.classes)
+        imports = list(parsed.imports)
+        
+        # Calculate complexity (simplified)
+        complexity_score = len(functions) * 0.1 + len(classes) * 0.2 + len(imports) * 0.05
+        
+        # Extract dependencies from imports
+        dependencies = [imp for imp in imports if not imp.startswith('.')]
+        
+        return CodeContext(
+            file_path=file_path,
+            content=content,
+            language='python',
+            functions=functions,
+            classes=classes,
+            imports=imports,
+            dependencies=dependencies,
+            complexity_score=complexity_score,
+            last_modified=datetime.fromtimestamp(os.path.getmtime(file_path))
+        )
     
     async def _analyze_js_code(self, file_path: str, content: str, language: str) -> CodeContext:
         """Analyze JavaScript/TypeScript code"""
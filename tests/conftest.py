@@ -2,11 +2,16 @@
 """
 Test configuration and fixtures
 """
+import sys
 import pytest
 import httpx
 import asyncio
+from pathlib import Path
 from typing import AsyncGenerator
 
+# Unit tests import the orchestrator's packages (context_engineering, ...) directly
+sys.path.insert(0, str(Path(__file__).parent.parent / "orchestrator"))
+
 # Base URL for API tests
 BASE_URL = "http://localhost:8000"
 
@@ -0,0 +1,156 @@
+"""
+Text splitter and chunker tests
+"""
+import io
+import random
+
+import pytest
+
+from context_engineering.chunking import (
+    ContentDefinedTextSplitter, Document, DocumentChunker, RecursiveCharacterTextSplitter
+)
+
+WORDS = ["alpha", "be", "c", "delta\n", "\n\n", "x" * 50, "  ", "\n", "\nclass ", "\n\n\n", " "]
+SEPARATOR_SETS = [None, [" "], ["\n"], ["\nclass ", "\n", " "], ["\n\n", " "]]
+
+def _reference_split(text, chunk_size, chunk_overlap, length_function=len, separators=None):
+    """The splitter's original string-concatenating algorithm, kept as the behavioural reference"""
+    separators = separators or ["\n\n", "\n", " ", ""]
+    if length_function(text) <= chunk_size:
+        return [text]
+    separator = next(separator for separator in separators if separator in text)
+
+    chunks, current = [], ""
+    for split in text.split(separator):
+        candidate = current + separator + split if current else split
+        if length_function(candidate) <= chunk_size:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        if chunk_overlap > 0 and current:
+            overlap = current[-chunk_overlap:]
+            current = overlap + separator + split if overlap else split
+        else:
+            current = split
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _random_cases(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        text = ''.join(rng.choice(WORDS) + (' ' if rng.random() < 0.3 else '')
+                       for _ in range(rng.randint(0, 300)))
+        chunk_size = rng.randint(1, 300)
+        chunk_overlap = rng.choice([0, rng.randint(0, chunk_size - 1)])
+        yield text, chunk_size, chunk_overlap, rng.choice(SEPARATOR_SETS), rng
+
+def test_split_text_matches_the_reference_algorithm():
+    compared = 0
+    for text, chunk_size, chunk_overlap, separators, rng in _random_cases(1500):
+        # A non-len measure takes the generic merge path instead of the separator search
+        length_function = rng.choice([len, lambda value: len(value)])
+        splitter = RecursiveCharacterTextSplitter(chunk_size, chunk_overlap, length_function, separators)
+        # Texts without any separator fall through to fixed-size splitting, outside the reference
+        if len(text) > chunk_size and not any(separator and separator in text
+                                              for separator in (separators or ["\n\n", "\n", " "])):
+            continue
+        expected = _reference_split(text, chunk_size, chunk_overlap, length_function, separators)
+        assert splitter.split_text(text) == expected, (text, chunk_size, chunk_overlap, separators)
+        compared += 1
+    assert compared > 1000
+
+def test_spans_are_offsets_into_the_text():
+    for text, chunk_size, chunk_overlap, separators, _ in _random_cases(300, seed=11):
+        splitter = RecursiveCharacterTextSplitter(chunk_size, chunk_overlap, separators=separators)
+        spans = splitter.split_spans(text)
+
+        assert [text[start:end] for start, end in spans] == splitter.split_text(text)
+        if text:
+            assert all(0 <= start < end <= len(text) for start, end in spans)
+        else:
+            assert spans == [(0, 0)]
+        assert [start for start, _ in spans] == sorted(start for start, _ in spans)
+
+def test_split_documents_records_offsets():
+    text = "first paragraph here\n\nsecond paragraph\n\nthird one is a little longer"
+    splitter = RecursiveCharacterTextSplitter(chunk_size=30, chunk_overlap=0)
+
+    chunks = splitter.split_documents([Document(page_content=text, metadata={'source': 'a.md'})])
+
+    assert [chunk.page_content for chunk in chunks] == [
+        "first paragraph here", "second paragraph", "third one is a little longer"
+    ]
+    for chunk in chunks:
+        assert chunk.metadata['source'] == 'a.md'
+        assert text[chunk.metadata['start_offset']:chunk.metadata['end_offset']] == chunk.page_content
+
+@pytest.mark.parametrize('window_size', [1, 7, 64])
+def test_stream_spans_are_valid_slices(window_size):
+    for text, chunk_size, chunk_overlap, separators, _ in _random_cases(200, seed=window_size):
+        splitter = RecursiveCharacterTextSplitter(chunk_size, chunk_overlap, separators=separators)
+        for start, end, chunk in splitter.split_stream(io.StringIO(text).read, window_size=window_size):
+            assert text[start:end] == chunk
+
+def test_stream_within_one_window_matches_in_memory():
+    for text, chunk_size, chunk_overlap, separators, _ in _random_cases(300, seed=5):
+        splitter = RecursiveCharacterTextSplitter(chunk_size, chunk_overlap, separators=separators)
+        streamed = splitter.split_stream(io.StringIO(text).read, window_size=len(text) + 10)
+        assert [chunk for _, _, chunk in streamed] == splitter.split_text(text)
+
+def _prose(words: int, seed: int = 3) -> str:
+    rng = random.Random(seed)
+    vocabulary = ['vector', 'index', 'chunk', 'embedding', 'query', 'store', 'filter', 'batch',
+                  'token', 'model', 'cache', 'stream', 'offset', 'manifest', 'pipeline']
+    return ' '.join(rng.choice(vocabulary) + ('.\n' if rng.random() < 0.08 else '') for _ in range(words))
+
+def test_content_defined_spans_tile_the_text():
+    text = _prose(6000)
+    splitter = ContentDefinedTextSplitter(chunk_size=500)
+    spans = splitter.split_spans(text)
+
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+    assert all(end - start <= 500 for start, end in spans)
+    streamed = [(start, end) for start, end, _ in splitter.split_stream(io.StringIO(text).read, window_size=700)]
+    assert streamed == spans
+
+@pytest.mark.parametrize('chunk_size', [16, 64, 65, 66, 67, 68])
+def test_content_defined_small_chunk_sizes(chunk_size):
+    text = _prose(400)
+    chunker = DocumentChunker(chunk_size=chunk_size, chunk_overlap=0, min_chunk_size=1, content_defined=True)
+    spans = chunker.content_splitter.split_spans(text)
+
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    assert all(0 < end - start <= chunk_size for start, end in spans)
+    assert chunker.chunk_document(text, 'notes.txt')
+
+def test_content_defined_ids_survive_an_insertion():
+    text = _prose(6000)
+    # A new passage a few chunks long, so the chunks after it move to later indices
+    position = text.index('\n', len(text) // 2) + 1
+    edited = text[:position] + _prose(300, seed=9) + '\n' + text[position:]
+
+    def chunk_ids(chunker, content):
+        return [chunk['id'] for chunk in chunker.chunk_document(content, 'notes.txt')]
+
+    chunker = DocumentChunker(chunk_size=500, chunk_overlap=0, content_defined=True)
+    before, after = chunk_ids(chunker, text), chunk_ids(chunker, edited)
+    kept = set(before) & set(after)
+    assert len(before) > 20
+    assert len(before) - len(kept) <= 2  # only the chunks at the edit change
+
+    # Default ids embed the chunk index: everything after the insertion gets a new id
+    positional = DocumentChunker(chunk_size=500, chunk_overlap=0)
+    before, after = chunk_ids(positional, text), chunk_ids(positional, edited)
+    assert len(set(before) & set(after)) <= len(before) // 2 + 1
+
+def test_content_defined_ids_number_repeated_chunks():
+    chunker = DocumentChunker(chunk_size=500, chunk_overlap=0, content_defined=True)
+    block = "def handler(event):\n    return process(event)\n"
+    ids = [chunk['id'] for chunk in chunker.chunk_code_file(block + "\n\n" + block, 'handlers.py')]
+
+    assert len(ids) == 2 and ids[1] == ids[0] + '_1'
+    assert ids == [chunk['id'] for chunk in chunker.chunk_code_file(block + "\n\n" + block, 'handlers.py')]
+    assert chunker._generate_chunk_id('a.py', 0, 'x') != chunker._generate_chunk_id('b.py', 0, 'x')
@@ -0,0 +1,65 @@
+"""
+Python source parsing and parse cache tests
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+from context_engineering.code_parsing import ParseCache
+
+ORCHESTRATOR = Path(__file__).parent.parent / "orchestrator"
+
+SOURCE = '''import os
+from typing import List
+
+@decorator
+class Widget:
+    def size(self) -> int:
+        return 1
+
+def build(parts: List[str]):
+    for part in parts:
+        print(part)
+'''
+
+def test_importing_code_parsing_skips_heavy_dependencies():
+    script = (
+        "import sys\n"
+        "from context_engineering.code_parsing import parse_python_source\n"
+        "print(sorted(name for name in ('asyncpg', 'numpy', 'sentence_transformers', 'openai') if name in sys.modules))\n"
+    )
+    output = subprocess.run([sys.executable, '-c', script], cwd=ORCHESTRATOR,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[]'
+
+def test_outline_line_ranges_and_names():
+    parsed = ParseCache().parse(SOURCE)
+
+    widget, build = [node for node in parsed.module.children if node.kind != 'statement']
+    assert (widget.kind, widget.name, widget.start_line, widget.end_line) == ('class', 'Widget', 4, 7)
+    assert [(child.kind, child.name) for child in widget.children] == [('method', 'size')]
+    assert (build.kind, build.start_line, build.end_line) == ('function', 9, 11)
+    assert parsed.functions == ['build', 'size']
+    assert parsed.classes == ['Widget']
+    assert parsed.imports == ['os', 'typing']
+    assert SOURCE[slice(*parsed.span(9, 11))] == SOURCE[SOURCE.index('def build'):]
+
+def test_cache_hits_and_eviction():
+    cache = ParseCache(max_entries=2)
+
+    first = cache.parse(SOURCE)
+    assert cache.parse(SOURCE) is first
+    cache.parse('x = 1\n')
+    cache.parse('y = 2\n')  # evicts SOURCE, the least recently used
+
+    assert cache.parse(SOURCE) is not first
+    stats = cache.get_stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (2, 1, 4)
+    assert stats['hit_rate'] == 0.2
+
+def test_syntax_errors_are_cached():
+    cache = ParseCache()
+    parsed = cache.parse('def broken(:\n')
+
+    assert parsed.module is None and parsed.syntax_error
+    assert cache.parse('def broken(:\n') is parsed
@@ -0,0 +1,98 @@
+"""
+Context retriever batching tests
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from context_engineering.context_retriever import ContextRetriever, RetrievalConfig
+from context_engineering.local_store import LocalVectorStore
+
+DIMENSION = 8
+TOPICS = ['vector index', 'chunk splitter', 'embedding cache', 'query planner']
+
+def _vector(text: str) -> np.ndarray:
+    seed = sum(ord(character) for character in text.split(':')[0])
+    return np.random.default_rng(seed).normal(size=DIMENSION).astype(np.float32)
+
+class FakeEmbeddingGenerator:
+    """Embeds a text by its topic (the part before ':'), counting calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate_embeddings(self, texts, metadata=None):
+        self.calls.append(list(texts))
+        return [{'text': text, 'embedding': _vector(text).tolist()} for text in texts]
+
+@pytest.fixture
+def retriever(tmp_path):
+    async def build():
+        store = LocalVectorStore(str(tmp_path))
+        await store.initialize(DIMENSION)
+        ids, contents, types = [], [], []
+        for i, topic in enumerate(TOPICS):
+            for content_type in ('code', 'markdown'):
+                ids.append(f"{topic.replace(' ', '-')}_{content_type}")
+                contents.append(f"{topic}: notes on the {topic} as {content_type} number {i}")
+                types.append(content_type)
+        await store.bulk_add_embeddings(
+            vectors=np.stack([_vector(content) for content in contents]),
+            ids=ids,
+            contents=contents,
+            metadata=[{} for _ in ids],
+            source_files=[f"{chunk_id}.txt" for chunk_id in ids],
+            chunk_indices=[0] * len(ids),
+            content_types=types
+        )
+        return store
+
+    store = asyncio.run(build())
+    calls = {'similarity_search': 0, 'similarity_search_many': 0}
+    for name in calls:
+        method = getattr(store, name)
+
+        async def counted(*args, _name=name, _method=method, **kwargs):
+            calls[_name] += 1
+            return await _method(*args, **kwargs)
+
+        setattr(store, name, counted)
+
+    config = RetrievalConfig(max_results=3, similarity_threshold=0.5, context_window_size=1)
+    yield ContextRetriever(store, FakeEmbeddingGenerator(), config), calls
+    asyncio.run(store.close())
+
+def test_batch_runs_each_search_strategy_once(retriever):
+    retriever, calls = retriever
+    queries = [f"{topic}: how does it work" for topic in TOPICS]
+
+    results = asyncio.run(retriever.retrieve_context_batch(queries, task_type='code_generation'))
+
+    assert retriever.embedding_generator.calls == [queries]
+    assert calls == {'similarity_search': 0, 'similarity_search_many': 2}
+    for topic, query_results in zip(TOPICS, results):
+        assert query_results and query_results[0].content.startswith(topic)
+
+def test_single_query_matches_the_batch(retriever):
+    retriever, calls = retriever
+    queries = [f"{topic}: where is it used" for topic in TOPICS]
+    filters = {'source_file': [f"{topic.replace(' ', '-')}_markdown.txt" for topic in TOPICS]}
+
+    batched = asyncio.run(retriever.retrieve_context_batch(queries, filters=filters))
+    single = [asyncio.run(retriever.retrieve_context(query, filters=filters)) for query in queries]
+
+    def summary(results):
+        return [(result.chunk_id, round(result.relevance_score, 6)) for result in results]
+
+    assert [summary(results) for results in batched] == [summary(results) for results in single]
+    assert all(result.context_type == 'markdown' for results in batched for result in results)
+    assert calls['similarity_search'] == 0
+
+def test_task_filters_do_not_leak_into_the_callers_filters(retriever):
+    retriever, _ = retriever
+    filters = {'namespace': 'default'}
+
+    asyncio.run(retriever.retrieve_context('vector index: search', task_type='documentation', filters=filters))
+
+    assert filters == {'namespace': 'default'}
@@ -0,0 +1,99 @@
+"""
+Embedding micro-batcher tests
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from context_engineering.embedding_batcher import EmbeddingBatcher
+
+class FakeEmbedder:
+    """Embeds 'tN' as [N, N]; records the texts of every call"""
+
+    def __init__(self, drop_last: bool = False):
+        self.calls = []
+        self.drop_last = drop_last
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        if 'fail' in texts:
+            raise RuntimeError('model failure')
+        rows = texts[:-1] if self.drop_last else texts
+        return np.array([[float(text[1:])] * 2 for text in rows], dtype=np.float32)
+
+def _texts(*numbers):
+    return [f"t{number}" for number in numbers]
+
+def _run(batcher, requests):
+    async def run():
+        try:
+            return await asyncio.gather(*(batcher.embed(texts) for texts in requests), return_exceptions=True)
+        finally:
+            await batcher.close()
+    return asyncio.run(run())
+
+def test_concurrent_requests_share_a_call_and_get_their_own_slices():
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=16, max_wait_ms=50)
+    requests = [_texts(1, 2), _texts(3), _texts(4, 5, 6)]
+
+    results = _run(batcher, requests)
+
+    assert embedder.calls == [_texts(1, 2, 3, 4, 5, 6)]
+    assert [result[:, 0].tolist() for result in results] == [[1, 2], [3], [4, 5, 6]]
+    stats = batcher.stats()
+    assert (stats['batches'], stats['requests'], stats['mean_requests_per_batch']) == (1, 3, 3.0)
+
+def test_requests_are_never_split_across_batches():
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=4, max_wait_ms=50)
+    requests = [_texts(1, 2), _texts(3, 4, 5), _texts(6), _texts(7, 8)]
+
+    results = _run(batcher, requests)
+
+    assert embedder.calls == [_texts(1, 2), _texts(3, 4, 5, 6), _texts(7, 8)]
+    assert [result[:, 0].tolist() for result in results] == [[1, 2], [3, 4, 5], [6], [7, 8]]
+    assert batcher.stats()['max_observed_batch_size'] == 4
+
+def test_full_batches_bypass_the_queue():
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=2)
+
+    (result,) = _run(batcher, [_texts(1, 2, 3)])
+
+    assert result[:, 0].tolist() == [1, 2, 3]
+    assert batcher.batches == 0 and embedder.calls == [_texts(1, 2, 3)]
+
+def test_batch_failures_reach_every_caller():
+    batcher = EmbeddingBatcher(FakeEmbedder(), max_wait_ms=50)
+
+    results = _run(batcher, [_texts(1), ['fail']])
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_short_results_are_an_error():
+    batcher = EmbeddingBatcher(FakeEmbedder(drop_last=True), max_wait_ms=50)
+
+    results = _run(batcher, [_texts(1), _texts(2)])
+
+    assert all(isinstance(result, RuntimeError) and 'Embedded 1 of 2' in str(result) for result in results)
+
+def test_close_cancels_queued_requests():
+    async def run():
+        release = asyncio.Event()
+
+        async def blocked(texts):
+            await release.wait()
+
+        batcher = EmbeddingBatcher(blocked, max_wait_ms=0)
+        first = asyncio.ensure_future(batcher.embed(_texts(1)))
+        await asyncio.sleep(0.01)  # the worker is now inside the model call
+        second = asyncio.ensure_future(batcher.embed(_texts(2)))
+        await asyncio.sleep(0)
+        await batcher.close()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        first.cancel()
+
+    asyncio.run(run())
@@ -0,0 +1,50 @@
+"""
+Content-addressed embedding cache tests
+"""
+import numpy as np
+
+from context_engineering.embedding_cache import EmbeddingCache, cache_key
+
+def test_keys_depend_on_model_and_text():
+    assert cache_key('model-a', 'text') == cache_key('model-a', 'text')
+    assert cache_key('model-a', 'text') != cache_key('model-b', 'text')
+    assert len(cache_key('model-a', 'text')) == 64
+
+def test_memory_hits_and_misses():
+    cache = EmbeddingCache()
+    cache.put_many('m', ['a', 'b'], [[1.0, 2.0], np.array([3.0, 4.0], dtype=np.float64)])
+
+    first, second, missing, repeated = cache.get_many('m', ['a', 'b', 'c', 'a'])
+
+    assert first.tolist() == [1.0, 2.0] and second.dtype == np.float32
+    assert missing is None and repeated is first
+    assert not first.flags.writeable
+    assert cache.get_many('other-model', ['a']) == [None]
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (3, 0, 2)
+    assert stats['hit_rate'] == 0.6
+
+def test_lru_evicts_least_recently_used():
+    cache = EmbeddingCache(max_memory_entries=2)
+    cache.put_many('m', ['a', 'b'], [[1.0], [2.0]])
+    cache.get_many('m', ['a'])  # 'b' is now the least recently used
+    cache.put_many('m', ['c'], [[3.0]])
+
+    assert [vector is not None for vector in cache.get_many('m', ['a', 'b', 'c'])] == [True, False, True]
+    assert cache.stats()['evictions'] == 1
+
+def test_disk_entries_survive_a_restart(tmp_path):
+    path = tmp_path / 'cache' / 'embeddings.sqlite'
+    cache = EmbeddingCache(str(path))
+    cache.put_many('m', ['a', 'b'], [[1.0, 2.0], [3.0, 4.0]])
+    cache.close()
+
+    reopened = EmbeddingCache(str(path), max_memory_entries=1)
+    vectors = reopened.get_many('m', ['b', 'x', 'b'])
+
+    assert vectors[0].tolist() == [3.0, 4.0] and vectors[1] is None and vectors[2] is vectors[0]
+    assert reopened.get_many('m', ['b'])[0] is vectors[0]  # promoted into memory
+    stats = reopened.stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (1, 2, 1)
+    assert (stats['memory_entries'], stats['disk_entries']) == (1, 2)
+    reopened.close()
@@ -0,0 +1,120 @@
+"""
+Embedding generator input preparation tests
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+import numpy as np
+from transformers import BertTokenizer, BertTokenizerFast
+
+from context_engineering import embeddings
+from context_engineering.embeddings import EmbeddingConfig, EmbeddingGenerator, create_embedding_generator
+
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta']
+
+@pytest.fixture
+def vocab_file(tmp_path):
+    path = tmp_path / 'vocab.txt'
+    path.write_text('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + WORDS) + '\n')
+    return str(path)
+
+@pytest.fixture
+def generator(monkeypatch):
+    """Generator without a model; tests install a tokenizer and sequence length"""
+    monkeypatch.setattr(EmbeddingGenerator, '_initialize_model', lambda self: None)
+    return EmbeddingGenerator(EmbeddingConfig(cache_embeddings=False))
+
+@pytest.mark.parametrize('tokenizer_class', [BertTokenizer, BertTokenizerFast])
+def test_long_texts_are_truncated_to_the_token_budget(generator, vocab_file, tokenizer_class):
+    generator._tokenizer = tokenizer_class(vocab_file)
+    generator._max_seq_length = 6  # 4 tokens after [CLS] and [SEP]
+    texts = [' '.join(WORDS), 'beta gamma', 'alpha']
+
+    prepared, order = generator._bucket_by_length(texts)
+
+    assert list(order) == [2, 1, 0]
+    assert prepared == ['alpha', 'beta gamma', 'alpha beta gamma delta']
+    assert generator._padding_stats['truncated_texts'] == 1
+    assert generator._padding_stats['real_tokens'] == (1 + 2 + 4) + 3 * 2
+
+def test_texts_are_sorted_by_length_without_a_tokenizer(generator):
+    prepared, order = generator._bucket_by_length(['ccc', 'a', 'bb'])
+
+    assert prepared == ['a', 'bb', 'ccc']
+    assert list(order) == [1, 2, 0]
+
+class FakeOnnxModel:
+    """Reads the export manifest like OnnxEmbeddingModel, without ONNX Runtime"""
+
+    def __init__(self, model_dir, quantized=True, intra_op_threads=0):
+        with open(f"{model_dir}/{embeddings.EXPORT_MANIFEST}") as f:
+            self.manifest = json.load(f)
+        self.model_dir = model_dir
+
+    def get_sentence_embedding_dimension(self):
+        return self.manifest['dimension']
+
+@pytest.fixture
+def onnx_exports(tmp_path, monkeypatch):
+    """ONNX_MODEL_DIR holding one export; tests set its int8 parity"""
+    monkeypatch.setenv('ONNX_MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(embeddings, 'OnnxEmbeddingModel', FakeOnnxModel)
+    monkeypatch.setattr(embeddings, 'SentenceTransformer', lambda name: pytest.fail('fell back to PyTorch'))
+    model_dir = tmp_path / 'all-MiniLM-L6-v2'
+    model_dir.mkdir()
+
+    def export(min_cosine):
+        manifest = {'dimension': 384, 'parity': {'int8': {'min_cosine': min_cosine}}}
+        (model_dir / embeddings.EXPORT_MANIFEST).write_text(json.dumps(manifest))
+        return str(model_dir)
+
+    return export
+
+def test_factory_loads_the_default_onnx_export(onnx_exports):
+    model_dir = onnx_exports(0.995)
+
+    generator = create_embedding_generator('onnx')
+
+    assert generator.config.model_name == 'all-MiniLM-L6-v2'
+    assert isinstance(generator.model, FakeOnnxModel) and generator.model.model_dir == model_dir
+
+def test_onnx_parity_failures_are_not_masked(onnx_exports):
+    onnx_exports(0.9)
+
+    with pytest.raises(ValueError, match='parity threshold'):
+        EmbeddingGenerator(EmbeddingConfig(model_type='onnx', cache_embeddings=False))
+
+def test_missing_onnx_export_is_an_error(tmp_path, onnx_exports):
+    config = EmbeddingConfig(model_type='onnx', onnx_model_dir=str(tmp_path / 'none'), onnx_export=False,
+                             cache_embeddings=False)
+
+    with pytest.raises(FileNotFoundError):
+        EmbeddingGenerator(config)
+
+@pytest.mark.parametrize('on_disk', [False, True])
+def test_disk_cache_calls_leave_the_event_loop(tmp_path, monkeypatch, on_disk):
+    monkeypatch.setattr(EmbeddingGenerator, '_initialize_model', lambda self: None)
+    monkeypatch.delenv('EMBEDDING_CACHE_PATH', raising=False)
+    cache_path = str(tmp_path / 'cache.db') if on_disk else None
+    generator = EmbeddingGenerator(EmbeddingConfig(cache_path=cache_path))
+    cache = generator._embedding_cache
+    threads = []
+    for name in ('get_many', 'put_many'):
+        def traced(*args, _method=getattr(cache, name)):
+            threads.append(threading.get_ident())
+            return _method(*args)
+        setattr(cache, name, traced)
+
+    async def generate(texts):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    async def run():
+        await generator._generate_cached(['a', 'b'], generate)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert len(threads) == 2
+    assert all((thread != loop_thread) == on_disk for thread in threads)
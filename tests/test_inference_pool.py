@@ -0,0 +1,102 @@
+"""
+Inference pool shared-memory lifetime tests
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from context_engineering import inference_pool
+from context_engineering.inference_pool import SentenceTransformerPool
+
+DIMENSION = 4
+
+class FakeModel:
+    """Encodes a text as its length; 'slow' texts take a while, 'bad' texts fail"""
+
+    def __init__(self):
+        self.finished = []
+        self.release = threading.Event()
+
+    def encode(self, texts, **kwargs):
+        if 'bad' in texts:
+            raise RuntimeError('model failure')
+        if 'slow' in texts:
+            self.release.wait(5)
+        self.finished.append(list(texts))
+        return np.array([[len(text)] * DIMENSION for text in texts], dtype=np.float32)
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Two-slice pool running workers in threads, so they share the fake model"""
+    model = FakeModel()
+    monkeypatch.setattr(inference_pool, '_WORKER_MODEL', model)
+    blocks = []
+    real_shared_memory = shared_memory.SharedMemory
+
+    def tracked(*args, **kwargs):
+        block = real_shared_memory(*args, **kwargs)
+        if kwargs.get('create'):
+            blocks.append(block.name)
+        return block
+
+    monkeypatch.setattr(inference_pool.shared_memory, 'SharedMemory', tracked)
+    pool = SentenceTransformerPool('fake', DIMENSION, workers=2, batch_size=1)
+    pool._executor = ThreadPoolExecutor(2)
+    yield pool, model, blocks
+    model.release.set()
+    pool.shutdown()
+
+def _unlinked(name: str) -> bool:
+    try:
+        shared_memory.SharedMemory(name=name).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_encode_fills_rows_in_order(pool):
+    pool, model, blocks = pool
+    model.release.set()
+
+    matrix = asyncio.run(pool.encode(['a', 'bb', 'ccc']))
+
+    assert matrix.tolist() == [[1.0] * DIMENSION, [2.0] * DIMENSION, [3.0] * DIMENSION]
+    assert _unlinked(blocks[0])
+
+def test_failed_slice_waits_for_the_others(pool):
+    pool, model, blocks = pool
+    threading.Timer(0.2, model.release.set).start()
+
+    with pytest.raises(RuntimeError, match='model failure'):
+        asyncio.run(pool.encode(['bad', 'slow']))
+
+    # The slow slice was still writing when the other failed; it must have finished cleanly
+    assert model.finished == [['slow']]
+    assert _unlinked(blocks[0])
+
+def test_cancelled_caller_keeps_block_until_workers_finish(pool):
+    pool, model, blocks = pool
+
+    async def run():
+        task = asyncio.create_task(pool.encode(['slow', 'slow']))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert not _unlinked(blocks[0])
+
+    model.release.set()
+    assert _wait_for(lambda: len(model.finished) == 2)
+    assert _wait_for(lambda: _unlinked(blocks[0]))
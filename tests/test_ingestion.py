@@ -0,0 +1,271 @@
+"""
+Directory ingestion tests against the local vector store
+"""
+import asyncio
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+from context_engineering.chunking import DocumentChunker
+from context_engineering.ingestion_cli import DocumentIngestionPipeline
+from context_engineering.ingestion_engine import PipelineConfig
+from context_engineering.local_store import LocalVectorStore
+
+DIMENSION = 8
+
+def _vector(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:4], 'little')
+    return np.random.default_rng(seed).normal(size=DIMENSION).astype(np.float32)
+
+class FakeEmbedder:
+    """Deterministic encode_matrix; fails any call including a chunk containing fail_on"""
+
+    def __init__(self):
+        self.calls = []
+        self.fail_on = None
+
+    async def encode_matrix(self, texts):
+        self.calls.append(list(texts))
+        if self.fail_on and any(self.fail_on in text for text in texts):
+            raise RuntimeError('embedding failed')
+        return np.stack([_vector(text) for text in texts])
+
+    @property
+    def embedded(self):
+        return [text for call in self.calls for text in call]
+
+def _paragraphs(name: str, count: int) -> str:
+    return '\n\n'.join(f"{name} paragraph {i} " + 'word ' * 12 for i in range(count))
+
+@pytest.fixture
+def ingest(tmp_path):
+    """
+    ingest(**pipeline options) runs ingest_directory on tmp_path/docs
+
+    Each run opens the store on its own event loop, like a separate CLI run;
+    ingest.store_hook(store) may wrap store methods first.
+    """
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    embedder = FakeEmbedder()
+
+    def run(stream_threshold=0, chunk_workers=1, incremental=True, **config):
+        chunker = DocumentChunker(chunk_size=120, chunk_overlap=0, min_chunk_size=10)
+        options = {'embed_batch_size': 4, 'batch_timeout': 0.01, 'report_interval': 0, **config}
+
+        async def session(store):
+            run.store_hook(store)
+            pipeline = DocumentIngestionPipeline(store, embedder, chunker, stream_threshold=stream_threshold,
+                                                 stream_batch_size=3, chunk_workers=chunk_workers,
+                                                 pipeline_config=PipelineConfig(**options), incremental=incremental)
+            return await pipeline.ingest_directory(str(docs))
+
+        return run.query(session)
+
+    def query(action):
+        async def opened():
+            store = LocalVectorStore(str(tmp_path / 'store'))
+            await store.initialize(DIMENSION)
+            try:
+                return await action(store)
+            finally:
+                await store.close()
+        return asyncio.run(opened())
+
+    run.docs, run.embedder, run.query, run.store_hook = docs, embedder, query, lambda store: None
+    return run
+
+def _manifest(ingest):
+    return ingest.query(lambda store: store.get_document_manifest(str(ingest.docs)))
+
+def _chunk_ids(ingest, path):
+    return ingest.query(lambda store: store.get_chunk_ids(str(path)))
+
+def test_emptied_streamed_file_is_recorded(ingest):
+    large = ingest.docs / 'large.txt'
+    large.write_text(_paragraphs('large', 30))
+    first = ingest(stream_threshold=1000)
+    assert (first['processed_files'], first['total_chunks']) == (1, 30)
+
+    large.write_text(' \n' * 1000)  # still above the stream threshold, but no chunks
+    emptied = ingest(stream_threshold=1000)
+    again = ingest(stream_threshold=1000)
+
+    assert (emptied['processed_files'], emptied['total_chunks']) == (1, 0)
+    assert _chunk_ids(ingest, large) == {}
+    assert _manifest(ingest)[str(large)]['chunk_count'] == 0
+    assert (again['processed_files'], again['skipped_files']) == (0, 1)
+
+def _write_files(ingest, count: int, paragraphs: int = 3):
+    for i in range(count):
+        (ingest.docs / f"file{i:02d}.md").write_text(_paragraphs(f"file{i:02d}", paragraphs))
+
+def _stored(ingest):
+    """{file name: sorted stored chunk ids} for every file in the docs directory"""
+    return {path.name: sorted(_chunk_ids(ingest, path)) for path in sorted(ingest.docs.iterdir())}
+
+def test_batches_span_file_boundaries(ingest):
+    _write_files(ingest, 10)
+
+    results = ingest(read_concurrency=3)
+
+    assert (results['processed_files'], results['total_chunks'], results['embedded_chunks']) == (10, 30, 30)
+    assert results['failed_files'] == []
+    # Three-chunk files packed into four-chunk batches
+    assert all(len(call) == 4 for call in ingest.embedder.calls[:-1])
+    assert any(len({text.split(' ')[0] for text in call}) > 1 for call in ingest.embedder.calls)
+    assert sorted(ingest.embedder.embedded) == sorted(_paragraphs(f"file{i:02d}", 3).split('\n\n')[j]
+                                                      for i in range(10) for j in range(3))
+    assert all(len(ids) == 3 for ids in _stored(ingest).values())
+    assert results['stages']['embed']['items'] == 30 and results['stages']['store']['items'] == 30
+
+def _assert_failures_isolated(ingest, results, bad: str):
+    failed = {path.rsplit('/', 1)[-1] for path in results['failed_files']}
+    manifest = _manifest(ingest)
+    stored = _stored(ingest)
+
+    assert bad in failed
+    assert results['processed_files'] == 10 - len(failed)
+    for name, ids in stored.items():
+        recorded = str(ingest.docs / name) in manifest
+        if name in failed:
+            assert not recorded  # retried by the next run
+        else:
+            assert recorded and len(ids) == 3
+    return failed
+
+def test_failed_embed_batch_fails_only_its_files(ingest):
+    _write_files(ingest, 10)
+    ingest.embedder.fail_on = 'file04 paragraph 1'
+
+    failed = _assert_failures_isolated(ingest, ingest(), 'file04.md')
+    assert len(failed) <= 4  # at most the files sharing that four-chunk call
+
+    ingest.embedder.fail_on = None
+    retry = ingest()
+    assert (retry['processed_files'], retry['skipped_files']) == (len(failed), 10 - len(failed))
+    assert retry['failed_files'] == []
+    assert all(len(ids) == 3 for ids in _stored(ingest).values())
+
+def test_failed_store_batch_fails_only_its_files(ingest):
+    _write_files(ingest, 10)
+
+    def fail_file07(store):
+        add_embeddings = store.add_embeddings
+
+        async def failing_add(embeddings, ids, **columns):
+            if any(chunk_id.startswith('file07') for chunk_id in ids):
+                return False
+            return await add_embeddings(embeddings, ids=ids, **columns)
+
+        store.add_embeddings = failing_add
+
+    ingest.store_hook = fail_file07
+    failed = _assert_failures_isolated(ingest, ingest(store_concurrency=1), 'file07.md')
+    assert len(failed) <= 4
+
+def test_pooled_chunking_matches_in_process(ingest):
+    _write_files(ingest, 12, paragraphs=2)
+    pooled = ingest(chunk_workers=2)
+    pooled_chunks = _stored(ingest)
+
+    in_process = ingest(chunk_workers=1, incremental=False)
+
+    assert (pooled['processed_files'], pooled['total_chunks'], pooled['failed_files']) == (12, 24, [])
+    assert in_process['embedded_chunks'] == 0  # same ids, so every chunk was reused
+    assert _stored(ingest) == pooled_chunks
+
+def test_byte_budget_caps_bytes_in_flight():
+    from context_engineering.ingestion_engine import _ByteBudget
+
+    async def run():
+        budget = _ByteBudget(100)
+        await budget.acquire(60)
+        waiting = asyncio.create_task(budget.acquire(60))
+        await asyncio.sleep(0.01)
+        assert not waiting.done() and budget.used == 60
+
+        await budget.release(60)
+        await waiting
+        assert budget.used == 60
+        await budget.release(60)
+
+        await budget.acquire(500)  # an oversized item passes when nothing else is held
+        assert budget.used == 500
+
+    asyncio.run(run())
+
+def test_tiny_read_ahead_budget_still_ingests_everything(ingest):
+    _write_files(ingest, 6)
+
+    results = ingest(read_ahead_bytes=1, read_concurrency=4)
+
+    assert (results['processed_files'], results['total_chunks'], results['failed_files']) == (6, 18, [])
+
+def test_unchanged_files_are_skipped_unread(ingest):
+    _write_files(ingest, 5)
+    ingest()
+    calls = len(ingest.embedder.calls)
+
+    results = ingest()
+
+    assert (results['processed_files'], results['skipped_files']) == (0, 5)
+    assert results['stages']['read']['items'] == 0
+    assert len(ingest.embedder.calls) == calls
+
+@pytest.mark.parametrize('chunk_workers', [1, 2])
+def test_touched_files_are_re_recorded_without_embedding(ingest, chunk_workers):
+    _write_files(ingest, 3)
+    ingest(chunk_workers=chunk_workers)
+    touched = ingest.docs / 'file01.md'
+    stat = touched.stat()
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    calls = len(ingest.embedder.calls)
+
+    touched_run = ingest(chunk_workers=chunk_workers)
+    next_run = ingest(chunk_workers=chunk_workers)
+
+    assert (touched_run['processed_files'], touched_run['skipped_files']) == (0, 3)
+    assert touched_run['stages']['read']['items'] == 1  # hashed, then found unchanged
+    assert _manifest(ingest)[str(touched)]['mtime_ns'] == stat.st_mtime_ns + 5_000_000_000
+    assert _manifest(ingest)[str(touched)]['chunk_count'] == 3
+    assert next_run['stages']['read']['items'] == 0
+    assert len(ingest.embedder.calls) == calls
+
+def test_changed_file_re_embeds_only_changed_chunks(ingest):
+    _write_files(ingest, 3)
+    ingest()
+    changed = ingest.docs / 'file02.md'
+    paragraphs = changed.read_text().split('\n\n')
+    paragraphs[-1] = 'file02 the last paragraph was rewritten ' + 'term ' * 12
+    changed.write_text('\n\n'.join(paragraphs))
+    before = _chunk_ids(ingest, changed)
+    embedded = len(ingest.embedder.embedded)
+
+    results = ingest()
+
+    assert (results['processed_files'], results['skipped_files']) == (1, 2)
+    assert (results['total_chunks'], results['embedded_chunks']) == (3, 1)
+    assert ingest.embedder.embedded[embedded:] == [paragraphs[-1]]
+    after = _chunk_ids(ingest, changed)
+    assert len(after) == 3 and len(set(before) & set(after)) == 2
+
+def test_removed_files_are_deleted(ingest):
+    _write_files(ingest, 3)
+    (ingest.docs / 'sub').mkdir()
+    (ingest.docs / 'sub' / 'nested.md').write_text(_paragraphs('nested', 2))
+    ingest()
+    removed = ingest.docs / 'file00.md'
+    nested = ingest.docs / 'sub' / 'nested.md'
+    removed.unlink()
+    nested.unlink()
+
+    results = ingest()
+
+    assert (results['deleted_files'], results['skipped_files']) == (2, 2)
+    manifest = _manifest(ingest)
+    assert str(removed) not in manifest and str(nested) not in manifest and len(manifest) == 2
+    assert _chunk_ids(ingest, removed) == {} and _chunk_ids(ingest, nested) == {}
+    assert ingest()['deleted_files'] == 0
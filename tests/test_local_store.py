@@ -0,0 +1,192 @@
+"""
+Local vector store tests
+"""
+import asyncio
+import inspect
+import sqlite3
+
+import numpy as np
+import pytest
+
+from context_engineering.local_store import LocalVectorStore
+from context_engineering.vector_store import PgVectorStore
+
+DIMENSION = 8
+
+# Partition management and read-only connect only exist for the Postgres table layout
+PG_ONLY_METHODS = {'add_partition', 'connect', 'migrate_to_partitioned'}
+
+def _vectors(n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n, DIMENSION)).astype(np.float32)
+
+async def _open(path) -> LocalVectorStore:
+    store = LocalVectorStore(str(path))
+    await store.initialize(DIMENSION)
+    return store
+
+async def _add(store: LocalVectorStore, vectors: np.ndarray, ids, source_file='a.py', content_type='code'):
+    return await store.bulk_add_embeddings(
+        vectors=vectors,
+        ids=list(ids),
+        contents=[f"content of {chunk_id}" for chunk_id in ids],
+        metadata=[{'position': i} for i in range(len(ids))],
+        source_files=[source_file] * len(ids),
+        chunk_indices=list(range(len(ids))),
+        content_types=[content_type] * len(ids)
+    )
+
+def _fail_writes(store: LocalVectorStore, table: str, action: str):
+    """Make every later statement of one kind on a table abort inside SQLite"""
+    store._db.execute(f"""
+        CREATE TRIGGER fail_{action.lower()}_{table} BEFORE {action} ON {table}
+        BEGIN SELECT RAISE(ABORT, 'disk I/O error'); END
+    """)
+
+def test_public_api_matches_pg_vector_store():
+    def public(cls):
+        return {name: function for name, function in inspect.getmembers(cls, inspect.isfunction)
+                if not name.startswith('_')}
+
+    pg_methods, local_methods = public(PgVectorStore), public(LocalVectorStore)
+    assert set(pg_methods) - PG_ONLY_METHODS <= set(local_methods)
+    for name in set(pg_methods) - PG_ONLY_METHODS:
+        assert inspect.iscoroutinefunction(pg_methods[name]) == inspect.iscoroutinefunction(local_methods[name]), name
+        assert list(inspect.signature(pg_methods[name]).parameters) == \
+            list(inspect.signature(local_methods[name]).parameters), name
+
+def test_search_and_reopen(tmp_path):
+    vectors = _vectors(20)
+
+    async def run():
+        store = await _open(tmp_path)
+        assert (await _add(store, vectors[:10], [f"a{i}" for i in range(10)]))['success']
+        assert (await _add(store, vectors[10:], [f"b{i}" for i in range(10)], 'b.md', 'markdown'))['success']
+
+        hits = await store.similarity_search(vectors[3], limit=3)
+        filtered = await store.similarity_search(vectors[3], limit=3, filters={'content_type': 'markdown'})
+        batched = await store.similarity_search_many([vectors[3], vectors[15]], limit=3)
+        await store.close()
+
+        reopened = await _open(tmp_path)
+        reopened_hits = await reopened.similarity_search(vectors[3], limit=3)
+        await reopened.close()
+        return hits, filtered, batched, reopened_hits
+
+    hits, filtered, batched, reopened_hits = asyncio.run(run())
+    assert hits[0].id == 'a3' and hits[0].similarity_score == pytest.approx(1.0, abs=1e-5)
+    assert hits[0].metadata == {'position': 3}
+    assert all(hit.content_type == 'markdown' for hit in filtered)
+    assert [batch[0].id for batch in batched] == ['a3', 'b5']
+    assert [hit.id for hit in reopened_hits] == [hit.id for hit in hits]
+
+def test_upsert_replaces_row(tmp_path):
+    vectors = _vectors(3)
+
+    async def run():
+        store = await _open(tmp_path)
+        await _add(store, vectors[:2], ['x', 'y'])
+        await _add(store, vectors[2:], ['x'])
+        hits = await store.similarity_search(vectors[2], limit=5)
+        stats = await store.get_document_stats()
+        await store.close()
+
+        reopened = await _open(tmp_path)
+        reopened_hits = await reopened.similarity_search(vectors[2], limit=5)
+        await reopened.close()
+        return hits, stats, reopened_hits
+
+    hits, stats, reopened_hits = asyncio.run(run())
+    assert stats['total_chunks'] == 2
+    assert hits[0].id == 'x' and hits[0].similarity_score == pytest.approx(1.0, abs=1e-5)
+    assert sorted(hit.id for hit in reopened_hits) == ['x', 'y']
+    assert reopened_hits[0].id == 'x'
+
+def test_failed_add_leaves_memory_unchanged(tmp_path):
+    vectors = _vectors(4)
+
+    async def run():
+        store = await _open(tmp_path)
+        await _add(store, vectors[:2], ['x', 'y'])
+        _fail_writes(store, 'chunks', 'INSERT')
+        stats = await _add(store, vectors[2:], ['x', 'z'])
+        hits = await store.similarity_search(vectors[0], limit=5)
+        ids = await store.get_chunk_ids('a.py')
+        await store.close()
+        return stats, hits, ids
+
+    stats, hits, ids = asyncio.run(run())
+    assert not stats['success']
+    assert ids == {'x': 0, 'y': 1}
+    assert hits[0].id == 'x' and hits[0].similarity_score == pytest.approx(1.0, abs=1e-5)
+
+def test_failed_delete_leaves_memory_unchanged(tmp_path):
+    async def run():
+        store = await _open(tmp_path)
+        await _add(store, _vectors(3), ['x', 'y', 'z'])
+        _fail_writes(store, 'chunks', 'DELETE')
+        deleted_chunks = await store.delete_chunks('a.py', ['x'])
+        deleted_document = await store.delete_document('a.py')
+        ids = await store.get_chunk_ids('a.py')
+        await store.close()
+        return deleted_chunks, deleted_document, ids
+
+    deleted_chunks, deleted_document, ids = asyncio.run(run())
+    assert not deleted_chunks and not deleted_document
+    assert set(ids) == {'x', 'y', 'z'}
+
+def test_chunk_and_document_maintenance(tmp_path):
+    source = tmp_path / 'a.py'
+    source.write_text('print(1)\n')
+
+    async def run():
+        store = await _open(tmp_path / 'store')
+        await _add(store, _vectors(3), ['x', 'y', 'z'], str(source))
+        await store.add_document_record(str(source), {'mtime_ns': 1, 'content_hash': 'abc'})
+        await store.update_document_chunk_count(str(source), 3)
+
+        assert await store.delete_chunks(str(source), ['y'])
+        assert await store.update_chunk_positions(str(source), ['z'], [1], [{'moved': True}])
+        ids = await store.get_chunk_ids(str(source))
+        manifest = await store.get_document_manifest(str(tmp_path))
+        moved = (await store.get_surrounding_chunks(str(source), 1, 0))[0]['metadata']
+
+        assert await store.delete_document(str(source))
+        after = await store.get_document_manifest(), await store.get_chunk_ids(str(source))
+        await store.close()
+        return ids, manifest, moved, after
+
+    ids, manifest, moved, after = asyncio.run(run())
+    assert ids == {'x': 0, 'z': 1}
+    assert manifest[str(source)] == {'file_size': 9, 'mtime_ns': 1, 'content_hash': 'abc', 'chunk_count': 3}
+    assert moved == {'moved': True}
+    assert after == ({}, {})
+
+def test_sidecar_calls_leave_the_event_loop(tmp_path, monkeypatch):
+    threads = set()
+    real_to_thread = asyncio.to_thread
+
+    async def to_thread(function, *args, **kwargs):
+        threads.add(getattr(function, '__name__', repr(function)))
+        return await real_to_thread(function, *args, **kwargs)
+
+    monkeypatch.setattr(asyncio, 'to_thread', to_thread)
+
+    async def run():
+        store = await _open(tmp_path)
+        await _add(store, _vectors(2), ['x', 'y'])
+        await store.get_document_manifest()
+        await store.close()
+
+    asyncio.run(run())
+    assert {'_open', 'write', 'read', 'close'} <= threads
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    async def run():
+        store = await _open(tmp_path)
+        await store.close()
+        await LocalVectorStore(str(tmp_path)).initialize(DIMENSION * 2)
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+    assert sqlite3.connect(str(tmp_path / 'metadata.sqlite')).execute(
+        "SELECT value FROM settings WHERE key = 'dimension'").fetchone() == (str(DIMENSION),)
@@ -0,0 +1,193 @@
+"""
+OpenAI dispatcher rate limiter, retry and failure tests
+"""
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from openai import AsyncOpenAI
+
+from context_engineering import openai_dispatcher
+from context_engineering.benchmarks.openai_dispatch_bench import StubEmbeddingServer
+from context_engineering.embeddings import EmbeddingConfig, EmbeddingGenerator
+from context_engineering.openai_dispatcher import EmbeddingBatchError, OpenAIEmbeddingDispatcher, RateLimiter
+
+class FakeClock:
+    """Monotonic clock advanced only by (patched) asyncio.sleep"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Run the limiter on simulated time"""
+    fake = FakeClock()
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        fake.now += max(seconds, 0.0)
+        await real_sleep(0)
+
+    monkeypatch.setattr(openai_dispatcher.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(openai_dispatcher.asyncio, 'sleep', sleep)
+    return fake
+
+def _grant_times(clock: FakeClock, limiter: RateLimiter, tokens: int, seconds: float):
+    """Simulated times at which back-to-back requests of a fixed size are granted"""
+    async def run():
+        times = []
+        start = clock.now
+        while clock.now - start < seconds:
+            await limiter.acquire(tokens)
+            times.append(clock.now - start)
+        return times
+    return asyncio.run(run())
+
+def _max_per_window(times, size, window=60.0):
+    """Largest number of tokens granted in any window of the given length"""
+    return max(sum(size for t in times if start <= t < start + window) for start in times)
+
+def test_requests_larger_than_burst_are_charged_in_full(clock):
+    """10k-token requests under a 60k TPM limit stay within the limit"""
+    limiter = RateLimiter(tokens_per_minute=60000)
+    times = _grant_times(clock, limiter, tokens=10000, seconds=600)
+
+    # One request of overshoot at most (it is granted on a full burst and paid afterwards)
+    assert _max_per_window(times, 10000) <= 60000 + 10000
+    tokens_per_minute = len(times) * 10000 / 10
+    assert 54000 <= tokens_per_minute <= 66000
+
+def test_small_requests_flow_at_the_limit(clock):
+    """Requests below the burst size are granted at the configured rate"""
+    limiter = RateLimiter(requests_per_minute=120, tokens_per_minute=60000)
+    times = _grant_times(clock, limiter, tokens=100, seconds=300)
+
+    # 120 RPM binds before 60k TPM (120 x 100 = 12k tokens per minute)
+    assert _max_per_window(times, 1) <= 120 + 2
+    assert 115 * 5 <= len(times) <= 125 * 5
+
+def test_unbounded_limiter_never_waits(clock):
+    """Without limits acquire returns immediately"""
+    limiter = RateLimiter()
+    asyncio.run(limiter.acquire(10 ** 6))
+    assert limiter.waited_seconds == 0.0
+
+def test_pause_holds_back_callers(clock):
+    """pause() delays the next request by the pause length"""
+    limiter = RateLimiter(requests_per_minute=6000)
+    limiter.pause(5.0)
+    start = clock.now
+    asyncio.run(limiter.acquire(0))
+    assert clock.now - start == pytest.approx(5.0)
+
+DIMENSION = 8
+
+class ScriptedServer(StubEmbeddingServer):
+    """Stub endpoint that plays scripted error responses, then fails inputs containing fail_on"""
+
+    def __init__(self, script=(), fail_on=None):
+        super().__init__(dimension=DIMENSION, latency_ms=0, rpm=0, error_rate=0)
+        self.script = list(script)
+        self.fail_on = fail_on
+        self.inputs = []
+
+    async def _respond(self, request):
+        self.inputs.append(list(request['input']))
+        if self.script:
+            status, headers = self.script.pop(0)
+            return status, headers, {'error': {'message': status, 'type': 'server_error', 'code': None}}
+        if self.fail_on and any(self.fail_on in text for text in request['input']):
+            return "500 Internal Server Error", [], {'error': {'message': 'down', 'type': 'server_error', 'code': None}}
+        return await super()._respond(request)
+
+def _dispatch(server, texts, **options):
+    """Embed texts through a dispatcher talking to server; returns (embeddings or error, dispatcher, seconds)"""
+    async def run():
+        base_url = await server.start()
+        client = AsyncOpenAI(api_key='stub', base_url=base_url, max_retries=0)
+        dispatcher = OpenAIEmbeddingDispatcher(client, **{'backoff_base': 0.01, **options})
+        start = time.perf_counter()
+        try:
+            result = await dispatcher.embed(texts)
+        except EmbeddingBatchError as e:
+            result = e
+        finally:
+            await client.close()
+            await server.stop()
+        return result, dispatcher, time.perf_counter() - start
+    return asyncio.run(run())
+
+@pytest.mark.parametrize('header', ['retry-after-ms: 300', 'retry-after: 0.3'])
+def test_rate_limits_are_retried_after_the_requested_delay(header):
+    server = ScriptedServer([("429 Too Many Requests", [header])])
+
+    # Without Retry-After the backoff would be 5-10 seconds
+    embeddings, dispatcher, seconds = _dispatch(server, ['a', 'b'], backoff_base=10.0)
+
+    assert embeddings.shape == (2, DIMENSION) and np.all(np.any(embeddings, axis=1))
+    assert (dispatcher.requests, dispatcher.retries, dispatcher.rate_limited) == (2, 1, 1)
+    assert 0.3 <= seconds < 3.0
+
+def test_server_errors_are_retried_with_backoff():
+    server = ScriptedServer([("500 Internal Server Error", []), ("503 Service Unavailable", [])])
+
+    embeddings, dispatcher, _ = _dispatch(server, ['a', 'b', 'c'], batch_size=3)
+
+    assert embeddings.shape == (3, DIMENSION)
+    assert (dispatcher.requests, dispatcher.retries, dispatcher.rate_limited) == (3, 2, 0)
+    assert server.inputs == [['a', 'b', 'c']] * 3
+
+def test_client_errors_are_not_retried():
+    server = ScriptedServer([("400 Bad Request", [])])
+
+    error, dispatcher, _ = _dispatch(server, ['a'])
+
+    assert isinstance(error, EmbeddingBatchError) and error.failed.tolist() == [True]
+    assert (dispatcher.requests, dispatcher.retries) == (1, 0)
+
+def test_failed_batches_raise_without_placeholder_vectors():
+    server = ScriptedServer(fail_on='bad')
+    texts = ['a', 'b', 'bad', 'c', 'd', 'e']
+
+    error, dispatcher, _ = _dispatch(server, texts, batch_size=2, max_concurrency=2, max_retries=1)
+
+    assert isinstance(error, EmbeddingBatchError)
+    assert error.failed.tolist() == [False, False, True, True, False, False]
+    assert [(start, end) for start, end, _ in error.errors] == [(2, 4)]
+    assert np.all(np.any(error.embeddings[~error.failed], axis=1))
+    assert (dispatcher.failed_batches, dispatcher.retries) == (1, 1)
+
+def test_only_successful_rows_are_cached(monkeypatch):
+    server = ScriptedServer(fail_on='bad')
+    monkeypatch.setenv('OPENAI_API_KEY', 'stub')
+    monkeypatch.delenv('EMBEDDING_CACHE_PATH', raising=False)
+    texts = ['a', 'b', 'bad', 'c']
+
+    async def run():
+        config = EmbeddingConfig(model_type='openai', openai_base_url=await server.start(), batch_size=2,
+                                 openai_max_retries=0, openai_requests_per_minute=0, openai_tokens_per_minute=0)
+        generator = EmbeddingGenerator(config)
+        try:
+            with pytest.raises(EmbeddingBatchError):
+                await generator.encode_matrix(texts)
+            assert await generator.generate_embeddings(texts) == []  # no zero vectors either
+            cached = generator._embedding_cache.get_many(generator._cache_model_key, texts)
+
+            server.fail_on = None
+            server.inputs.clear()
+            embeddings = await generator.encode_matrix(texts)
+        finally:
+            await generator.openai_client.close()
+            await server.stop()
+        return cached, embeddings
+
+    cached, embeddings = asyncio.run(run())
+
+    assert [vector is not None for vector in cached] == [True, True, False, False]
+    assert server.inputs == [['bad', 'c']]  # only the failed batch is regenerated
+    assert embeddings.shape == (4, DIMENSION)
+    np.testing.assert_array_equal(embeddings[:2], np.stack(cached[:2]))
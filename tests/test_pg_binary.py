@@ -0,0 +1,146 @@
+"""
+PostgreSQL binary COPY encoder and vector codec tests
+"""
+import asyncio
+import json
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+from context_engineering.pg_binary import (
+    COPY_HEADER, EMBEDDING_COPY_COLUMNS, decode_vector, embedding_columns_from_dicts, encode_embedding_copy_rows,
+    encode_vector, register_vector_codec, serialize_metadata
+)
+
+def _parse_copy(stream: bytes):
+    """Decode a binary COPY stream of embedding rows as PostgreSQL reads it"""
+    assert stream.startswith(COPY_HEADER)
+    position = len(COPY_HEADER)
+    rows = []
+    while True:
+        (field_count,) = struct.unpack_from('>h', stream, position)
+        position += 2
+        if field_count == -1:
+            assert position == len(stream)
+            return rows
+        assert field_count == len(EMBEDDING_COPY_COLUMNS)
+
+        fields = []
+        for _ in range(field_count):
+            (length,) = struct.unpack_from('>i', stream, position)
+            position += 4
+            fields.append(None if length == -1 else stream[position:position + length])
+            position += max(length, 0)
+
+        row = dict(zip(EMBEDDING_COPY_COLUMNS, fields))
+        dimension, unused = struct.unpack_from('>hh', row['embedding'])
+        assert unused == 0 and len(row['embedding']) == 4 + 4 * dimension
+        assert row['metadata'][:1] == b'\x01'  # jsonb version byte
+        rows.append({
+            'id': row['id'].decode(),
+            'content': row['content'].decode(),
+            'embedding': np.frombuffer(row['embedding'], dtype='>f4', offset=4).astype(np.float32),
+            'metadata': json.loads(row['metadata'][1:].decode()),
+            'source_file': row['source_file'].decode(),
+            'chunk_index': struct.unpack('>i', row['chunk_index'])[0],
+            'content_type': row['content_type'].decode(),
+            'namespace': row['namespace'].decode()
+        })
+
+@dataclass
+class Position:
+    line: int
+
+def test_copy_stream_round_trip():
+    vectors = np.random.default_rng(0).normal(size=(5, 3)).astype(np.float32)
+    stream = b''.join(encode_embedding_copy_rows(
+        vectors,
+        ids=[f"id{i}" for i in range(5)],
+        contents=['héllo', None, 'c', 'd', 'e'],
+        metadata=[{'k': i} for i in range(4)] + [Position(line=7)],
+        source_files=['a.py', None, 'b.py', 'b.py', 'c.md'],
+        chunk_indices=[0, 1, None, 3, 2 ** 31 - 1],
+        content_types=['code', None, 'code', 'code', 'markdown'],
+        namespaces=None,
+        rows_per_chunk=2
+    ))
+
+    rows = _parse_copy(stream)
+
+    assert [row['id'] for row in rows] == ['id0', 'id1', 'id2', 'id3', 'id4']
+    np.testing.assert_array_equal(np.stack([row['embedding'] for row in rows]), vectors)
+    assert rows[0]['content'] == 'héllo' and rows[1]['content'] == ''
+    assert rows[4]['metadata'] == {'line': 7}
+    assert [row['chunk_index'] for row in rows] == [0, 1, 0, 3, 2 ** 31 - 1]
+    assert rows[1]['source_file'] == '' and rows[1]['content_type'] == 'text'
+    assert {row['namespace'] for row in rows} == {'default'}
+
+def test_copy_stream_is_yielded_in_row_chunks():
+    vectors = np.zeros((5, 2), dtype=np.float32)
+    columns = dict(ids=list('abcde'), contents=list('abcde'), metadata=[{}] * 5, source_files=[''] * 5,
+                   chunk_indices=range(5), content_types=['text'] * 5)
+
+    chunks = list(encode_embedding_copy_rows(vectors, **columns, rows_per_chunk=2))
+
+    assert len(chunks) == 3
+    assert chunks[0].startswith(COPY_HEADER) and chunks[-1].endswith(struct.pack('>h', -1))
+    assert len(_parse_copy(b''.join(chunks))) == 5
+
+def test_columns_from_dicts_match_copy_columns():
+    columns = embedding_columns_from_dicts([
+        {'id': 'x', 'text': 'body', 'embedding': [1.0, 2.0], 'metadata': {'a': 1}},
+        {'id': 'y', 'content': 'other', 'embedding': [3.0, 4.0], 'namespace': 'team'}
+    ])
+
+    assert columns['vectors'].dtype == np.float32 and columns['vectors'].shape == (2, 2)
+    assert columns['contents'] == ['body', 'other']
+    assert columns['namespaces'] == ['default', 'team']
+    assert len(_parse_copy(b''.join(encode_embedding_copy_rows(**columns)))) == 2
+
+def test_serialize_metadata():
+    assert serialize_metadata(None) == '{}'
+    assert serialize_metadata('{"raw": true}') == '{"raw": true}'
+    assert json.loads(serialize_metadata(Position(line=3))) == {'line': 3}
+    assert json.loads(serialize_metadata({'path': Position(line=1)})) == {'path': 'Position(line=1)'}
+
+@pytest.mark.parametrize('value', [
+    np.array([0.5, -1.25, 3.0], dtype=np.float32),
+    np.arange(1536, dtype=np.float64) / 7,
+    [1, 2, 3],
+    []
+])
+def test_vector_codec_round_trip(value):
+    data = encode_vector(value)
+
+    assert struct.unpack_from('>hh', data) == (len(value), 0)
+    decoded = decode_vector(data)
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, np.asarray(value, dtype=np.float32))
+
+def test_vector_codec_rejects_matrices():
+    with pytest.raises(ValueError, match='1-D'):
+        encode_vector(np.zeros((2, 3)))
+
+class FakeConnection:
+    def __init__(self, schema):
+        self.schema = schema
+        self.codecs = {}
+
+    async def fetchval(self, query):
+        return self.schema
+
+    async def set_type_codec(self, name, **kwargs):
+        self.codecs[name] = kwargs
+
+def test_register_vector_codec():
+    conn = FakeConnection('extensions')
+    asyncio.run(register_vector_codec(conn))
+
+    codec = conn.codecs['vector']
+    assert (codec['schema'], codec['format']) == ('extensions', 'binary')
+    assert codec['encoder'] is encode_vector and codec['decoder'] is decode_vector
+
+    with pytest.raises(ValueError, match='pgvector'):
+        asyncio.run(register_vector_codec(FakeConnection(None)))
@@ -0,0 +1,76 @@
+"""
+Cosine similarity and top-k kernel tests
+"""
+import numpy as np
+import pytest
+
+from context_engineering.similarity import (
+    apply_domain_weights, cosine_matrix, cosine_top_k, cosine_top_k_many, normalize_rows, top_k_indices
+)
+
+def _data(rows: int, dimension: int = 8, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(rows, dimension)).astype(np.float32)
+
+def _brute_cosine(a, b):
+    return np.array([[x @ y / (np.linalg.norm(x) * np.linalg.norm(y)) for y in b] for x in a])
+
+def test_cosine_matrix_matches_pairwise_cosine():
+    a, b = _data(5), _data(7, seed=1)
+
+    np.testing.assert_allclose(cosine_matrix(a, b), _brute_cosine(a, b), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(cosine_matrix(normalize_rows(a), normalize_rows(b), normalized=True),
+                               cosine_matrix(a, b), rtol=1e-6)
+    assert cosine_matrix(a[0], b).shape == (1, 7)
+
+def test_zero_rows_stay_zero():
+    matrix = np.array([[0.0, 0.0], [3.0, 4.0]])
+
+    np.testing.assert_allclose(normalize_rows(matrix), [[0.0, 0.0], [0.6, 0.8]], rtol=1e-6)
+    assert cosine_matrix(matrix, matrix)[0].tolist() == [0.0, 0.0]
+
+@pytest.mark.parametrize('k', [0, 1, 5, 49, 50, 80])
+def test_top_k_indices_matches_a_full_sort(k):
+    scores = np.random.default_rng(k).normal(size=(3, 50))
+
+    indices = top_k_indices(scores, k)
+
+    expected = np.argsort(-scores, axis=-1)[:, :min(k, 50)]
+    assert indices.shape == (3, min(k, 50))
+    np.testing.assert_array_equal(indices, expected)
+
+def test_top_k_indices_with_ties_keeps_the_best_scores():
+    scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0, 0.0])
+
+    indices = top_k_indices(scores, 3)
+
+    assert sorted(indices.tolist()) == [1, 2, 4]
+    assert top_k_indices(scores, 6).tolist() == [1, 2, 4, 3, 0, 5]  # stable among equals
+
+def test_cosine_top_k_matches_brute_force():
+    query, matrix = _data(1, seed=2)[0], _data(200)
+
+    indices, similarities = cosine_top_k(query, matrix, 10)
+
+    brute = _brute_cosine([query], matrix)[0]
+    np.testing.assert_array_equal(indices, np.argsort(-brute)[:10])
+    np.testing.assert_allclose(similarities, brute[indices], rtol=1e-5)
+
+def test_cosine_top_k_many_blocks_match_single_queries():
+    queries, matrix = _data(13, seed=3), _data(40)
+
+    indices, similarities = cosine_top_k_many(queries, matrix, k=4, block_rows=5)
+
+    assert indices.shape == similarities.shape == (13, 4)
+    for row, query in enumerate(queries):
+        single_indices, single_similarities = cosine_top_k(query, matrix, 4)
+        np.testing.assert_array_equal(indices[row], single_indices)
+        np.testing.assert_allclose(similarities[row], single_similarities, rtol=1e-5)
+    assert cosine_top_k_many(queries, matrix[:3], k=10)[0].shape == (13, 3)
+
+def test_domain_weights_scale_shift_and_normalize():
+    embeddings = np.array([[1.0, 1.0], [2.0, 0.0]])
+
+    weighted = apply_domain_weights(embeddings, scale=np.array([2.0, 1.0]), bias=1.0, normalize=False)
+    assert weighted.tolist() == [[3.0, 2.0], [5.0, 1.0]]
+    np.testing.assert_allclose(np.linalg.norm(apply_domain_weights(embeddings, scale=3.0), axis=1), 1.0, rtol=1e-6)
+    assert embeddings.tolist() == [[1.0, 1.0], [2.0, 0.0]]  # inputs are not modified
@@ -0,0 +1,134 @@
+"""
+Vector store snapshot format tests
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from context_engineering import vector_store
+from context_engineering.snapshot import TEXT_COLUMNS, SnapshotReader, SnapshotWriter
+from context_engineering.vector_store import PgVectorStore
+
+DIMENSION = 6
+
+def _columns(start: int, n: int):
+    columns = {name: [f"{name}-{start + i}" for i in range(n)] for name in TEXT_COLUMNS}
+    columns['content'] = [f"ünïcode {start + i} " * ((start + i) % 4) for i in range(n)]  # includes empty rows
+    columns['metadata'] = [f'{{"row": {start + i}}}' for i in range(n)]
+    columns['chunk_index'] = list(range(start, start + n))
+    return columns
+
+def test_round_trip_across_batch_boundaries(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(23, DIMENSION)).astype(np.float32)
+    writer = SnapshotWriter(tmp_path / 'snap', DIMENSION, source={'store': 'test'})
+    for start, stop in [(0, 10), (10, 10), (10, 23)]:
+        writer.write_batch(vectors[start:stop], _columns(start, stop - start))
+    manifest = writer.close()
+
+    reader = SnapshotReader(tmp_path / 'snap')
+    batches = list(reader.iter_batches(batch_size=7))
+
+    assert (manifest['rows'], len(reader), reader.manifest['source']) == (23, 23, {'store': 'test'})
+    assert [len(batch_vectors) for batch_vectors, _ in batches] == [7, 7, 7, 2]
+    np.testing.assert_array_equal(np.concatenate([batch_vectors for batch_vectors, _ in batches]), vectors)
+    expected = _columns(0, 23)
+    for name in [*TEXT_COLUMNS, 'chunk_index']:
+        assert sum((columns[name] for _, columns in batches), []) == expected[name]
+
+def test_empty_snapshot(tmp_path):
+    SnapshotWriter(tmp_path, DIMENSION).close()
+
+    reader = SnapshotReader(tmp_path)
+
+    assert len(reader) == 0
+    assert list(reader.iter_batches()) == []
+
+def test_aborted_export_is_not_readable(tmp_path):
+    writer = SnapshotWriter(tmp_path, DIMENSION)
+    writer.write_batch(np.zeros((2, DIMENSION)), _columns(0, 2))
+    writer.close(complete=False)
+
+    with pytest.raises(ValueError, match='missing manifest.json'):
+        SnapshotReader(tmp_path)
+
+def test_batches_are_validated(tmp_path):
+    writer = SnapshotWriter(tmp_path, DIMENSION)
+
+    with pytest.raises(ValueError, match='matrix'):
+        writer.write_batch(np.zeros((2, DIMENSION + 1)), _columns(0, 2))
+    columns = _columns(0, 2)
+    columns['id'] = ['only-one']
+    with pytest.raises(ValueError, match="Column 'id'"):
+        writer.write_batch(np.zeros((2, DIMENSION)), columns)
+    writer.close(complete=False)
+
+def test_truncated_vector_block_is_rejected(tmp_path):
+    writer = SnapshotWriter(tmp_path, DIMENSION)
+    writer.write_batch(np.zeros((3, DIMENSION)), _columns(0, 3))
+    writer.close()
+    with open(tmp_path / 'vectors.f32', 'r+b') as f:
+        f.truncate(4 * DIMENSION * 2)
+
+    with pytest.raises(ValueError, match='Vector block'):
+        SnapshotReader(tmp_path)
+
+class CatalogConnection:
+    """Answers the catalog lookups of PgVectorStore.connect, recording every statement"""
+
+    def __init__(self, dimension, partition_key=None):
+        self.dimension = dimension
+        self.partition_key = partition_key
+        self.statements = []
+
+    async def fetchval(self, query, *params):
+        self.statements.append(query)
+        if 'atttypmod' in query:
+            return self.dimension
+        return f"LIST ({self.partition_key})" if self.partition_key else None
+
+    async def execute(self, query, *params):
+        self.statements.append(query)
+
+    async def close(self):
+        pass
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """connect() against a fake catalog; returns (store, connection, pools created)"""
+    pools = []
+
+    async def create_pool(*args, **kwargs):
+        pools.append(kwargs)
+        return object()
+
+    def open_store(dimension, partition_key=None):
+        conn = CatalogConnection(dimension, partition_key)
+
+        async def connect(*args, **kwargs):
+            return conn
+
+        monkeypatch.setattr(vector_store.asyncpg, 'connect', connect)
+        monkeypatch.setattr(vector_store.asyncpg, 'create_pool', create_pool)
+        store = PgVectorStore('postgresql://unused')
+        return store, conn, pools
+
+    return open_store
+
+def test_export_connection_reads_the_schema_without_ddl(catalog):
+    store, conn, pools = catalog(768, partition_key='content_type')
+
+    asyncio.run(store.connect())
+
+    assert (store.dimension, store.partition_by, store._partitioned) == (768, 'content_type', True)
+    assert store._conflict_target == 'id, content_type'
+    assert len(pools) == 1
+    assert not any(keyword in statement.upper() for statement in conn.statements
+                   for keyword in ('CREATE', 'ALTER', 'INSERT'))
+
+def test_export_connection_requires_the_table(catalog):
+    store, _, pools = catalog(None)
+
+    with pytest.raises(RuntimeError, match='document_embeddings does not exist'):
+        asyncio.run(store.connect())
+    assert store.pool is None and pools == []
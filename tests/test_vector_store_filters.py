@@ -0,0 +1,161 @@
+"""
+Search filter compilation, filtered-search strategy and query shape tests
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from context_engineering.vector_store import HNSWConfig, PgVectorStore
+
+def _compile(filters):
+    params = []
+    conditions = PgVectorStore('postgresql://unused')._build_filter_conditions(filters, params)
+    return conditions, params
+
+def test_column_filters_take_values_and_lists():
+    conditions, params = _compile({'content_type': 'code', 'source_file': ('a.py', 'b.py')})
+
+    assert conditions == ["content_type = $1", "source_file = ANY($2::text[])"]
+    assert params == ['code', ['a.py', 'b.py']]
+
+def test_plain_and_eq_values_share_one_containment():
+    conditions, params = _compile({'metadata': {'lang': 'python', 'level': {'$eq': 2}}})
+
+    assert conditions == ["metadata @> $1::jsonb"]
+    assert json.loads(params[0]) == {'lang': 'python', 'level': 2}
+
+def test_in_and_exists_operators():
+    conditions, params = _compile({'metadata': {'tag': {'$in': ['a', 'b']}, 'owner': {'$exists': False}}})
+
+    assert conditions == ["(metadata @> $1::jsonb OR metadata @> $2::jsonb)", "NOT (metadata ? $3)"]
+    assert [json.loads(param) for param in params[:2]] == [{'tag': 'a'}, {'tag': 'b'}]
+    assert params[2] == 'owner'
+    assert _compile({'metadata': {'tag': {'$in': []}}})[0] == ["FALSE"]
+
+def test_range_operators_cast_numbers_only():
+    conditions, params = _compile({'metadata': {'size': {'$gte': 10, '$lt': 20}, 'date': {'$gt': '2024'}}})
+
+    assert conditions == [
+        "CASE WHEN jsonb_typeof(metadata->$1) = 'number' THEN (metadata->>$1)::float8 END >= $2",
+        "CASE WHEN jsonb_typeof(metadata->$3) = 'number' THEN (metadata->>$3)::float8 END < $4",
+        "metadata->>$5 > $6"
+    ]
+    assert params == ['size', 10.0, 'size', 20.0, 'date', '2024']
+
+def test_unsupported_operators_are_rejected():
+    with pytest.raises(ValueError, match=r"\$regex"):
+        _compile({'metadata': {'name': {'$regex': '^a'}}})
+
+def test_empty_filters_compile_to_nothing():
+    assert _compile(None) == ([], [])
+    assert _compile({'metadata': {}}) == ([], [])
+
+class CountingPool:
+    """Stands in for an asyncpg pool, answering the bounded match count"""
+
+    def __init__(self, matching):
+        self.matching = matching
+        self.queries = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def fetchval(self, query, *params):
+        self.queries.append((query, params))
+        return self.matching
+
+def test_filter_strategy_is_estimated_once_per_filter():
+    store = PgVectorStore('postgresql://unused', hnsw_config=HNSWConfig(exact_scan_max_rows=100))
+    store.pool = CountingPool(matching=5)
+    selective = {'metadata': {'lang': 'python'}}
+
+    async def choose(filters):
+        return await store._choose_filter_strategy(store.table_name, filters)
+
+    assert asyncio.run(choose(selective)) == 'exact'
+    assert asyncio.run(choose({'metadata': {'lang': 'python'}})) == 'exact'
+    assert len(store.pool.queries) == 1
+    assert 'LIMIT 101' in store.pool.queries[0][0]
+
+    store.pool.matching = 101
+    assert asyncio.run(choose({'metadata': {'lang': 'go'}})) == 'post_filter'
+    assert asyncio.run(choose(None)) == 'ann'
+    assert len(store.pool.queries) == 2
+
+def test_filter_strategy_expires_after_ttl():
+    store = PgVectorStore('postgresql://unused', hnsw_config=HNSWConfig(filter_estimate_ttl=0))
+    store.pool = CountingPool(matching=5)
+
+    for _ in range(2):
+        asyncio.run(store._choose_filter_strategy(store.table_name, {'content_type': 'code'}))
+
+    assert len(store.pool.queries) == 2
+
+class RecordingPool(CountingPool):
+    """Also records fetched queries, returning no rows"""
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, query, *params):
+        pass
+
+    async def fetch(self, query, *params):
+        self.queries.append((query, params))
+        return []
+
+@pytest.mark.parametrize('partitioned', [False, True])
+def test_hybrid_search_fuses_rows_by_their_full_key(partitioned):
+    store = PgVectorStore('postgresql://unused', partition_by='content_type' if partitioned else None)
+    store._partitioned = partitioned
+    store.pool = RecordingPool(matching=10 ** 6)
+
+    asyncio.run(store.hybrid_search([0.0] * 4, 'parser', limit=5,
+                                    filters={'content_type': 'code', 'source_file': 'a.py'}))
+
+    query, params = store.pool.queries[-1]
+    key = 'id, content_type' if partitioned else 'id'
+    assert f"GROUP BY {key}\n" in query and f"USING ({key})" in query
+    assert f"SELECT {key}, ts_rank_cd" in query
+    # Both rankings are filtered, on the partition key as well as the remaining columns
+    assert query.count("content_type = $8") == 2 and query.count("source_file = $9") == 2
+    assert params[7:] == ('code', 'a.py')
+
+class PreparingConnection(RecordingPool):
+    """Connection with the store's hot statement slot; prepared statements record their runs"""
+
+    def __init__(self):
+        super().__init__(matching=10 ** 6)
+        self.hot_statements = {}
+        self.prepared = []
+
+    async def prepare(self, query):
+        self.prepared.append(query)
+        connection = self
+
+        class Statement:
+            async def fetch(self, *params):
+                connection.queries.append(('prepared', params))
+                return []
+
+        return Statement()
+
+def test_unfiltered_searches_reuse_the_connections_prepared_statement():
+    store = PgVectorStore('postgresql://unused')
+    store.pool = PreparingConnection()
+
+    async def search(filters=None):
+        await store.similarity_search([0.0] * 4, limit=5, filters=filters)
+        await store.similarity_search_many([[0.0] * 4], limit=5, filters=filters)
+
+    asyncio.run(search())
+    asyncio.run(search())
+    assert len(store.pool.prepared) == 2  # one statement per query shape, prepared once
+    assert [query for query, _ in store.pool.queries] == ['prepared'] * 4
+
+    asyncio.run(search({'metadata': {'lang': 'go'}}))
+    assert len(store.pool.prepared) == 2  # filtered queries vary, so they stay in asyncpg's cache